@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Throughput / latency benchmark for UnifiedAnalyticsDB on a synthetic database.
+
+Builds (or reuses) a synthetic unified_analytics.db of --symbols x --years of
+snapshots every --interval-days for each analysis type, then times each
+operation for --iterations calls and reports calls/s, mean, p50 and p99
+latency as JSON. With --baseline, results are compared against an earlier
+JSON report and the run fails if any operation regressed beyond --tolerance.
+
+Presets: 'small' is 500 symbols and 'production' 5000 symbols, both with 3
+years of weekly snapshots (interval_days=7), i.e. ~156 dates per symbol and
+type rather than daily history. Pass --interval-days 1 for daily rows.
+
+The in-process read cache is off by default so latencies measure SQLite;
+with --read-cache-entries N repeated reads mostly hit the cache and the
+report reflects cache hits.
+
+Usage:
+    python benchmarks/db_benchmark.py [--preset production] [--symbols 500] [--years 3]
+        [--interval-days 7] [--iterations 200] [--output report.json]
+        [--baseline baseline.json] [--tolerance 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "lib"))
+
+from unified_analytics_db import UnifiedAnalyticsDB  # noqa: E402
+
+ANALYSIS_TYPES = ["fundamental", "technical", "sentiment", "volatility", "options"]
+
+PRESETS = {
+    "small": {"symbols": 500, "years": 3, "interval_days": 7},
+    "production": {"symbols": 5000, "years": 3, "interval_days": 7},
+}
+
+SECTORS = ["Technology", "Healthcare", "Financials", "Energy", "Industrials", "Consumer", "Utilities"]
+GRADES = list(UnifiedAnalyticsDB.INVESTMENT_GRADE_MAPPING)
+SIGNALS = ["STRONG_BUY", "BUY", "HOLD", "SELL", "STRONG_SELL"]
+
+# Columns filled per analysis type: name -> generator(rng)
+TYPE_COLUMNS = {
+    "fundamental": {
+        "roe": lambda r: r.uniform(-0.2, 0.6), "roa": lambda r: r.uniform(-0.1, 0.3),
+        "pe_ratio": lambda r: r.uniform(5, 80), "pb_ratio": lambda r: r.uniform(0.5, 20),
+        "debt_to_equity": lambda r: r.uniform(0, 3), "revenue_growth_1yr": lambda r: r.uniform(-0.3, 0.8),
+        "investment_grade": lambda r: r.choice(GRADES), "financial_health_score": lambda r: r.randint(1, 100),
+        "stock_classification": lambda r: r.choice(["GROWTH", "VALUE", "DIVIDEND"]),
+    },
+    "technical": {
+        "rsi_14": lambda r: r.uniform(10, 90), "price_vs_sma_50": lambda r: r.uniform(-0.3, 0.3),
+        "technical_score": lambda r: r.randint(1, 100), "technical_signal": lambda r: r.choice(SIGNALS),
+    },
+    "sentiment": {
+        "sentiment_score": lambda r: r.uniform(-1, 1), "news_sentiment_1w": lambda r: r.uniform(-1, 1),
+        "sentiment_trend": lambda r: r.choice(["IMPROVING", "STABLE", "DECLINING"]),
+    },
+    "volatility": {
+        "iv_rank": lambda r: r.uniform(0, 100), "implied_volatility": lambda r: r.uniform(0.1, 1.2),
+        "volatility_trend": lambda r: r.choice(["RISING", "FALLING", "STABLE"]),
+    },
+    "options": {
+        "put_call_ratio": lambda r: r.uniform(0.3, 2.0), "iv_percentile": lambda r: r.uniform(0, 100),
+    },
+}
+
+
+def synthetic_db(path: str, symbols: int, years: int, interval_days: int, seed: int = 7) -> dict:
+    """Create the synthetic database at path; returns row counts and build time."""
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    db = UnifiedAnalyticsDB(path)
+    today = date.today()
+    snapshots = [today - timedelta(days=d) for d in range(0, years * 365, interval_days)]
+    fresh_expiry = (datetime.now() + timedelta(hours=6)).isoformat()
+
+    profiles = [
+        (f"SYM{i:05d}", rng.choice(SECTORS), 10 ** rng.uniform(8.5, 12.5), rng.uniform(5, 900), rng.uniform(0.3, 2.5))
+        for i in range(symbols)
+    ]
+    rows = 0
+
+    def generate(analysis_type):
+        generators = TYPE_COLUMNS[analysis_type]
+        for symbol, sector, cap, price, beta in profiles:
+            for snapshot in snapshots:
+                # Only the newest snapshot is still inside its cache window
+                expiry = fresh_expiry if snapshot == today else (snapshot + timedelta(days=1)).isoformat()
+                yield symbol, {
+                    "analysis_type": analysis_type, "analysis_date": snapshot.isoformat(),
+                    **{column: g(rng) for column, g in generators.items()},
+                    "market_cap": cap, "current_price": price, "beta": beta, "sector": sector,
+                    "confidence_score": rng.randint(50, 95), "cache_expiry": expiry,
+                }
+
+    async def build():
+        nonlocal rows
+        for analysis_type in ANALYSIS_TYPES:
+            items = generate(analysis_type)
+            # Bounded calls: each returns a per-item result list
+            while batch := list(islice(items, 50_000)):
+                result = await db.store_normalized_many(batch, chunk_size=5000)
+                if result["status"] != "success":
+                    raise RuntimeError(f"Building {analysis_type} rows failed: "
+                                       f"{result.get('error') or result['failed']}")
+                rows += result["stored"]
+
+    asyncio.run(build())
+    db.close()
+    with sqlite3.connect(path) as conn:
+        conn.execute("ANALYZE")
+    return {"rows": rows, "build_seconds": round(time.perf_counter() - started, 1)}
+
+
+def percentile(sorted_samples: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, min(len(sorted_samples) - 1, int(round(q / 100 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[index]
+
+
+async def time_operation(make_call, iterations: int, warmup: int) -> dict:
+    for i in range(warmup):
+        await make_call(i)
+    samples = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        await make_call(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "throughput_per_s": round(iterations / elapsed, 1),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def operations(db: UnifiedAnalyticsDB, symbols: list, rng: random.Random) -> dict:
+    """Benchmarked calls, each taking the iteration number."""
+
+    def normalized_payload():
+        return {
+            "analysis_type": "fundamental",
+            "investment_classification": {"investment_grade": rng.choice(GRADES), "primary_category": "GROWTH"},
+            "financial_health": {"profitability": {"roe_2024": rng.uniform(0, 0.5), "roa_2024": rng.uniform(0, 0.2)}},
+            "valuation_metrics": {"pe_ratio": rng.uniform(5, 60), "pb_ratio": rng.uniform(1, 10)},
+            "company_profile": {"market_cap": 10 ** rng.uniform(9, 12), "sector": rng.choice(SECTORS)},
+            "current_price": {"price": rng.uniform(5, 500)},
+        }
+
+    screens = [
+        {"min_roe": 0.15, "max_pe": 25},
+        {"min_rsi": 60, "technical_signals": ["BUY", "STRONG_BUY"]},
+        {"min_sentiment": 0.3, "min_roe": 0.1},
+        {"filters": {"iv_rank": {"max": 30}}, "sort": [["market_cap", "desc"]], "limit": 50},
+    ]
+
+    return {
+        "store_normalized_analysis": lambda i: db.store_normalized_analysis(rng.choice(symbols), normalized_payload()),
+        "store_sentiment_analysis": lambda i: db.store_sentiment_analysis(rng.choice(symbols), {
+            "sentiment_score": rng.uniform(-1, 1), "sentiment_trend": "STABLE",
+            "confidence_level": rng.choice(["High", "Medium", "Low"]), "key_sentiment_drivers": ["earnings"],
+        }),
+        "get_cached_sentiment": lambda i: db.get_cached_sentiment(rng.choice(symbols)),
+        "advanced_screening": lambda i: db.advanced_screening(screens[i % len(screens)]),
+        "get_multi_dimensional_comparison": lambda i: db.get_multi_dimensional_comparison(rng.sample(symbols, 10)),
+    }
+
+
+async def run_benchmarks(db_path: str, symbols: int, iterations: int, warmup: int,
+                         read_cache_entries: int, only: list, seed: int) -> dict:
+    rng = random.Random(seed)
+    db = UnifiedAnalyticsDB(db_path, read_cache_entries=read_cache_entries)
+    names = [f"SYM{i:05d}" for i in range(symbols)]
+    results = {}
+    try:
+        for name, call in operations(db, names, rng).items():
+            if only and name not in only:
+                continue
+            results[name] = await time_operation(call, iterations, warmup)
+            print(f"{name}: {results[name]['throughput_per_s']}/s p50 {results[name]['p50_ms']}ms "
+                  f"p99 {results[name]['p99_ms']}ms", file=sys.stderr)
+    finally:
+        db.close()
+    return results
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions: p50/p99 latency up or throughput down by more than tolerance."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("operations", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if previous[metric] > 0 and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append({"operation": name, "metric": metric,
+                                    "baseline": previous[metric], "current": current[metric],
+                                    "change_pct": round((current[metric] / previous[metric] - 1) * 100, 1)})
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append({"operation": name, "metric": "throughput_per_s",
+                                "baseline": previous["throughput_per_s"], "current": current["throughput_per_s"],
+                                "change_pct": round((current["throughput_per_s"] / previous["throughput_per_s"] - 1) * 100, 1)})
+    return regressions
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="UnifiedAnalyticsDB throughput/latency benchmark")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small", help="Database size preset")
+    parser.add_argument("--symbols", type=int, help="Symbols in the synthetic database (overrides preset)")
+    parser.add_argument("--years", type=int, help="Years of history (overrides preset)")
+    parser.add_argument("--interval-days", type=int,
+                        help="Days between snapshots (overrides preset; presets use 7, i.e. weekly)")
+    parser.add_argument("--db", dest="db_path", help="Synthetic database path (default: temp dir, or reused if it exists)")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the database at --db even if it exists")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed calls per operation")
+    parser.add_argument("--warmup", type=int, default=10, help="Untimed calls per operation")
+    parser.add_argument("--read-cache-entries", type=int, default=0,
+                        help="In-process read cache size (default 0: disabled, so reads hit SQLite)")
+    parser.add_argument("--only", nargs="*", default=[], help="Operations to run (default: all)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for data and call arguments")
+    parser.add_argument("--output", help="Write the JSON report here as well as stdout")
+    parser.add_argument("--baseline", help="Earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    config = dict(PRESETS[args.preset])
+    for key in ("symbols", "years", "interval_days"):
+        if getattr(args, key) is not None:
+            config[key] = getattr(args, key)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db_path or os.path.join(tmp, "unified_analytics.db")
+        build = None
+        if args.rebuild or not os.path.exists(db_path):
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+            print(f"Building synthetic database {db_path} ...", file=sys.stderr)
+            build = synthetic_db(db_path, config["symbols"], config["years"], config["interval_days"], args.seed)
+
+        results = asyncio.run(run_benchmarks(
+            db_path, config["symbols"], args.iterations, args.warmup,
+            args.read_cache_entries, args.only, args.seed
+        ))
+        db_bytes = os.path.getsize(db_path)
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": dict(config, iterations=args.iterations, warmup=args.warmup,
+                       read_cache_entries=args.read_cache_entries, seed=args.seed),
+        "database": dict(build or {}, bytes=db_bytes),
+        "operations": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline"] = {"path": args.baseline, "git_revision": baseline.get("git_revision"),
+                              "tolerance": args.tolerance}
+        report["regressions"] = compare_to_baseline(results, baseline, args.tolerance)
+        if report["regressions"]:
+            for r in report["regressions"]:
+                print(f"REGRESSION: {r['operation']} {r['metric']} {r['baseline']} -> {r['current']} "
+                      f"({r['change_pct']:+}%)", file=sys.stderr)
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for cache-check processes.
+
+Spawns fresh interpreters that import UnifiedAnalyticsDB and run one
+get_cached_sentiment() + get_cached_market_pulse() check, and fails if pandas
+got imported or if the median import time or import + check time (which
+includes asyncio and schema setup) exceeds its budget.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 10] [--max-import-ms 25] [--max-ms 100]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIB_DIR = os.path.join(PROJECT_ROOT, "lib")
+
+CHILD = r'''
+import time
+t0 = time.perf_counter()
+import sys
+sys.path.insert(0, {lib!r})
+from unified_analytics_db import UnifiedAnalyticsDB
+t1 = time.perf_counter()
+import asyncio, json
+
+async def check():
+    db = UnifiedAnalyticsDB({db!r})
+    await db.get_cached_sentiment("AAPL")
+    await db.get_cached_market_pulse()
+    db.close()
+
+asyncio.run(check())
+t2 = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (t1 - t0) * 1000,
+    "total_ms": (t2 - t0) * 1000,
+    "pandas_loaded": "pandas" in sys.modules,
+}}))
+'''
+
+
+def run_once(db_path: str) -> dict:
+    code = CHILD.format(lib=LIB_DIR, db=db_path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for UnifiedAnalyticsDB cache checks")
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters to time")
+    parser.add_argument("--max-import-ms", type=float, default=25.0, help="Budget for median module import")
+    parser.add_argument("--max-ms", type=float, default=100.0, help="Budget for median import + cache check")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup_bench.db")
+        run_once(db_path)  # create the schema outside the timed runs
+        samples = [run_once(db_path) for _ in range(args.runs)]
+
+    result = {
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(s["import_ms"] for s in samples), 1),
+        "total_ms_median": round(statistics.median(s["total_ms"] for s in samples), 1),
+        "total_ms_max": round(max(s["total_ms"] for s in samples), 1),
+        "pandas_loaded": any(s["pandas_loaded"] for s in samples),
+        "import_budget_ms": args.max_import_ms,
+        "budget_ms": args.max_ms,
+    }
+    print(json.dumps(result, indent=2))
+
+    if result["pandas_loaded"]:
+        print("FAIL: pandas was imported on the cache-check path", file=sys.stderr)
+        return 1
+    if result["import_ms_median"] > args.max_import_ms:
+        print(f"FAIL: median import {result['import_ms_median']}ms exceeds {args.max_import_ms}ms", file=sys.stderr)
+        return 1
+    if result["total_ms_median"] > args.max_ms:
+        print(f"FAIL: median cold start {result['total_ms_median']}ms exceeds {args.max_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
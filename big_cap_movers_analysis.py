@@ -4,94 +4,632 @@ Big Cap Movers Analysis
 Analyzes market movers with market cap >= $100B and provides news + sentiment
 """
 
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from datetime import datetime
-from typing import Dict, List, Any
+import random
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Any, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
 import sys
 
 # FMP API Configuration
 import os
+
+from lib.instrumentation import get_instrumentation
+
 FMP_API_KEY = os.getenv("FMP_API_KEY")
 FMP_BASE_URL = "https://financialmodelingprep.com/api/v3"
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
 
-def make_fmp_request(endpoint: str, params: Dict = None) -> Any:
+# Async fetch engine configuration
+FMP_MAX_CONCURRENCY = int(os.getenv("FMP_MAX_CONCURRENCY", "10"))
+FMP_RATE_LIMIT_PER_SEC = float(os.getenv("FMP_RATE_LIMIT_PER_SEC", "10"))
+FMP_REQUEST_TIMEOUT = 30
+RUN_DEADLINE_SECONDS = float(os.getenv("BIG_CAP_RUN_DEADLINE_SECONDS", "120"))
+
+# Pooled session and retry configuration
+FMP_POOL_SIZE = int(os.getenv("FMP_POOL_SIZE", "10"))
+FMP_KEEPALIVE_SECONDS = 30
+FMP_MAX_RETRIES = int(os.getenv("FMP_MAX_RETRIES", "3"))
+FMP_BACKOFF_BASE_SECONDS = float(os.getenv("FMP_BACKOFF_BASE_SECONDS", "0.5"))
+FMP_BACKOFF_MAX_SECONDS = float(os.getenv("FMP_BACKOFF_MAX_SECONDS", "30"))
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Sentiment lexicon (weighted keywords), see config/sentiment_lexicon.json
+SENTIMENT_LEXICON_PATH = os.getenv("SENTIMENT_LEXICON_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "config", "sentiment_lexicon.json"
+)
+
+# Screening configuration
+MIN_MARKET_CAP = 100_000_000_000  # $100B
+MAX_STOCKS_PER_CATEGORY = 10
+NEWS_PER_STOCK = 5
+PROFILE_BATCH_SIZE = 50  # symbols per comma-separated profile request
+
+# Response cache configuration
+FMP_CACHE_PATH = os.getenv("FMP_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "fmp_response_cache.db"
+)
+FMP_CACHE_ENABLED = os.getenv("FMP_CACHE_DISABLED", "").lower() not in ("1", "true", "yes")
+FMP_CACHE_MAX_ENTRIES = int(os.getenv("FMP_CACHE_MAX_ENTRIES", "5000"))
+FMP_CACHE_TOUCH_BATCH = 256  # LRU access times buffered before one write
+
+# FMP reports quota and key problems as HTTP 200 with a dict body, e.g. {"Error Message": "Limit Reach ..."}
+FMP_ERROR_KEYS = ("Error Message", "error", "message")
+
+# TTL in seconds, keyed by full endpoint or by its first path segment
+FMP_CACHE_TTLS = {
+    "profile": 24 * 3600,  # Company profiles barely change within a day
+    "stock_market": 60,    # Movers lists
+    "stock_news": 15 * 60,
+    "default": 5 * 60
+}
+
+class FMPResponseCache:
+    """Persistent SQLite cache of FMP JSON responses with per-endpoint TTLs and an LRU size cap"""
+
+    def __init__(self, db_path: str = FMP_CACHE_PATH, ttls: Dict[str, int] = None,
+                 max_entries: int = FMP_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.ttls = {**FMP_CACHE_TTLS, **_parse_ttl_overrides(os.getenv("FMP_CACHE_TTLS", "")), **(ttls or {})}
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._touches: Dict[str, float] = {}  # cache_key -> last hit not yet written
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('''
+        CREATE TABLE IF NOT EXISTS http_cache (
+            cache_key TEXT PRIMARY KEY,
+            endpoint TEXT NOT NULL,
+            response_json TEXT NOT NULL,
+            stored_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_last_access ON http_cache(last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict = None) -> str:
+        """Cache key from endpoint plus sorted params; the API key is never part of it"""
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "apikey" and v is not None)
+        return f"{endpoint}?{urlencode(items)}" if items else endpoint
+
+    def ttl_for(self, endpoint: str) -> int:
+        """TTL seconds for endpoint (exact match first, then first path segment)"""
+        if endpoint in self.ttls:
+            return self.ttls[endpoint]
+        return self.ttls.get(endpoint.split("/", 1)[0], self.ttls["default"])
+
+    def get(self, endpoint: str, params: Dict = None) -> Tuple[bool, Any]:
+        """Return (hit, value) for a cached response.
+
+        Lookups don't write: a hit's LRU access time is buffered and flushed
+        in batches (or by the next set()), and expired rows are purged by set().
+        """
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response_json, expires_at FROM http_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.stats["misses"] += 1
+                return False, None
+
+            if row[1] <= now:
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return False, None
+
+            self._touches[key] = now
+            if len(self._touches) >= FMP_CACHE_TOUCH_BATCH:
+                self._flush_touches()
+                self._conn.commit()
+            self.stats["hits"] += 1
+        return True, json.loads(row[0])
+
+    def set(self, endpoint: str, params: Dict, value: Any) -> None:
+        """Store a successful response and enforce the LRU size cap"""
+        ttl = self.ttl_for(endpoint)
+        if ttl <= 0 or not is_successful_response(value):
+            return
+
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        with self._lock:
+            self._flush_touches()
+            self._conn.execute('''
+            INSERT OR REPLACE INTO http_cache
+            (cache_key, endpoint, response_json, stored_at, expires_at, last_access)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (key, endpoint, json.dumps(value), now, now + ttl, now))
+            self.stats["stores"] += 1
+
+            self._conn.execute("DELETE FROM http_cache WHERE expires_at <= ?", (now,))
+            excess = self._conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self._conn.execute('''
+                DELETE FROM http_cache WHERE cache_key IN (
+                    SELECT cache_key FROM http_cache ORDER BY last_access LIMIT ?
+                )''', (excess,))
+                self.stats["evictions"] += excess
+            self._conn.commit()
+
+    def _flush_touches(self) -> None:
+        """Write buffered LRU access times; the caller holds the lock and commits"""
+        if self._touches:
+            self._conn.executemany("UPDATE http_cache SET last_access = ? WHERE cache_key = ?",
+                                   [(at, key) for key, at in self._touches.items()])
+            self._touches.clear()
+
+    def flush(self) -> None:
+        """Persist buffered LRU access times"""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+
+    def summary(self) -> str:
+        """One-line hit/miss summary for logs"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = (self.stats["hits"] / lookups * 100) if lookups else 0.0
+        return (f"FMP cache: {self.stats['hits']} hits, {self.stats['misses']} misses "
+                f"({hit_rate:.0f}% hit rate), {self.stats['evictions']} evictions")
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+def is_successful_response(data: Any) -> bool:
+    """True for a payload worth caching: not None and not an FMP error body"""
+    if data is None:
+        return False
+    return not (isinstance(data, dict) and any(key in data for key in FMP_ERROR_KEYS))
+
+def _parse_ttl_overrides(spec: str) -> Dict[str, int]:
+    """Parse FMP_CACHE_TTLS, e.g. "profile=86400,stock_news=900" """
+    overrides = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            try:
+                overrides[name.strip()] = int(seconds)
+            except ValueError:
+                print(f"Ignoring invalid FMP_CACHE_TTLS entry: {item}", file=sys.stderr)
+    return overrides
+
+_response_cache: Optional[FMPResponseCache] = None
+
+def get_response_cache() -> Optional[FMPResponseCache]:
+    """Shared response cache, or None when caching is disabled or unavailable"""
+    global _response_cache
+    if _response_cache is None and FMP_CACHE_ENABLED:
+        try:
+            _response_cache = FMPResponseCache()
+        except Exception as e:
+            print(f"FMP response cache unavailable: {e}", file=sys.stderr)
+            return None
+    return _response_cache
+
+def retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry number attempt+1.
+
+    Honours a Retry-After header (delta-seconds or HTTP date) when the server
+    sends one, otherwise uses full-jitter exponential backoff.
+    """
+    if retry_after:
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                seconds = None
+        if seconds is not None:
+            return min(max(seconds, 0.0), FMP_BACKOFF_MAX_SECONDS)
+
+    return random.uniform(0, min(FMP_BACKOFF_MAX_SECONDS, FMP_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+_http_session: Optional[requests.Session] = None
+
+def get_http_session() -> requests.Session:
+    """Shared keep-alive session so repeated FMP calls reuse TCP+TLS connections"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=FMP_POOL_SIZE, pool_maxsize=FMP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session = session
+    return _http_session
+
+def create_async_session(pool_size: int = FMP_POOL_SIZE) -> aiohttp.ClientSession:
+    """Pooled keep-alive aiohttp session for FetchEngine"""
+    connector = aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_size,
+                                     keepalive_timeout=FMP_KEEPALIVE_SECONDS)
+    return aiohttp.ClientSession(connector=connector)
+
+def endpoint_label(endpoint: str) -> str:
+    """Metric label for an endpoint: 'profile/AAPL' -> 'profile/{symbol}', 'profile/A,B' -> 'profile/{symbols}'"""
+    head, _, last = endpoint.rpartition("/")
+    if head and re.fullmatch(r"[A-Z0-9.^\-]+(,[A-Z0-9.^\-]+)*", last):
+        return f"{head}/{{symbols}}" if "," in last else f"{head}/{{symbol}}"
+    return endpoint
+
+def make_fmp_request(endpoint: str, params: Dict = None, use_cache: bool = True) -> Any:
     """Make authenticated request to FMP API"""
     if params is None:
         params = {}
 
-    params['apikey'] = FMP_API_KEY
-    url = f"{FMP_BASE_URL}/{endpoint}"
-
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error making FMP request to {endpoint}: {e}", file=sys.stderr)
-        return None
-
-def get_market_movers(change_type: str) -> List[Dict]:
+    with get_instrumentation().span("fmp", endpoint_label(endpoint)) as span:
+        cache = get_response_cache() if use_cache else None
+        if cache:
+            hit, cached = cache.get(endpoint, params)
+            if hit:
+                span.outcome = "cache_hit"
+                return cached
+
+        params['apikey'] = FMP_API_KEY
+        url = f"{FMP_BASE_URL}/{endpoint}"
+
+        session = get_http_session()
+        for attempt in range(FMP_MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                response = session.get(url, params=params, timeout=FMP_REQUEST_TIMEOUT)
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < FMP_MAX_RETRIES:
+                    retry_after = response.headers.get("Retry-After")
+                    error = f"HTTP {response.status_code}"
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    span.bytes = len(response.content)
+                    break
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= FMP_MAX_RETRIES:
+                    print(f"Error making FMP request to {endpoint}: {e}", file=sys.stderr)
+                    span.outcome = "error"
+                    return None
+                error = str(e)
+            except Exception as e:
+                print(f"Error making FMP request to {endpoint}: {e}", file=sys.stderr)
+                span.outcome = "error"
+                return None
+
+            delay = retry_delay(attempt, retry_after)
+            print(f"Retrying FMP request to {endpoint} in {delay:.1f}s ({error})", file=sys.stderr)
+            time.sleep(delay)
+
+        span.outcome = "cache_miss" if cache else "ok"
+        span.rows = len(data) if isinstance(data, list) else 0
+        if cache and is_successful_response(data):
+            cache.set(endpoint, params, data)
+        return data
+
+MOVER_ENDPOINTS = {
+    "gainers": "stock_market/gainers",
+    "losers": "stock_market/losers",
+    "actives": "stock_market/actives"
+}
+
+def collect_mover_symbols(all_movers: Dict[str, List[Dict]]) -> List[str]:
+    """Unique symbols across all mover categories, in first-seen order"""
+    return list(dict.fromkeys(
+        stock.get("symbol") for movers in all_movers.values() for stock in movers if stock.get("symbol")
+    ))
+
+def chunk_symbols(symbols: List[str], size: int = PROFILE_BATCH_SIZE) -> List[List[str]]:
+    """Split symbols into chunks for comma-separated bulk requests"""
+    size = max(1, size)
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+def _index_profiles(data: Any, min_market_cap: float = 0) -> Dict[str, Dict]:
+    """Map a bulk profile response by symbol, dropping profiles below min_market_cap"""
+    profiles = {}
+    if data and isinstance(data, list):
+        for profile in data:
+            symbol = profile.get("symbol") if isinstance(profile, dict) else None
+            if symbol and (profile.get("mktCap") or 0) >= min_market_cap:
+                profiles[symbol] = profile
+    return profiles
+
+def _split_cached_profiles(symbols: List[str]) -> Tuple[List[Any], List[str]]:
+    """Return (cached profile responses, symbols still to fetch).
+
+    Profiles are cached per symbol under profile/{symbol}, so bulk chunks with
+    a different mix of tickers still reuse earlier lookups.
+    """
+    cache = get_response_cache()
+    if not cache:
+        return [], symbols
+
+    cached, missing = [], []
+    for symbol in symbols:
+        hit, data = cache.get(f"profile/{symbol}")
+        if hit:
+            cached.append(data)
+        else:
+            missing.append(symbol)
+    return cached, missing
+
+def _cache_profiles(data: Any) -> None:
+    """Store each profile of a bulk response under its own profile/{symbol} key"""
+    cache = get_response_cache()
+    if cache and data and isinstance(data, list):
+        for profile in data:
+            if isinstance(profile, dict) and profile.get("symbol"):
+                cache.set(f"profile/{profile['symbol']}", {}, [profile])
+
+class HostRateLimiter:
+    """Token bucket rate limiter keyed by host, shared by every coroutine in a run"""
+
+    def __init__(self, rate_per_sec: float, burst: Optional[int] = None):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst or max(1, int(rate_per_sec))
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def acquire(self, host: str) -> None:
+        """Wait until a request slot is available for host"""
+        if self.rate_per_sec <= 0:
+            return
+
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            tokens, last_refill = self._buckets.get(host, (float(self.burst), now))
+            tokens = min(self.burst, tokens + (now - last_refill) * self.rate_per_sec)
+
+            if tokens < 1:
+                # Holding the lock while sleeping keeps waiters in FIFO order
+                await asyncio.sleep((1 - tokens) / self.rate_per_sec)
+                now = time.monotonic()
+                tokens = 1.0
+
+            self._buckets[host] = (tokens - 1, now)
+
+
+class FetchEngine:
+    """Concurrent FMP fetcher with bounded concurrency, per-host rate limiting and a run deadline"""
+
+    def __init__(self, session, max_concurrency: int = FMP_MAX_CONCURRENCY,
+                 rate_per_sec: float = FMP_RATE_LIMIT_PER_SEC,
+                 deadline_seconds: float = RUN_DEADLINE_SECONDS):
+        self.session = session
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._rate_limiter = HostRateLimiter(rate_per_sec)
+        self._deadline = time.monotonic() + deadline_seconds
+
+    def time_remaining(self) -> float:
+        """Seconds left before the run deadline"""
+        return self._deadline - time.monotonic()
+
+    async def fetch_json(self, endpoint: str, params: Dict = None, use_cache: bool = True) -> Any:
+        """Async equivalent of make_fmp_request; returns None on any failure"""
+        params = dict(params or {})
+
+        with get_instrumentation().span("fmp", endpoint_label(endpoint)) as span:
+            # The cache is blocking sqlite; keep it off the event loop
+            cache = get_response_cache() if use_cache else None
+            if cache:
+                hit, cached = await asyncio.to_thread(cache.get, endpoint, params)
+                if hit:
+                    span.outcome = "cache_hit"
+                    return cached
+
+            params['apikey'] = FMP_API_KEY
+            url = f"{FMP_BASE_URL}/{endpoint}"
+
+            remaining = self.time_remaining()
+            if remaining <= 0:
+                print(f"Run deadline exceeded, skipping FMP request to {endpoint}", file=sys.stderr)
+                span.outcome = "deadline"
+                return None
+
+            try:
+                data, span.bytes = await asyncio.wait_for(self._get(url, params), timeout=remaining)
+            except asyncio.TimeoutError:
+                print(f"Run deadline exceeded during FMP request to {endpoint}", file=sys.stderr)
+                span.outcome = "deadline"
+                return None
+            except Exception as e:
+                print(f"Error making FMP request to {endpoint}: {e}", file=sys.stderr)
+                span.outcome = "error"
+                return None
+
+            span.outcome = "cache_miss" if cache else "ok"
+            span.rows = len(data) if isinstance(data, list) else 0
+            if cache and is_successful_response(data):
+                await asyncio.to_thread(cache.set, endpoint, params, data)
+            return data
+
+    async def _get(self, url: str, params: Dict) -> Tuple[Any, int]:
+        """(parsed JSON, response body bytes) with retries"""
+        # aiohttp only accepts str/int/float query values
+        query = {k: str(v) for k, v in params.items() if v is not None}
+        host = urlsplit(url).netloc
+
+        for attempt in range(FMP_MAX_RETRIES + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    await self._rate_limiter.acquire(host)
+                    async with self.session.get(url, params=query,
+                                                timeout=aiohttp.ClientTimeout(total=FMP_REQUEST_TIMEOUT)) as response:
+                        if response.status in RETRYABLE_STATUS_CODES and attempt < FMP_MAX_RETRIES:
+                            retry_after = response.headers.get("Retry-After")
+                            error = f"HTTP {response.status}"
+                        else:
+                            response.raise_for_status()
+                            # Same parsing as response.json(content_type=None), keeping the size
+                            body = await response.read()
+                            return (json.loads(body) if body.strip() else None), len(body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= FMP_MAX_RETRIES:
+                    raise
+                error = str(e) or type(e).__name__
+
+            # Back off outside the semaphore so other requests keep flowing
+            delay = retry_delay(attempt, retry_after)
+            print(f"Retrying {urlsplit(url).path} in {delay:.1f}s ({error})", file=sys.stderr)
+            await asyncio.sleep(delay)
+
+
+async def get_market_movers_async(engine: FetchEngine, change_type: str) -> List[Dict]:
     """Get market movers (gainers, losers, most active)"""
-    endpoint_map = {
-        "gainers": "stock_market/gainers",
-        "losers": "stock_market/losers",
-        "actives": "stock_market/actives"
-    }
-
-    endpoint = endpoint_map.get(change_type)
+    endpoint = MOVER_ENDPOINTS.get(change_type)
     if not endpoint:
         print(f"Invalid change_type: {change_type}", file=sys.stderr)
         return []
 
-    data = make_fmp_request(endpoint)
+    data = await engine.fetch_json(endpoint)
     return data if data and isinstance(data, list) else []
 
-def get_company_profile(symbol: str) -> Dict:
-    """Get company profile including market cap"""
-    data = make_fmp_request(f"profile/{symbol}")
-    if data and isinstance(data, list) and len(data) > 0:
-        return data[0]
-    return {}
-
-def get_stock_news(symbol: str, limit: int = 5) -> List[Dict]:
+async def get_company_profiles_async(engine: FetchEngine, symbols: List[str], min_market_cap: float = 0,
+                                     batch_size: int = PROFILE_BATCH_SIZE) -> Dict[str, Dict]:
+    """Get company profiles for many symbols using chunked bulk requests, fetched concurrently"""
+    responses, missing = await asyncio.to_thread(_split_cached_profiles, list(dict.fromkeys(symbols)))
+    fetched = await asyncio.gather(*(
+        engine.fetch_json(f"profile/{','.join(chunk)}", use_cache=False)
+        for chunk in chunk_symbols(missing, batch_size)
+    ))
+    for data in fetched:
+        await asyncio.to_thread(_cache_profiles, data)
+    responses.extend(fetched)
+
+    profiles = {}
+    for data in responses:
+        profiles.update(_index_profiles(data, min_market_cap))
+    return profiles
+
+async def get_stock_news_async(engine: FetchEngine, symbol: str, limit: int = NEWS_PER_STOCK) -> List[Dict]:
     """Get recent news for a stock"""
-    data = make_fmp_request(f"stock_news", {"tickers": symbol, "limit": limit})
+    data = await engine.fetch_json("stock_news", {"tickers": symbol, "limit": limit})
     return data if data and isinstance(data, list) else []
 
-def analyze_sentiment_simple(symbol: str, news: List[Dict]) -> Dict:
-    """Simple sentiment analysis based on news headlines"""
-    if not news:
+DEFAULT_SENTIMENT_LEXICON = {
+    "inflections": ["s", "es", "ed", "d", "ing", "er", "est"],
+    "positive": {k: 1.0 for k in ["gain", "surge", "rally", "bullish", "upgrade", "beat", "record", "high", "growth", "success"]},
+    "negative": {k: 1.0 for k in ["loss", "drop", "fall", "bearish", "downgrade", "miss", "low", "decline", "sell", "warning"]}
+}
+
+class SentimentScorer:
+    """Headline sentiment scorer built on one precompiled word-boundary regex.
+
+    Every lexicon keyword (plus its configured inflections) is folded into a
+    single alternation, so a batch of titles is scanned in one pass instead of
+    once per keyword. Word boundaries stop "low" matching "follow" and "high"
+    matching "highlight"; comparative suffixes keep "higher"/"lowest" counting
+    as "high"/"low". Stems are not rewritten, so "dropped" or "declining" only
+    match if listed as keywords. Each keyword counts at most once per title.
+    """
+
+    def __init__(self, lexicon: Dict = None):
+        lexicon = lexicon or DEFAULT_SENTIMENT_LEXICON
+        self.weights: Dict[str, float] = {}
+        for keyword, weight in lexicon.get("positive", {}).items():
+            self.weights[keyword.lower()] = float(weight)
+        for keyword, weight in lexicon.get("negative", {}).items():
+            self.weights[keyword.lower()] = -float(weight)
+
+        # Longest keywords first so alternation prefers the most specific match
+        keywords = sorted(self.weights, key=len, reverse=True)
+        suffixes = "|".join(re.escape(x) for x in sorted(lexicon.get("inflections", []), key=len, reverse=True))
+        suffix_group = f"(?:{suffixes})?" if suffixes else ""
+        self.pattern = re.compile(
+            r"\b(" + "|".join(re.escape(k) for k in keywords) + r")" + suffix_group + r"\b"
+        ) if keywords else None
+
+    @classmethod
+    def from_config(cls, path: str = SENTIMENT_LEXICON_PATH) -> "SentimentScorer":
+        """Load the lexicon from JSON, falling back to the built-in keywords"""
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Using default sentiment lexicon ({e})", file=sys.stderr)
+            return cls()
+
+    def score_batch(self, news_by_symbol: Dict[str, List[Dict]], max_articles: Optional[int] = None) -> Dict[str, Dict]:
+        """Score every symbol's headlines in one regex pass.
+
+        Returns {symbol: {"score", "category", "summary"}} matching
+        analyze_sentiment_simple; max_articles=None scores full histories.
+        """
+        owners: List[str] = []
+        starts: List[int] = []
+        texts: List[str] = []
+        offset = 0
+        for symbol, news in news_by_symbol.items():
+            for article in (news or [])[:max_articles]:
+                title = (article.get("title") or "").lower()
+                owners.append(symbol)
+                starts.append(offset)
+                texts.append(title)
+                offset += len(title) + 1  # newline separator is a word boundary
+
+        positive = dict.fromkeys(news_by_symbol, 0.0)
+        negative = dict.fromkeys(news_by_symbol, 0.0)
+        if self.pattern is not None and texts:
+            seen = set()
+            for match in self.pattern.finditer("\n".join(texts)):
+                title_index = bisect_right(starts, match.start()) - 1
+                keyword = match.group(1)
+                if (title_index, keyword) in seen:
+                    continue
+                seen.add((title_index, keyword))
+
+                weight = self.weights[keyword]
+                if weight >= 0:
+                    positive[owners[title_index]] += weight
+                else:
+                    negative[owners[title_index]] -= weight
+
         return {
-            "score": 50,
-            "category": "Neutral",
-            "summary": "No recent news available for sentiment analysis"
+            symbol: _sentiment_result(positive[symbol], negative[symbol], len(news or []))
+            for symbol, news in news_by_symbol.items()
         }
 
-    # Simple keyword-based sentiment
-    positive_keywords = ["gain", "surge", "rally", "bullish", "upgrade", "beat", "record", "high", "growth", "success"]
-    negative_keywords = ["loss", "drop", "fall", "bearish", "downgrade", "miss", "low", "decline", "sell", "warning"]
+_sentiment_scorer: Optional[SentimentScorer] = None
 
-    positive_count = 0
-    negative_count = 0
+def get_sentiment_scorer() -> SentimentScorer:
+    """Shared scorer, compiled once per process"""
+    global _sentiment_scorer
+    if _sentiment_scorer is None:
+        _sentiment_scorer = SentimentScorer.from_config()
+    return _sentiment_scorer
 
-    for article in news[:5]:
-        title = article.get("title", "").lower()
-        for keyword in positive_keywords:
-            if keyword in title:
-                positive_count += 1
-        for keyword in negative_keywords:
-            if keyword in title:
-                negative_count += 1
+def _sentiment_result(positive: float, negative: float, article_count: int) -> Dict:
+    """Map weighted keyword totals to the score/category/summary dict"""
+    if article_count == 0:
+        return {
+            "score": 50,
+            "category": "Neutral",
+            "summary": "No recent news available for sentiment analysis"
+        }
 
     # Calculate score (0-100)
-    total = positive_count + negative_count
+    total = positive + negative
     if total == 0:
         score = 50
         category = "Neutral"
     else:
-        score = int((positive_count / total) * 100)
+        score = int((positive / total) * 100)
         if score >= 70:
             category = "Bullish"
         elif score >= 55:
@@ -106,30 +644,15 @@ def analyze_sentiment_simple(symbol: str, news: List[Dict]) -> Dict:
     return {
         "score": score,
         "category": category,
-        "summary": f"Sentiment based on {len(news)} recent news articles"
+        "summary": f"Sentiment based on {article_count} recent news articles"
     }
 
-def main():
-    """Main analysis function"""
-    print("Starting Big Cap Movers Analysis...\n", file=sys.stderr)
-
-    # Step 1: Fetch market movers
-    print("Fetching market movers...", file=sys.stderr)
-    gainers = get_market_movers("gainers")
-    losers = get_market_movers("losers")
-    actives = get_market_movers("actives")
-
-    print(f"Found {len(gainers)} gainers, {len(losers)} losers, {len(actives)} actives\n", file=sys.stderr)
-
-    # Step 2: Get company profiles and filter by market cap >= $100B
-    MIN_MARKET_CAP = 100_000_000_000  # $100B
-
-    all_movers = {
-        "gainers": gainers,
-        "losers": losers,
-        "actives": actives
-    }
+def analyze_sentiment_simple(symbol: str, news: List[Dict], max_articles: Optional[int] = NEWS_PER_STOCK) -> Dict:
+    """Simple sentiment analysis based on news headlines"""
+    return get_sentiment_scorer().score_batch({symbol: news}, max_articles=max_articles)[symbol]
 
+def select_big_cap_stocks(all_movers: Dict[str, List[Dict]], profiles: Dict[str, Dict]) -> Tuple[Dict, Dict]:
+    """Filter movers to big caps, keeping at most MAX_STOCKS_PER_CATEGORY per category"""
     filtered_stocks = {}
     category_summary = {
         "gainers": {"count": 0, "symbols": []},
@@ -140,14 +663,14 @@ def main():
     for category, movers in all_movers.items():
         print(f"Processing {category}...", file=sys.stderr)
         category_key = "most_active" if category == "actives" else category
+        category_label = category_key.replace("_", " ").title()
 
         for stock in movers:  # Check all movers to ensure we get 10 big caps
             symbol = stock.get("symbol")
             if not symbol:
                 continue
 
-            # Get company profile
-            profile = get_company_profile(symbol)
+            profile = profiles.get(symbol)
             if not profile:
                 continue
 
@@ -164,12 +687,12 @@ def main():
                     "price": stock.get("price", profile.get("price", 0)),
                     "change_dollars": stock.get("change", 0),
                     "change_percent": stock.get("changesPercentage", 0),
-                    "categories": [category_key.replace("_", " ").title()]
+                    "categories": [category_label]
                 }
             else:
                 # Stock appears in multiple categories
-                if category_key.replace("_", " ").title() not in filtered_stocks[symbol]["categories"]:
-                    filtered_stocks[symbol]["categories"].append(category_key.replace("_", " ").title())
+                if category_label not in filtered_stocks[symbol]["categories"]:
+                    filtered_stocks[symbol]["categories"].append(category_label)
 
             # Add to category summary
             if symbol not in category_summary[category_key]["symbols"]:
@@ -177,35 +700,43 @@ def main():
                 category_summary[category_key]["count"] += 1
 
             # Stop after 10 stocks per category
-            if category_summary[category_key]["count"] >= 10:
+            if category_summary[category_key]["count"] >= MAX_STOCKS_PER_CATEGORY:
                 break
 
-    print(f"\nFound {len(filtered_stocks)} unique big cap stocks\n", file=sys.stderr)
+    return filtered_stocks, category_summary
 
-    # Step 3: Get news and sentiment for each stock
+def apply_news_and_sentiment(filtered_stocks: Dict[str, Dict], news_results: Dict[str, Any]) -> List[str]:
+    """Attach news and sentiment to each stock; returns data error messages"""
     data_errors = []
 
     for symbol, stock_data in filtered_stocks.items():
         print(f"Analyzing {symbol}...", file=sys.stderr)
 
-        # Get news
-        try:
-            news = get_stock_news(symbol, limit=5)
-            stock_data["news"] = [
-                {
-                    "title": article.get("title", ""),
-                    "url": article.get("url", ""),
-                    "date": article.get("publishedDate", "")
-                }
-                for article in news[:5]
-            ]
-        except Exception as e:
-            stock_data["news"] = []
-            data_errors.append(f"News unavailable for {symbol}: {str(e)}")
+        # News (fetch failures already came back as an empty list)
+        stock_data["news"] = [
+            {
+                "title": article.get("title", ""),
+                "url": article.get("url", ""),
+                "date": article.get("publishedDate", "")
+            }
+            for article in news_results.get(symbol, [])[:NEWS_PER_STOCK]
+        ]
+
+    # Score every stock's headlines in a single batched pass
+    try:
+        sentiments = get_sentiment_scorer().score_batch(
+            {symbol: stock_data["news"] for symbol, stock_data in filtered_stocks.items()},
+            max_articles=NEWS_PER_STOCK
+        )
+        batch_error = None
+    except Exception as e:
+        sentiments, batch_error = {}, e
 
-        # Get sentiment
+    for symbol, stock_data in filtered_stocks.items():
         try:
-            sentiment = analyze_sentiment_simple(symbol, stock_data.get("news", []))
+            if batch_error is not None:
+                raise batch_error
+            sentiment = sentiments[symbol]
             stock_data["sentiment_score"] = sentiment["score"]
             stock_data["sentiment_category"] = sentiment["category"]
             stock_data["sentiment_summary"] = sentiment.get("summary", "")
@@ -215,11 +746,14 @@ def main():
             stock_data["sentiment_summary"] = "Sentiment analysis unavailable"
             data_errors.append(f"Sentiment unavailable for {symbol}: {str(e)}")
 
-    # Step 4: Generate final output
-    output = {
+    return data_errors
+
+def build_output(filtered_stocks: Dict[str, Dict], category_summary: Dict, data_errors: List[str]) -> Dict:
+    """Assemble the final JSON report"""
+    return {
         "analysis_metadata": {
             "timestamp": datetime.now().isoformat(),
-            "market_cap_threshold_billions": 100,
+            "market_cap_threshold_billions": MIN_MARKET_CAP // 1_000_000_000,
             "total_stocks_analyzed": len(filtered_stocks),
             "data_errors": data_errors
         },
@@ -231,10 +765,64 @@ def main():
         "category_summary": category_summary
     }
 
+async def run_analysis_async(deadline_seconds: float = RUN_DEADLINE_SECONDS) -> Dict:
+    """Fetch movers, profiles and news concurrently and build the report"""
+    async with create_async_session(max(FMP_POOL_SIZE, FMP_MAX_CONCURRENCY)) as session:
+        engine = FetchEngine(session, deadline_seconds=deadline_seconds)
+
+        # Step 1: Fetch all three mover lists concurrently
+        print("Fetching market movers...", file=sys.stderr)
+        gainers, losers, actives = await asyncio.gather(
+            get_market_movers_async(engine, "gainers"),
+            get_market_movers_async(engine, "losers"),
+            get_market_movers_async(engine, "actives")
+        )
+        print(f"Found {len(gainers)} gainers, {len(losers)} losers, {len(actives)} actives\n", file=sys.stderr)
+
+        all_movers = {
+            "gainers": gainers,
+            "losers": losers,
+            "actives": actives
+        }
+
+        # Step 2: Resolve profiles for every unique mover in bulk and keep market cap >= $100B
+        symbols = collect_mover_symbols(all_movers)
+        print(f"Fetching profiles for {len(symbols)} unique symbols "
+              f"in {len(chunk_symbols(symbols))} batches...", file=sys.stderr)
+        profiles = await get_company_profiles_async(engine, symbols, min_market_cap=MIN_MARKET_CAP)
+
+        filtered_stocks, category_summary = select_big_cap_stocks(all_movers, profiles)
+        print(f"\nFound {len(filtered_stocks)} unique big cap stocks\n", file=sys.stderr)
+
+        # Step 3: Get news for every big cap concurrently, then score sentiment
+        big_caps = list(filtered_stocks)
+        news_list = await asyncio.gather(
+            *(get_stock_news_async(engine, s, limit=NEWS_PER_STOCK) for s in big_caps)
+        )
+        data_errors = apply_news_and_sentiment(filtered_stocks, dict(zip(big_caps, news_list)))
+
+    # Step 4: Generate final output
+    return build_output(filtered_stocks, category_summary, data_errors)
+
+def main():
+    """Main analysis function"""
+    print("Starting Big Cap Movers Analysis...\n", file=sys.stderr)
+
+    output = asyncio.run(run_analysis_async())
+
     # Output JSON to stdout
     print(json.dumps(output, indent=2))
 
-    print(f"\nAnalysis complete! Analyzed {len(filtered_stocks)} stocks.", file=sys.stderr)
+    cache = get_response_cache()
+    if cache:
+        cache.flush()
+        print(cache.summary(), file=sys.stderr)
+
+    metrics = get_instrumentation()
+    if metrics.enabled:
+        print(metrics.prometheus_text(), file=sys.stderr)
+
+    print(f"\nAnalysis complete! Analyzed {output['analysis_metadata']['total_stocks_analyzed']} stocks.", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,257 @@
+"""
+Declarative Column Mapping
+Compiles payload-path -> column specs once and builds sparse stock_analysis merge upserts
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_MISSING = object()
+
+# stock_analysis column -> payload paths tried in order. Dotted paths address
+# nested agent output; bare names are flat keys (store_fundamental_analysis()
+# and other callers that already hold column-shaped dicts). Every column also
+# falls back to a flat key of its own name.
+NORMALIZED_COLUMN_MAP = {
+    # Fundamental
+    'investment_grade': ('investment_classification.investment_grade',),
+    'stock_classification': ('investment_classification.primary_category',),
+    'roe': ('financial_health.profitability.roe_2024',),
+    'roa': ('financial_health.profitability.roa_2024',),
+    'roic': ('financial_health.profitability.roic_2024',),
+    'net_margin': ('financial_health.profitability.net_margin_2024',),
+    'operating_margin': ('financial_health.profitability.operating_margin_2024',),
+    'gross_margin': ('financial_health.profitability.gross_margin_2024',),
+    'current_ratio': ('financial_health.liquidity.current_ratio_2024',),
+    'quick_ratio': ('financial_health.liquidity.quick_ratio_2024',),
+    'cash_position': ('financial_health.liquidity.cash_and_equivalents',),
+    'debt_to_equity': ('financial_health.leverage.debt_to_equity_2024',),
+    'interest_coverage': ('financial_health.leverage.interest_coverage',),
+    'asset_turnover': ('financial_health.efficiency.asset_turnover',),
+    'inventory_turnover': ('financial_health.efficiency.inventory_turnover',),
+    'receivables_turnover': ('financial_health.efficiency.receivables_turnover',),
+    'revenue_growth_1yr': ('growth_analysis.revenue_growth.cagr_5yr',),
+    'pe_ratio': ('valuation_metrics.pe_ratio',),
+    'pb_ratio': ('valuation_metrics.pb_ratio',),
+    'ps_ratio': ('valuation_metrics.ps_ratio',),
+    'peg_ratio': ('valuation_metrics.peg_ratio',),
+    'ev_ebitda': ('valuation.ev_ebitda',),
+    'price_to_fcf': ('valuation.pfcf_ratio',),
+    'next_earnings_date': ('earnings_cache_strategy.next_earnings_date',),
+    # Market context
+    'market_cap': ('company_profile.market_cap',),
+    'current_price': ('current_price.price',),
+    'sector': ('company_profile.sector',),
+    'industry': ('company_profile.industry',),
+    # Metadata; cache_expiry defaults to the next earnings date
+    'cache_expiry': ('cache_expiry', 'earnings_cache_strategy.next_earnings_date', 'next_earnings_date'),
+}
+
+# Flat-key-only columns (no nested agent path)
+NORMALIZED_FLAT_COLUMNS = (
+    'revenue_growth_5yr_cagr', 'earnings_growth_1yr', 'eps_growth_5yr_cagr', 'fcf_yield', 'dividend_yield',
+    'financial_health_score', 'last_earnings_date', 'days_since_earnings', 'days_until_earnings',
+    'earnings_cache_strategy', 'cash_conversion_cycle', 'tangible_book_value_growth', 'fcf_growth_1yr',
+    'book_value_growth', 'revenue_growth_3yr_cagr', 'ev_revenue', 'peg_ratio_forward', 'total_debt',
+    'net_debt', 'debt_service_capability',
+    'rsi_14', 'macd_signal', 'macd_histogram', 'price_vs_sma_20', 'price_vs_sma_50', 'price_vs_sma_200',
+    'technical_score', 'technical_signal',
+    'sentiment_score', 'news_sentiment_1w', 'news_sentiment_1m', 'social_sentiment', 'analyst_sentiment',
+    'sentiment_trend', 'key_sentiment_drivers',
+    'realized_volatility_30d', 'implied_volatility', 'iv_rank', 'iv_percentile', 'volatility_trend',
+    'vol_trading_signal', 'put_call_ratio',
+    'beta', 'data_sources', 'confidence_score',
+)
+
+# Values used when the payload supplies nothing
+NORMALIZED_DEFAULTS = {
+    'key_sentiment_drivers': [],
+    'data_sources': ['fundamental_analysis'],
+    'confidence_score': 80,
+}
+
+# Columns stored as JSON text
+NORMALIZED_JSON_COLUMNS = ('key_sentiment_drivers', 'data_sources')
+
+KEY_COLUMNS = ('symbol', 'analysis_date', 'analysis_type')
+HASH_COLUMN = 'content_hash'
+REVISION_COLUMN = 'revision'
+
+
+def content_hash(values: Iterable[Tuple[str, Any]]) -> int:
+    """
+    Stable 64-bit digest of (column, value) pairs, stored as an INTEGER so
+    the skip-unchanged comparison stays a cheap integer compare.
+    """
+    digest = hashlib.blake2b(repr(tuple(values)).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class ColumnMapper:
+    """
+    Payload -> sparse stock_analysis row -> merge upsert.
+
+    The mapping is compiled once into a key trie so lookups don't split
+    dotted paths per call. row() returns only the columns that
+    have a value; nested dicts/lists found at a path are skipped (the same
+    key can name a column in one payload shape and a sub-object in another),
+    except for JSON columns, which are serialized.
+
+    upsert() writes with INSERT ... ON CONFLICT DO UPDATE instead of
+    INSERT OR REPLACE: only the supplied columns are set (others keep their
+    stored values), the key index is never rewritten, and defaults fill
+    missing columns on INSERT only, never overwriting stored values.
+
+    content_hash is the digest of the last payload merged into the row, not
+    of the whole stored row: the update is skipped when the same payload is
+    written again, which is safe because that payload's columns already hold
+    its values. Every applied update bumps the revision column instead, which
+    is what change detection (ColumnarStore signatures) relies on.
+
+    Usage:
+        mapper = ColumnMapper(NORMALIZED_COLUMN_MAP, NORMALIZED_FLAT_COLUMNS,
+                              NORMALIZED_DEFAULTS, NORMALIZED_JSON_COLUMNS)
+        sql, params, digest = mapper.statement(('AAPL', today, 'fundamental'), payload)
+        conn.execute(sql, params)
+    """
+
+    def __init__(self, column_map: Dict[str, Sequence[str]], flat_columns: Iterable[str] = (),
+                 defaults: Dict[str, Any] = None, json_columns: Iterable[str] = (),
+                 table: str = 'stock_analysis', key_columns: Sequence[str] = KEY_COLUMNS):
+        self.table = table
+        self.key_columns = tuple(key_columns)
+        self.json_columns = frozenset(json_columns)
+        self.defaults = {
+            column: json.dumps(value) if column in self.json_columns else value
+            for column, value in (defaults or {}).items()
+        }
+
+        specs = {column: tuple(paths) for column, paths in column_map.items()}
+        for column in flat_columns:
+            specs.setdefault(column, ())
+
+        # Compile once into a key trie: node = {key: [child node, [(priority, column, is_json)]]}.
+        # Each column's own flat key is its last-priority path. Walking the trie
+        # touches only branches present in the payload and resolves shared
+        # prefixes (financial_health.profitability...) a single time.
+        self._trie: Dict[str, list] = {}
+        for column, paths in specs.items():
+            keys = [tuple(path.split('.')) for path in paths]
+            if (column,) not in keys:
+                keys.append((column,))
+            for priority, key_path in enumerate(keys):
+                node = self._trie
+                for key in key_path[:-1]:
+                    node = node.setdefault(key, [{}, []])[0]
+                node.setdefault(key_path[-1], [{}, []])[1].append((priority, column, column in self.json_columns))
+        self.columns = tuple(specs)
+        self._position = {column: i for i, column in enumerate(self.columns)}
+        self._sql_cache: Dict[tuple, str] = {}
+
+    def _walk(self, node: Dict[str, list], data: dict, found: Dict[str, tuple]) -> None:
+        for key in node.keys() & data.keys():
+            children, leaves = node[key]
+            value = data[key]
+            if value is None:
+                continue
+            for priority, column, is_json in leaves:
+                if is_json:
+                    stored = value if isinstance(value, str) else json.dumps(value)
+                elif isinstance(value, (dict, list, tuple)):
+                    continue
+                else:
+                    stored = value
+                current = found.get(column)
+                if current is None or priority < current[0]:
+                    found[column] = (priority, stored)
+            if children and type(value) is dict:
+                self._walk(children, value, found)
+
+    def row(self, payload: dict) -> Dict[str, Any]:
+        """
+        Populated columns of one payload (JSON columns serialized), in mapping
+        order so equal column sets share one statement. Defaults are not
+        included; upsert() applies them on INSERT.
+        """
+        found: Dict[str, tuple] = {}
+        self._walk(self._trie, payload, found)
+        position = self._position
+        return {column: found[column][1] for column in sorted(found, key=position.__getitem__)}
+
+    def upsert(self, key: Sequence[Any], row: Dict[str, Any], expiry_column: str = None,
+               now: Any = None, defaults: Dict[str, Any] = None) -> Tuple[str, tuple, int]:
+        """
+        (sql, params, content hash) merging row into the keyed table row.
+
+        None values are dropped, so they never overwrite stored data.
+        defaults (the mapper's own unless given) fill columns missing from
+        row when the row is inserted, and are left out of the update. With
+        expiry_column, that column is left out of the hash and an unchanged
+        row is still rewritten once its stored expiry is <= now.
+        """
+        row = {column: value for column, value in row.items() if value is not None}
+        digest = content_hash(item for item in row.items() if item[0] != expiry_column)
+        defaults = self.defaults if defaults is None else defaults
+        inserted_only = {column: value for column, value in defaults.items() if column not in row}
+
+        columns = self.key_columns + tuple(row) + (HASH_COLUMN,)
+        params = tuple(key) + tuple(row.values()) + (digest,) + tuple(inserted_only.values())
+        if expiry_column is not None:
+            params += (now,)
+        return self.upsert_sql(columns, tuple(inserted_only), expiry_column), params, digest
+
+    def upsert_sql(self, columns: Tuple[str, ...], insert_only: Tuple[str, ...] = (),
+                   expiry_column: str = None) -> str:
+        """
+        INSERT ... ON CONFLICT DO UPDATE for just these columns (cached per
+        column set). insert_only columns are written on INSERT but not updated.
+        """
+        cache_key = (columns, insert_only, expiry_column)
+        sql = self._sql_cache.get(cache_key)
+        if sql is None:
+            updates = ',\n                '.join(
+                [f'{column} = excluded.{column}' for column in columns if column not in self.key_columns]
+                + [f'{REVISION_COLUMN} = {self.table}.{REVISION_COLUMN} + 1']
+            )
+            changed = f'{self.table}.{HASH_COLUMN} IS NOT excluded.{HASH_COLUMN}'
+            if expiry_column is not None:
+                changed += (f' OR {self.table}.{expiry_column} IS NULL'
+                            f' OR {self.table}.{expiry_column} <= ?')
+            inserted = columns + insert_only
+            sql = self._sql_cache[cache_key] = f'''
+            INSERT INTO {self.table} ({', '.join(inserted)})
+            VALUES ({', '.join(['?'] * len(inserted))})
+            ON CONFLICT({', '.join(self.key_columns)}) DO UPDATE SET
+                {updates}
+            WHERE {changed}
+            '''
+        return sql
+
+    def statement(self, key: Sequence[Any], payload: dict) -> Tuple[str, tuple, int]:
+        """(sql, params, content hash) for one payload."""
+        return self.upsert(key, self.row(payload))
+
+    def statements(self, rows: Iterable[Tuple[Sequence[Any], dict]]) -> Dict[str, List[tuple]]:
+        """
+        Bulk form of statement(): sql -> parameter tuples, grouped so each
+        distinct column set is one executemany() call.
+        """
+        grouped: Dict[str, List[tuple]] = {}
+        for key, payload in rows:
+            sql, params, _ = self.statement(key, payload)
+            grouped.setdefault(sql, []).append(params)
+        return grouped
+
+
+_normalized_mapper: Optional[ColumnMapper] = None
+
+
+def normalized_mapper() -> ColumnMapper:
+    """Shared mapper for store_normalized_analysis() payloads."""
+    global _normalized_mapper
+    if _normalized_mapper is None:
+        _normalized_mapper = ColumnMapper(
+            NORMALIZED_COLUMN_MAP, NORMALIZED_FLAT_COLUMNS, NORMALIZED_DEFAULTS, NORMALIZED_JSON_COLUMNS
+        )
+    return _normalized_mapper
@@ -0,0 +1,334 @@
+"""
+Columnar Analytics Store
+Partitioned Arrow IPC / Parquet export of stock_analysis with memory-mapped reads
+"""
+
+import json
+import os
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+except ImportError:  # optional dependency, checked in _require_pyarrow()
+    pa = None
+
+MANIFEST_NAME = '_manifest.json'
+FORMATS = {'arrow': 'part.arrow', 'parquet': 'part.parquet'}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "pyarrow is required for the columnar store. Install it with: pip install pyarrow"
+        )
+
+
+def _arrow_type(name: str, declared: str):
+    """Arrow type for a stock_analysis column."""
+    declared = (declared or '').upper()
+    if name == 'analysis_date':
+        return pa.date32()
+    if declared.startswith('REAL'):
+        return pa.float64()
+    if declared.startswith(('INTEGER', 'BOOLEAN')):
+        return pa.int64()
+    # Other DATE/TIMESTAMP columns hold free-form agent output; keep them as text
+    return pa.string()
+
+
+def _coerce_number(value, cast):
+    """Best-effort numeric conversion for values SQLite stored with another type."""
+    try:
+        return cast(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _month_bounds(month: str):
+    """('2025-01') -> ('2025-01-01', '2025-02-01') for range predicates on ISO strings."""
+    year, mon = int(month[:4]), int(month[5:7])
+    nxt = f'{year + 1}-01' if mon == 12 else f'{year}-{mon + 1:02d}'
+    return f'{month}-01', f'{nxt}-01'
+
+
+def _to_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class ColumnarStore:
+    """
+    Arrow/Parquet mirror of stock_analysis, partitioned by analysis_type and month:
+
+        <root>/analysis_type=<type>/month=<YYYY-MM>/part.arrow
+
+    sync() rewrites only partitions whose source rows changed, detected from
+    a per-partition (count, max rowid, rowid sum, revision sum) signature
+    kept in <root>/_manifest.json (see signatures()). INSERT OR REPLACE
+    assigns a new rowid; every in-place UPDATE bumps the row's revision.
+
+    Arrow IPC files (the default) are uncompressed and read through a memory
+    map, so columns come back as zero-copy views of the page cache. Parquet
+    is smaller on disk but is decoded on read.
+    """
+
+    def __init__(self, root: str, fmt: str = 'arrow'):
+        _require_pyarrow()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported columnar format: {fmt} (expected one of {list(FORMATS)})")
+        self.root = root
+        self.fmt = fmt
+        self._manifest_path = os.path.join(root, MANIFEST_NAME)
+
+    # -------------------------------------------------------------- manifest
+
+    def manifest(self) -> Dict[str, Any]:
+        if not os.path.exists(self._manifest_path):
+            return {'format': self.fmt, 'partitions': {}}
+        with open(self._manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp = self._manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._manifest_path)
+
+    def _partition_path(self, analysis_type: str, month: str) -> str:
+        return os.path.join(self.root, f'analysis_type={analysis_type}', f'month={month}', FORMATS[self.fmt])
+
+    # ------------------------------------------------------------------ sync
+
+    @staticmethod
+    def signatures(conn: sqlite3.Connection, where: str = '', params: Iterable = ()) -> Dict[str, Dict[str, Any]]:
+        """
+        'type/YYYY-MM' -> change signature of the stock_analysis rows in that
+        partition, optionally restricted by a WHERE clause.
+
+        Aggregated per day in (analysis_type, analysis_date, revision) index
+        order and folded into months here: grouping on substr() directly
+        would sort every row through a temp B-tree.
+        """
+        signatures: Dict[str, Dict[str, Any]] = {}
+        for analysis_type, day, rows, max_rowid, rowid_sum, revision_sum in conn.execute(f'''
+            SELECT analysis_type, analysis_date, COUNT(*), MAX(rowid), TOTAL(rowid), TOTAL(revision)
+            FROM stock_analysis
+            {where}
+            GROUP BY analysis_type, analysis_date
+        ''', tuple(params)):
+            key = f'{analysis_type}/{str(day)[:7]}'
+            signature = signatures.get(key)
+            if signature is None:
+                signatures[key] = {
+                    'rows': rows, 'max_rowid': max_rowid, 'rowid_sum': rowid_sum, 'revision_sum': revision_sum
+                }
+            else:
+                signature['rows'] += rows
+                signature['max_rowid'] = max(signature['max_rowid'], max_rowid)
+                signature['rowid_sum'] += rowid_sum
+                signature['revision_sum'] += revision_sum
+        return signatures
+
+    def sync(self, conn: sqlite3.Connection, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the export up to date with stock_analysis.
+
+        Run inside a read transaction so signatures and data come from the
+        same snapshot. full=True rewrites every partition.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        manifest = self.manifest()
+        if manifest.get('format') != self.fmt:
+            full = True
+        previous = {} if full else manifest.get('partitions', {})
+
+        columns = [(row[1], row[2]) for row in conn.execute('PRAGMA table_info(stock_analysis)')]
+        schema = pa.schema([(name, _arrow_type(name, declared)) for name, declared in columns])
+
+        signatures = self.signatures(conn)
+
+        written, rows_written = [], 0
+        partitions = {}
+        for key, signature in sorted(signatures.items()):
+            analysis_type, month = key.split('/')
+            path = self._partition_path(analysis_type, month)
+            old = previous.get(key)
+            if old and all(old.get(k) == v for k, v in signature.items()) and os.path.exists(path):
+                partitions[key] = old
+                continue
+
+            start, end = _month_bounds(month)
+            cursor = conn.execute(
+                'SELECT * FROM stock_analysis WHERE analysis_type = ? AND analysis_date >= ? AND analysis_date < ? '
+                'ORDER BY symbol, analysis_date',
+                (analysis_type, start, end)
+            )
+            table = self._to_table(cursor.fetchall(), schema)
+            self._write_table(table, path)
+            partitions[key] = dict(signature, file=os.path.relpath(path, self.root))
+            written.append(key)
+            rows_written += table.num_rows
+
+        removed = []
+        for key, meta in manifest.get('partitions', {}).items():
+            if key not in signatures:
+                path = os.path.join(self.root, meta['file'])
+                if os.path.exists(path):
+                    os.remove(path)
+                removed.append(key)
+
+        self._write_manifest({
+            'format': self.fmt,
+            'columns': [name for name, _ in columns],
+            'partitions': partitions,
+            'synced_at': datetime.now().isoformat(timespec='seconds')
+        })
+        return {
+            'status': 'success',
+            'partitions': len(partitions),
+            'written': written,
+            'removed': removed,
+            'rows_written': rows_written
+        }
+
+    @staticmethod
+    def _to_table(rows: List[tuple], schema):
+        arrays = []
+        values_by_column = list(zip(*rows)) if rows else [()] * len(schema)
+        for values, field in zip(values_by_column, schema):
+            if pa.types.is_date32(field.type):
+                values = [_to_date(v) for v in values]
+            elif pa.types.is_string(field.type):
+                values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+            try:
+                arrays.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                cast = float if pa.types.is_floating(field.type) else int
+                arrays.append(pa.array([_coerce_number(v, cast) for v in values], type=field.type))
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    def _write_table(self, table, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        if self.fmt == 'arrow':
+            with pa.OSFile(tmp, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp, compression='zstd')
+        os.replace(tmp, path)
+
+    def verify(self, conn: sqlite3.Connection, analysis_types: Iterable[str] = None,
+               start: str = None, end: str = None) -> Tuple[Set[str], Set[str]]:
+        """
+        (fresh, stale) partition keys for the months overlapping [start, end].
+
+        fresh partitions are exported and still match stock_analysis; stale
+        ones have rows in stock_analysis that are missing from or changed
+        since the export. Exported partitions whose rows were all deleted are
+        in neither set.
+        """
+        where, params = [], []
+        if analysis_types:
+            where.append('analysis_type IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(analysis_types)))
+        if start:
+            where.append('analysis_date >= ?')
+            params.append(_month_bounds(str(start)[:7])[0])
+        if end:
+            where.append('analysis_date < ?')
+            params.append(_month_bounds(str(end)[:7])[1])
+        current = self.signatures(conn, f"WHERE {' AND '.join(where)}" if where else '', params)
+
+        exported = self.manifest().get('partitions', {})
+        fresh = {
+            key for key, signature in current.items()
+            if key in exported and all(exported[key].get(k) == v for k, v in signature.items())
+        }
+        return fresh, set(current) - fresh
+
+    # ------------------------------------------------------------------ read
+
+    def partition_files(self, analysis_type: str, start: str = None, end: str = None,
+                        partitions: Iterable[str] = None) -> List[str]:
+        """
+        Partition files for a type whose month overlaps [start, end] (ISO
+        dates or YYYY-MM), optionally limited to the given partition keys.
+        """
+        partitions = set(partitions) if partitions is not None else None
+        files = []
+        for key, meta in sorted(self.manifest().get('partitions', {}).items()):
+            part_type, month = key.split('/')
+            if part_type != analysis_type:
+                continue
+            if partitions is not None and key not in partitions:
+                continue
+            if start and month < start[:7]:
+                continue
+            if end and month > end[:7]:
+                continue
+            files.append(os.path.join(self.root, meta['file']))
+        return files
+
+    def read_table(self, analysis_type: str, columns: Iterable[str] = None,
+                   start: str = None, end: str = None, symbols: Iterable[str] = None,
+                   partitions: Iterable[str] = None):
+        """
+        Return a pyarrow.Table for one analysis type, optionally limited to
+        columns, a date range, a set of symbols and a set of partition keys.
+
+        Arrow partitions are memory-mapped and concatenated without copying;
+        filtering by date/symbol materialises only the selected rows.
+        """
+        columns = list(columns) if columns is not None else None
+        needed = None
+        if columns is not None:
+            needed = list(dict.fromkeys(['symbol', 'analysis_date'] + columns))
+
+        tables = [self._read_file(path, needed) for path in self.partition_files(analysis_type, start, end, partitions)]
+        if not tables:
+            return pa.table({name: pa.array([], type=pa.string()) for name in (needed or [])})
+        table = pa.concat_tables(tables)
+
+        mask = None
+        if start:
+            mask = pc.greater_equal(table['analysis_date'], pa.scalar(_to_date(start), pa.date32()))
+        if end:
+            upper = pc.less_equal(table['analysis_date'], pa.scalar(_to_date(end), pa.date32()))
+            mask = upper if mask is None else pc.and_(mask, upper)
+        if symbols is not None:
+            in_set = pc.is_in(table['symbol'], value_set=pa.array(list(symbols), type=pa.string()))
+            mask = in_set if mask is None else pc.and_(mask, in_set)
+        if mask is not None and not pc.all(mask).as_py():
+            table = table.filter(mask)
+
+        return table.select(needed) if needed is not None else table
+
+    def _read_file(self, path: str, columns: Optional[List[str]]):
+        if self.fmt == 'arrow':
+            table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            return table.select(columns) if columns is not None else table
+        import pyarrow.parquet as pq
+        return pq.read_table(path, columns=columns, memory_map=True)
+
+    def read_columns(self, analysis_type: str, columns: Iterable[str], **filters) -> Dict[str, Any]:
+        """
+        Columns as NumPy arrays (symbol/analysis_date included).
+
+        Numeric columns without nulls in a single chunk are zero-copy views;
+        otherwise values are combined (nulls become NaN for floats).
+        """
+        table = self.read_table(analysis_type, columns, **filters)
+        result = {}
+        for name in table.column_names:
+            column = table[name]
+            if column.num_chunks == 1 and column.null_count == 0:
+                result[name] = column.chunk(0).to_numpy(zero_copy_only=False)
+            else:
+                result[name] = column.to_numpy()
+        return result
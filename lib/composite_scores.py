@@ -0,0 +1,241 @@
+"""
+Composite Score Engine
+Vectorized overall / per-dimension / risk scores written to composite_scores in one batch
+"""
+
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Latest rows consulted for each dimension, in order of preference
+DIMENSION_SOURCES = {
+    'fundamental': ('fundamental', 'multi_dimensional'),
+    'technical': ('technical', 'multi_dimensional'),
+    'sentiment': ('sentiment', 'multi_dimensional'),
+    'volatility': ('volatility', 'options', 'multi_dimensional'),
+}
+
+# Weights of the dimension scores in overall_score; renormalised over the dimensions a symbol has
+DIMENSION_WEIGHTS = {
+    'fundamental': 0.40,
+    'technical': 0.25,
+    'sentiment': 0.20,
+    'volatility': 0.15,
+}
+
+SIGNAL_SCORES = {'STRONG_BUY': 90, 'BUY': 75, 'WEAK_BUY': 62, 'HOLD': 50, 'WEAK_HOLD': 42, 'SELL': 25, 'STRONG_SELL': 10}
+
+# Input fields: (column, dimension whose rows are preferred)
+INPUT_FIELDS = [
+    ('investment_grade', 'fundamental'),
+    ('financial_health_score', 'fundamental'),
+    ('stock_classification', 'fundamental'),
+    ('technical_score', 'technical'),
+    ('technical_signal', 'technical'),
+    ('sentiment_score', 'sentiment'),
+    ('iv_rank', 'volatility'),
+    ('beta', 'volatility'),
+    ('market_cap', 'fundamental'),
+]
+
+COMPOSITE_COLUMNS = [
+    'overall_score', 'fundamental_score', 'technical_score', 'sentiment_score', 'volatility_score',
+    'total_risk_score', 'volatility_risk', 'fundamental_risk', 'liquidity_risk',
+    'primary_classification', 'risk_profile', 'overall_recommendation'
+]
+
+UPSERT_SQL = '''
+    INSERT INTO composite_scores (symbol, analysis_date, {columns})
+    VALUES (?, ?, {placeholders})
+    ON CONFLICT(symbol, analysis_date) DO UPDATE SET
+        {updates},
+        created_at = CURRENT_TIMESTAMP
+'''.format(
+    columns=', '.join(COMPOSITE_COLUMNS),
+    placeholders=', '.join(['?'] * len(COMPOSITE_COLUMNS)),
+    updates=',\n        '.join(f'{c} = excluded.{c}' for c in COMPOSITE_COLUMNS)
+)
+
+
+def _float_array(values: List) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def score_arrays(inputs: Dict[str, list], grade_scores: Dict[str, dict]) -> Dict[str, np.ndarray]:
+    """
+    Compute composite scores for aligned input columns (one entry per symbol).
+
+    Dimension scores are 1-100, higher is better; risk scores are 1-100,
+    lower is better. Missing inputs give NaN for that score only.
+    """
+    grade = _float_array([grade_scores.get(g, {}).get('score') if g else None for g in inputs['investment_grade']])
+    health = _float_array(inputs['financial_health_score'])
+    fundamental = np.where(np.isnan(grade), health, grade)
+
+    signal = _float_array([SIGNAL_SCORES.get((s or '').upper()) for s in inputs['technical_signal']])
+    technical = _float_array(inputs['technical_score'])
+    technical = np.where(np.isnan(technical), signal, technical)
+
+    # sentiment_score is stored either on a -1..1 or a 0..100 scale
+    raw_sentiment = _float_array(inputs['sentiment_score'])
+    sentiment = np.where(np.abs(raw_sentiment) <= 1, (raw_sentiment + 1) * 50, raw_sentiment)
+
+    iv_rank = np.clip(_float_array(inputs['iv_rank']), 0, 100)
+    volatility = 100 - iv_rank
+
+    dims = np.column_stack([fundamental, technical, sentiment, volatility])
+    dims = np.clip(dims, 1, 100)
+    weights = np.array([DIMENSION_WEIGHTS[d] for d in ('fundamental', 'technical', 'sentiment', 'volatility')])
+    available = ~np.isnan(dims)
+    weight_sum = (available * weights).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        overall = np.where(weight_sum > 0, np.nansum(dims * weights, axis=1) / weight_sum, np.nan)
+
+    beta = _float_array(inputs['beta'])
+    volatility_risk = np.where(np.isnan(iv_rank), np.clip(beta * 50, 1, 100), iv_rank)
+    fundamental_risk = 100 - dims[:, 0]
+    market_cap = _float_array(inputs['market_cap'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # $300M and below -> 90, $200B and above -> 10, log-linear in between
+        log_cap = np.log10(np.where(market_cap > 0, market_cap, np.nan))
+    liquidity_risk = np.interp(log_cap, [np.log10(3e8), np.log10(2e11)], [90, 10])
+    liquidity_risk = np.where(np.isnan(log_cap), np.nan, liquidity_risk)
+
+    risks = np.column_stack([volatility_risk, fundamental_risk, liquidity_risk])
+    risk_count = (~np.isnan(risks)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        total_risk = np.where(risk_count > 0, np.nansum(risks, axis=1) / risk_count, np.nan)
+
+    return {
+        'overall_score': overall,
+        'fundamental_score': dims[:, 0],
+        'technical_score': dims[:, 1],
+        'sentiment_score': dims[:, 2],
+        'volatility_score': dims[:, 3],
+        'total_risk_score': total_risk,
+        'volatility_risk': volatility_risk,
+        'fundamental_risk': fundamental_risk,
+        'liquidity_risk': liquidity_risk,
+    }
+
+
+def _labels(values: np.ndarray, bounds: List[float], labels: List[str]) -> List[Optional[str]]:
+    """Bucket values by ascending lower bounds; NaN -> None."""
+    index = np.searchsorted(np.array(bounds), np.nan_to_num(values, nan=-1.0), side='right') - 1
+    return [None if np.isnan(v) or i < 0 else labels[i] for v, i in zip(values.tolist(), index.tolist())]
+
+
+class CompositeScoreEngine:
+    """
+    Reads the latest row of every analysis type per symbol (via
+    stock_analysis_latest), scores all symbols with NumPy and upserts one
+    composite_scores row per symbol in a single executemany().
+
+    The row is keyed by the newest input analysis_date, so re-running on
+    unchanged inputs rewrites the same row. Incremental runs only score
+    symbols with a stock_analysis_latest.change_seq above the high-water
+    mark recorded by the previous run in composite_score_runs.
+    """
+
+    def __init__(self, grade_scores: Dict[str, dict]):
+        self.grade_scores = grade_scores
+
+    def run(self, conn: sqlite3.Connection, incremental: bool = False) -> dict:
+        """Score and upsert; call inside a write transaction."""
+        started = time.perf_counter()
+        run_started_at = conn.execute('SELECT CURRENT_TIMESTAMP').fetchone()[0]
+        # Taken inside the caller's write transaction, so no change can slip in between
+        high_water = conn.execute('SELECT COALESCE(MAX(change_seq), 0) FROM stock_analysis_latest').fetchone()[0]
+
+        watermark = None
+        if incremental:
+            row = conn.execute(
+                'SELECT high_water FROM composite_score_runs WHERE high_water IS NOT NULL ORDER BY id DESC LIMIT 1'
+            ).fetchone()
+            watermark = row[0] if row else None
+        mode = 'incremental' if watermark is not None else 'full'
+
+        symbols, dates, inputs = self._load_inputs(conn, watermark)
+        scores = score_arrays(inputs, self.grade_scores) if symbols else {}
+
+        rows = []
+        if symbols:
+            labels = {
+                'risk_profile': _labels(scores['total_risk_score'], [0, 34, 67], ['LOW', 'MEDIUM', 'HIGH']),
+                'overall_recommendation': _labels(
+                    scores['overall_score'], [0, 30, 45, 65, 80], ['STRONG_SELL', 'SELL', 'HOLD', 'BUY', 'STRONG_BUY']
+                ),
+                'primary_classification': [c.upper() if c else None for c in inputs['stock_classification']],
+            }
+            numeric = {
+                name: [None if np.isnan(v) else int(round(v)) for v in values.tolist()]
+                for name, values in scores.items()
+            }
+            columns = [numeric.get(name) or labels[name] for name in COMPOSITE_COLUMNS]
+            rows = [(symbol, date) + values for symbol, date, values in zip(symbols, dates, zip(*columns))]
+            conn.executemany(UPSERT_SQL, rows)
+
+        duration_ms = (time.perf_counter() - started) * 1000
+        conn.execute(
+            '''INSERT INTO composite_score_runs (started_at, mode, symbols_scored, duration_ms, high_water)
+            VALUES (?, ?, ?, ?, ?)''',
+            (run_started_at, mode, len(rows), duration_ms, high_water)
+        )
+        return {
+            'status': 'success',
+            'mode': mode,
+            'symbols_scored': len(rows),
+            'duration_ms': round(duration_ms, 1)
+        }
+
+    @staticmethod
+    def _load_inputs(conn: sqlite3.Connection, watermark: Optional[int]):
+        fields = [name for name, _ in INPUT_FIELDS]
+        changed_filter, params = '', ()
+        if watermark is not None:
+            changed_filter = '''WHERE latest.symbol IN (
+                SELECT symbol FROM stock_analysis_latest WHERE change_seq > ?
+            )'''
+            params = (watermark,)
+
+        cursor = conn.execute(f'''
+        SELECT latest.symbol, latest.analysis_type, latest.analysis_date, {', '.join('sa.' + f for f in fields)}
+        FROM stock_analysis_latest latest
+        JOIN stock_analysis sa
+          ON sa.symbol = latest.symbol
+         AND sa.analysis_date = latest.analysis_date
+         AND sa.analysis_type = latest.analysis_type
+        {changed_filter}
+        ORDER BY latest.symbol
+        ''', params)
+
+        symbols, dates = [], []
+        inputs = {name: [] for name in fields}
+        rank_of = {
+            dimension: {t: i for i, t in enumerate(types)}
+            for dimension, types in DIMENSION_SOURCES.items()
+        }
+
+        def flush(symbol, rows):
+            symbols.append(symbol)
+            dates.append(max(str(r[1]) for r in rows))
+            ordered = {
+                dimension: sorted(rows, key=lambda r: preference.get(r[0], len(preference)))
+                for dimension, preference in rank_of.items()
+            }
+            for offset, (name, dimension) in enumerate(INPUT_FIELDS, start=2):
+                inputs[name].append(next((r[offset] for r in ordered[dimension] if r[offset] is not None), None))
+
+        current, rows = None, []
+        for record in cursor:
+            if record[0] != current and rows:
+                flush(current, rows)
+                rows = []
+            current = record[0]
+            rows.append(record[1:])
+        if rows:
+            flush(current, rows)
+
+        return symbols, dates, inputs
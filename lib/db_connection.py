@@ -0,0 +1,274 @@
+"""
+SQLite Connection Manager
+Reusable, WAL-enabled connections shared by the analytics database layers
+"""
+
+import functools
+import sqlite3
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+
+class ConnectionManager:
+    """Per-thread SQLite connections with tuned pragmas and explicit transaction scopes.
+
+    Each thread gets one long-lived connection (sqlite3 connections must not be
+    shared across threads mid-transaction), so the connect cost and the
+    prepared-statement cache are paid once per thread instead of once per call.
+
+    Usage:
+        with manager.transaction() as conn:   # BEGIN IMMEDIATE ... COMMIT
+            conn.execute(...)
+            with manager.transaction():       # nested scope -> SAVEPOINT
+                conn.execute(...)
+
+    The manager itself is also a context manager equivalent to transaction().
+    """
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = 5000,
+                 synchronous: str = 'NORMAL', cached_statements: int = 256,
+                 wal: bool = True, auto_vacuum: str = 'INCREMENTAL'):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.synchronous = synchronous
+        self.cached_statements = cached_statements
+        self.wal = wal
+        self.auto_vacuum = auto_vacuum
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by close_all() so other threads reconnect
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening and configuring it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout_ms / 1000,
+                cached_statements=self.cached_statements,
+                isolation_level=None,  # autocommit; transactions are explicit
+                check_same_thread=False
+            )
+            # Only applies to a database with no tables yet and must precede
+            # journal_mode; setting it on an existing one waits for the write lock
+            if self.auto_vacuum and conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchone() is None:
+                conn.execute(f'PRAGMA auto_vacuum={self.auto_vacuum}')
+            if self.wal:
+                conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.generation = self._generation
+            self._local.scopes = []
+            self._local.on_commit = []
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def in_transaction(self) -> bool:
+        """True if the calling thread has an open transaction() scope."""
+        return getattr(self._local, 'depth', 0) > 0
+
+    def on_commit(self, callback: Callable[[], Any]) -> None:
+        """Run callback after the calling thread's outermost transaction commits
+        (dropped if it rolls back), or right away outside a transaction."""
+        if self.in_transaction():
+            self._local.on_commit.append(callback)
+        else:
+            callback()
+
+    @contextmanager
+    def transaction(self, immediate: bool = True) -> Iterator[sqlite3.Connection]:
+        """Open a transaction, or a savepoint when already inside one on this thread.
+
+        Commits on normal exit and rolls back on exception. Writers use
+        BEGIN IMMEDIATE so the write lock is taken up front and waits on
+        busy_timeout instead of failing on a read-to-write upgrade.
+        """
+        conn = self.connection()
+        depth = self._local.depth
+        savepoint = f'sp_{depth}'
+
+        if depth == 0:
+            conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        else:
+            conn.execute(f'SAVEPOINT {savepoint}')
+        self._local.depth = depth + 1
+
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                self._local.on_commit.clear()
+                conn.rollback()
+            else:
+                conn.execute(f'ROLLBACK TO SAVEPOINT {savepoint}')
+                conn.execute(f'RELEASE SAVEPOINT {savepoint}')
+            raise
+        else:
+            self._local.depth = depth
+            if depth == 0:
+                conn.commit()
+                callbacks, self._local.on_commit = self._local.on_commit, []
+                for callback in callbacks:
+                    callback()
+            else:
+                conn.execute(f'RELEASE SAVEPOINT {savepoint}')
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection()
+        scope = self.transaction()
+        self._local.scopes.append(scope)
+        return scope.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._local.scopes.pop().__exit__(exc_type, exc, tb)
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            with self._lock:
+                if conn in self._connections:
+                    self._connections.remove(conn)
+            conn.close()
+            self._local.conn = None
+            self._local.depth = 0
+
+    def close_all(self) -> None:
+        """Close every connection opened by this manager (call once worker threads are done)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._generation += 1
+        for conn in connections:
+            conn.close()
+
+
+class SQLiteWorkerPool:
+    """Runs blocking SQLite work off the event loop.
+
+    Writes go to a single dedicated writer thread (SQLite allows one writer at
+    a time, so serialising in-process avoids lock contention), reads go to a
+    small pool of reader threads that run concurrently under WAL. Each worker
+    thread uses its own ConnectionManager connection. Threads start lazily on
+    first use.
+
+    transaction() holds a transaction open on the writer thread for one task:
+    that task's writes and reads join it, while writes from other tasks wait
+    for the scope to close instead of landing inside it.
+    """
+
+    def __init__(self, reader_threads: int = 4):
+        self.reader_threads = max(1, reader_threads)
+        self._writer = None
+        self._readers = None
+        self._lock = threading.Lock()
+        self._gate = None
+        self._gate_loop = None
+        # Task holding transaction(), by identity: tasks spawned inside the
+        # scope copy its context but must not inherit the scope
+        self._owner = None
+
+    def _executors(self):
+        if self._writer is None:
+            from concurrent.futures import ThreadPoolExecutor  # deferred with asyncio, see write()
+
+            with self._lock:
+                if self._writer is None:
+                    self._readers = ThreadPoolExecutor(max_workers=self.reader_threads,
+                                                       thread_name_prefix='sqlite-reader')
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite-writer')
+        return self._writer, self._readers
+
+    def _write_gate(self):
+        """asyncio.Lock serialising writes against transaction() scopes (one per event loop)."""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        if self._gate_loop is not loop:
+            self._gate, self._gate_loop = asyncio.Lock(), loop
+        return self._gate
+
+    def in_transaction(self) -> bool:
+        """True if the calling task is inside this pool's transaction() scope."""
+        if self._owner is None:
+            return False
+        import asyncio
+
+        try:
+            return asyncio.current_task() is self._owner
+        except RuntimeError:  # no running event loop
+            return False
+
+    async def write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn on the writer thread and await its result."""
+        import asyncio  # deferred: keeps asyncio off the import path of sync callers
+
+        writer, _ = self._executors()
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        if self.in_transaction():
+            return await loop.run_in_executor(writer, call)
+        async with self._write_gate():
+            return await loop.run_in_executor(writer, call)
+
+    async def read(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn on a reader thread and await its result (on the writer inside transaction())."""
+        import asyncio
+
+        if self.in_transaction():
+            # Reader connections can't see the scope's uncommitted writes
+            return await self.write(fn, *args, **kwargs)
+        _, readers = self._executors()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(readers, functools.partial(fn, *args, **kwargs))
+
+    @asynccontextmanager
+    async def transaction(self, connections: ConnectionManager) -> AsyncIterator[None]:
+        """Hold a connections.transaction() open on the writer thread for the calling task.
+
+        Nested scopes in the same task become savepoints. The enter and exit
+        steps are submitted straight to the single writer thread, so they stay
+        ordered with every other write even if the task is cancelled.
+        """
+        import asyncio
+
+        writer, _ = self._executors()
+        nested = self.in_transaction()
+        gate = None if nested else self._write_gate()
+        if gate is not None:
+            await gate.acquire()
+        if not nested:
+            self._owner = asyncio.current_task()
+        try:
+            scope = connections.transaction()
+            try:
+                await asyncio.shield(asyncio.wrap_future(writer.submit(scope.__enter__)))
+                yield
+            except BaseException as exc:
+                await asyncio.shield(asyncio.wrap_future(
+                    writer.submit(scope.__exit__, type(exc), exc, exc.__traceback__)
+                ))
+                raise
+            else:
+                await asyncio.shield(asyncio.wrap_future(writer.submit(scope.__exit__, None, None, None)))
+        finally:
+            if not nested:
+                self._owner = None
+            if gate is not None:
+                gate.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads."""
+        with self._lock:
+            writer, readers = self._writer, self._readers
+            self._writer = self._readers = None
+        for executor in (writer, readers):
+            if executor is not None:
+                executor.shutdown(wait=wait)
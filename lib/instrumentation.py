@@ -0,0 +1,322 @@
+"""
+Hot-Path Instrumentation
+Latency histograms, row/byte counters and cache outcomes for DB methods and HTTP endpoints
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Histogram bucket upper bounds in milliseconds (+Inf is implicit)
+LATENCY_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# inspect.CO_COROUTINE; inspect itself is too heavy for the cache-check import path
+_CO_COROUTINE = 0x80
+
+# First of these result keys that is present is recorded as the row count
+_ROW_COUNT_KEYS = ('rows', 'total_matches', 'stored', 'symbols_scored', 'migrated_records',
+                   'rows_archived', 'rows_written', 'latest_rows')
+
+METRICS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS instrumentation_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    run_id TEXT,                      -- caller-chosen label, e.g. the uber-email run
+    kind TEXT NOT NULL,               -- 'db', 'fmp', ...
+    name TEXT NOT NULL,               -- method or endpoint
+    calls INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    p50_ms REAL,                      -- estimated from the histogram
+    p99_ms REAL,
+    rows INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    outcomes TEXT,                    -- JSON object outcome -> count
+    buckets TEXT                      -- JSON list of per-bucket counts
+)'''
+
+
+class _Series:
+    """Aggregates for one (kind, name)."""
+
+    __slots__ = ('buckets', 'calls', 'total_ms', 'max_ms', 'rows', 'bytes', 'outcomes')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.outcomes: Dict[str, int] = {}
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (max_ms for the +Inf bucket)."""
+        if not self.calls:
+            return None
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+
+class Span:
+    """
+    One timed operation. Set rows, bytes or outcome on it before it ends;
+    a disabled Instrumentation hands out a shared no-op span instead.
+    """
+
+    __slots__ = ('_owner', 'kind', 'name', 'rows', 'bytes', 'outcome', '_started')
+
+    def __init__(self, owner: 'Instrumentation', kind: str, name: str):
+        self._owner = owner
+        self.kind = kind
+        self.name = name
+        self.rows = 0
+        self.bytes = 0
+        self.outcome = None
+        self._started = time.perf_counter()
+
+    def __enter__(self) -> 'Span':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.outcome is None:
+            self.outcome = 'error'
+        self._owner.record(self.kind, self.name, (time.perf_counter() - self._started) * 1000,
+                           rows=self.rows, size=self.bytes, outcome=self.outcome or 'ok')
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+    rows = bytes = 0
+    outcome = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation:
+    """
+    Process-wide metric registry.
+
+    Disabled by default (enable with FIN_AGENTS_METRICS=1 or enable()); when
+    disabled, span() returns a shared no-op object and instrumented()
+    wrappers add one attribute check per call.
+
+    Usage:
+        metrics = get_instrumentation()
+        with metrics.span('fmp', 'profile/{symbol}') as span:
+            span.bytes = len(body)
+
+        @instrumented('db')
+        async def get_cached_sentiment(self, symbol): ...
+
+        print(metrics.prometheus_text())
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series = {}
+
+    def span(self, kind: str, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, kind, name)
+
+    def record(self, kind: str, name: str, elapsed_ms: float, rows: int = 0, size: int = 0,
+               outcome: str = 'ok') -> None:
+        bucket = bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)
+        with self._lock:
+            series = self._series.get((kind, name))
+            if series is None:
+                series = self._series[(kind, name)] = _Series()
+            series.buckets[bucket] += 1
+            series.calls += 1
+            series.total_ms += elapsed_ms
+            if elapsed_ms > series.max_ms:
+                series.max_ms = elapsed_ms
+            series.rows += rows or 0
+            series.bytes += size or 0
+            series.outcomes[outcome] = series.outcomes.get(outcome, 0) + 1
+
+    # ---------------------------------------------------------------- export
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """'kind:name' -> aggregates, slowest total time first."""
+        with self._lock:
+            items = [(key, series) for key, series in self._series.items()]
+            result = {
+                f'{kind}:{name}': {
+                    'kind': kind,
+                    'name': name,
+                    'calls': series.calls,
+                    'total_ms': round(series.total_ms, 3),
+                    'mean_ms': round(series.total_ms / series.calls, 3) if series.calls else None,
+                    'max_ms': round(series.max_ms, 3),
+                    'p50_ms': series.quantile(0.5),
+                    'p99_ms': series.quantile(0.99),
+                    'rows': series.rows,
+                    'bytes': series.bytes,
+                    'outcomes': dict(series.outcomes),
+                    'buckets': list(series.buckets),
+                }
+                for (kind, name), series in items
+            }
+        return dict(sorted(result.items(), key=lambda item: item[1]['total_ms'], reverse=True))
+
+    def prometheus_text(self, prefix: str = 'fin_agents') -> str:
+        """Aggregates in the Prometheus text exposition format."""
+        lines = [
+            f'# HELP {prefix}_latency_ms Call latency in milliseconds',
+            f'# TYPE {prefix}_latency_ms histogram',
+        ]
+        counters = {'rows': [], 'bytes': [], 'outcomes': []}
+        for stats in self.snapshot().values():
+            labels = f'kind="{_escape(stats["kind"])}",name="{_escape(stats["name"])}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS + ('+Inf',), stats['buckets']):
+                cumulative += count
+                lines.append(f'{prefix}_latency_ms_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_latency_ms_sum{{{labels}}} {stats["total_ms"]}')
+            lines.append(f'{prefix}_latency_ms_count{{{labels}}} {stats["calls"]}')
+            counters['rows'].append(f'{prefix}_rows_total{{{labels}}} {stats["rows"]}')
+            counters['bytes'].append(f'{prefix}_payload_bytes_total{{{labels}}} {stats["bytes"]}')
+            for outcome, count in sorted(stats['outcomes'].items()):
+                counters['outcomes'].append(
+                    f'{prefix}_outcomes_total{{{labels},outcome="{_escape(outcome)}"}} {count}'
+                )
+
+        for name, help_text, key in (
+            ('rows_total', 'Rows read or written', 'rows'),
+            ('payload_bytes_total', 'Payload bytes transferred', 'bytes'),
+            ('outcomes_total', 'Calls by outcome (ok, error, cache_hit, cache_miss, ...)', 'outcomes'),
+        ):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} counter')
+            lines.extend(counters[key])
+        return '\n'.join(lines) + '\n'
+
+    def write_to(self, conn, run_id: str = None) -> int:
+        """Append the current aggregates to instrumentation_metrics; returns rows written."""
+        rows = [
+            (run_id, s['kind'], s['name'], s['calls'], s['total_ms'], s['max_ms'], s['p50_ms'], s['p99_ms'],
+             s['rows'], s['bytes'], json.dumps(s['outcomes']), json.dumps(s['buckets']))
+            for s in self.snapshot().values()
+        ]
+        conn.execute(METRICS_SCHEMA)
+        conn.executemany('''
+            INSERT INTO instrumentation_metrics (
+                run_id, kind, name, calls, total_ms, max_ms, p50_ms, p99_ms, rows, bytes, outcomes, buckets
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        return len(rows)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _describe(result: Any) -> Tuple[int, str]:
+    """(row count, outcome) inferred from a DB method's return value."""
+    if isinstance(result, dict):
+        status = result.get('status')
+        outcome = status if isinstance(status, str) else 'ok'
+        if outcome == 'success':
+            outcome = 'ok'
+        for key in _ROW_COUNT_KEYS:
+            value = result.get(key)
+            if isinstance(value, int):
+                return value, outcome
+        results = result.get('results')
+        return (len(results) if isinstance(results, list) else 0), outcome
+    if isinstance(result, list):
+        return len(result), 'ok'
+    if result is False:
+        return 0, 'error'
+    return 0, 'ok'
+
+
+_default: Optional[Instrumentation] = None
+
+
+def get_instrumentation() -> Instrumentation:
+    """Process-wide registry; enabled from the start when FIN_AGENTS_METRICS is set."""
+    global _default
+    if _default is None:
+        _default = Instrumentation(os.getenv('FIN_AGENTS_METRICS', '').lower() in ('1', 'true', 'yes'))
+    return _default
+
+
+def instrumented(kind: str, name: str = None) -> Callable:
+    """
+    Decorator recording latency, row count and outcome (from the returned
+    status) for a sync or async function; disabled registries cost one
+    attribute check per call.
+    """
+
+    def decorate(fn):
+        metric = name or fn.__name__
+
+        if fn.__code__.co_flags & _CO_COROUTINE:
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                registry = _default or get_instrumentation()
+                if not registry.enabled:
+                    return await fn(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    registry.record(kind, metric, (time.perf_counter() - started) * 1000, outcome='error')
+                    raise
+                rows, outcome = _describe(result)
+                registry.record(kind, metric, (time.perf_counter() - started) * 1000, rows=rows, outcome=outcome)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            registry = _default or get_instrumentation()
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException:
+                registry.record(kind, metric, (time.perf_counter() - started) * 1000, outcome='error')
+                raise
+            rows, outcome = _describe(result)
+            registry.record(kind, metric, (time.perf_counter() - started) * 1000, rows=rows, outcome=outcome)
+            return result
+        return wrapper
+
+    return decorate
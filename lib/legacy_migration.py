@@ -0,0 +1,194 @@
+"""
+Legacy Fundamental Migration
+Streams fundamental_analyses.db into stock_analysis in checkpointed batches
+"""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+LEGACY_TABLE = 'fundamental_analyses'
+
+# stock_analysis column -> fundamental_analyses column
+LEGACY_FUNDAMENTAL_COLUMNS = {
+    'analysis_date': 'analysis_date',
+    'last_earnings_date': 'last_earnings_date',
+    'next_earnings_date': 'next_earnings_date',
+    'roe': 'roe', 'roa': 'roa', 'roic': 'roic',
+    'current_ratio': 'current_ratio', 'debt_to_equity': 'debt_to_equity',
+    'net_margin': 'net_margin', 'operating_margin': 'operating_margin', 'gross_margin': 'gross_margin',
+    'interest_coverage': 'interest_coverage', 'cash_position': 'cash_position',
+    'revenue_growth_1yr': 'revenue_growth_1yr', 'revenue_growth_5yr_cagr': 'revenue_growth_5yr_cagr',
+    'earnings_growth_1yr': 'earnings_growth_1yr', 'eps_growth_5yr_cagr': 'eps_growth_5yr_cagr',
+    'fcf_growth_1yr': 'fcf_growth_1yr', 'book_value_growth': 'book_value_growth',
+    'pe_ratio': 'pe_ratio', 'pb_ratio': 'pb_ratio', 'ps_ratio': 'ps_ratio', 'peg_ratio': 'peg_ratio',
+    'ev_ebitda': 'ev_ebitda', 'fcf_yield': 'fcf_yield', 'price_to_fcf': 'price_to_fcf',
+    'dividend_yield': 'dividend_yield',
+    'market_cap': 'market_cap', 'current_price': 'current_price',
+    'stock_classification': 'stock_classification', 'investment_grade': 'investment_grade',
+    'sector': 'sector', 'industry': 'industry',
+    'cache_expiry': 'cache_expiration_date',
+    'data_sources': 'data_source',
+}
+
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024), 1)
+
+
+class LegacyFundamentalMigrator:
+    """
+    Copies fundamental_analyses rows into stock_analysis.
+
+    Legacy rows are read by rowid in batches of batch_size through one
+    cursor, mapped to stock_analysis by column name, and merged with the
+    column mapper's upsert (one executemany per distinct column set), so
+    content_hash and revision are kept like for any other write. Each
+    batch commits together with its migration_checkpoints row, so a
+    migration that dies part way resumes after the last committed batch
+    instead of starting over.
+    """
+
+    def __init__(self, connections, column_mapper, grade_mapping: Dict[str, dict], latest_upsert_sql: str,
+                 batch_size: int = 1000):
+        self._connections = connections
+        self._column_mapper = column_mapper
+        self._grade_mapping = grade_mapping
+        self._latest_upsert_sql = latest_upsert_sql
+        self.batch_size = max(1, batch_size)
+
+    def run(self, legacy_db_path: str, restart: bool = False,
+            progress: Callable[[Dict[str, Any]], None] = None) -> Dict[str, Any]:
+        source = os.path.abspath(legacy_db_path)
+        started = time.perf_counter()
+
+        legacy_conn = sqlite3.connect(f'file:{source}?mode=ro', uri=True)
+        try:
+            legacy_columns = {row[1] for row in legacy_conn.execute(f'PRAGMA table_info({LEGACY_TABLE})')}
+            if not legacy_columns:
+                raise ValueError(f'{source} has no {LEGACY_TABLE} table')
+
+            # Unified columns we can fill from this legacy schema, in a fixed order
+            mapped = [(unified, legacy) for unified, legacy in LEGACY_FUNDAMENTAL_COLUMNS.items()
+                      if legacy in legacy_columns]
+            select_columns = ['rowid', 'symbol'] + [legacy for _, legacy in mapped]
+
+            checkpoint = self._checkpoint(source, restart)
+            resumed_from = checkpoint['last_rowid']
+            total = legacy_conn.execute(f'SELECT COUNT(*) FROM {LEGACY_TABLE}').fetchone()[0]
+
+            cursor = legacy_conn.execute(
+                f'SELECT {", ".join(select_columns)} FROM {LEGACY_TABLE} WHERE rowid > ? ORDER BY rowid',
+                (resumed_from,)
+            )
+            migrated, skipped, errors = checkpoint['rows_migrated'], 0, []
+            migrated_this_run = 0
+            while True:
+                batch = cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                statements, latest, written = {}, [], 0
+                for record in batch:
+                    values = dict(zip(select_columns, record))
+                    if not values['symbol'] or not values.get('analysis_date'):
+                        skipped += 1
+                        if len(errors) < 10:
+                            errors.append(f"Skipped legacy row {values['rowid']}: missing symbol or analysis_date")
+                        continue
+                    key = (values['symbol'], values['analysis_date'], 'fundamental')
+                    sql, params, _ = self._column_mapper.upsert(key, self._unified_row(values, mapped))
+                    statements.setdefault(sql, []).append(params)
+                    latest.append((values['symbol'], 'fundamental', values['analysis_date']))
+                    written += 1
+
+                with self._connections.transaction() as conn:
+                    for sql, params in statements.items():
+                        conn.executemany(sql, params)
+                    conn.executemany(self._latest_upsert_sql, latest)
+                    conn.execute(
+                        '''UPDATE migration_checkpoints
+                           SET last_rowid = ?, rows_migrated = rows_migrated + ?, updated_at = CURRENT_TIMESTAMP
+                           WHERE source = ?''',
+                        (batch[-1][0], written, source)
+                    )
+                migrated += written
+                migrated_this_run += written
+                if progress is not None:
+                    progress(self._stats(migrated, migrated_this_run, total, started))
+
+            with self._connections.transaction() as conn:
+                conn.execute(
+                    "UPDATE migration_checkpoints SET completed_at = CURRENT_TIMESTAMP WHERE source = ?",
+                    (source,)
+                )
+        finally:
+            legacy_conn.close()
+
+        result = self._stats(migrated, migrated_this_run, total, started)
+        result.update({
+            'status': 'success' if migrated > 0 else 'error',
+            'source': source,
+            'resumed_from_rowid': resumed_from,
+            'skipped_records': skipped,
+            'errors': errors,
+            'migration_summary': f'Migrated {migrated}/{total} records'
+        })
+        return result
+
+    def _checkpoint(self, source: str, restart: bool) -> Dict[str, Any]:
+        with self._connections.transaction() as conn:
+            if restart:
+                conn.execute('DELETE FROM migration_checkpoints WHERE source = ?', (source,))
+            conn.execute(
+                'INSERT OR IGNORE INTO migration_checkpoints (source, last_rowid, rows_migrated) VALUES (?, 0, 0)',
+                (source,)
+            )
+            last_rowid, rows_migrated = conn.execute(
+                'SELECT last_rowid, rows_migrated FROM migration_checkpoints WHERE source = ?', (source,)
+            ).fetchone()
+        return {'last_rowid': last_rowid, 'rows_migrated': rows_migrated}
+
+    def _unified_row(self, values: Dict[str, Any], mapped: List[tuple]) -> Dict[str, Any]:
+        """stock_analysis columns (key columns excluded) for one legacy row."""
+        grade = values.get('investment_grade') or 'C'
+        grade_info = self._grade_mapping.get(grade, {'score': 60})
+        data_source = values.get('data_source') or 'FMP_LEGACY'
+        row = {
+            'financial_health_score': grade_info['score'],
+            'earnings_cache_strategy': 'MIGRATED_LEGACY',
+            'confidence_score': 80,
+        }
+        for unified, legacy in mapped:
+            if unified == 'analysis_date':
+                continue
+            if unified == 'investment_grade':
+                row[unified] = grade
+            elif unified == 'data_sources':
+                row[unified] = json.dumps([data_source])
+            else:
+                row[unified] = values[legacy]
+        return row
+
+    @staticmethod
+    def _stats(migrated: int, migrated_this_run: int, total: int, started: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        return {
+            'migrated_records': migrated,
+            'total_records': total,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(migrated_this_run / elapsed, 1) if elapsed > 0 else None,
+            'peak_memory_mb': peak_memory_mb()
+        }
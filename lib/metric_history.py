@@ -0,0 +1,387 @@
+"""
+Metric History
+Dense symbol x date panels from stock_analysis with vectorized rolling statistics
+"""
+
+import json
+import sqlite3
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# julianday() of 1970-01-01; analysis dates are handled as int days since the epoch
+_UNIX_EPOCH_JULIAN = 2440587.5
+
+
+# ------------------------------------------------------------- rolling math
+#
+# All functions take (n_symbols x n_dates) float arrays with NaN for missing
+# observations and work along the date axis. Windows count date-axis steps;
+# NaNs inside a window are skipped and a result needs min_periods valid points
+# (default: the full window).
+
+
+def forward_fill(values: np.ndarray, limit: int = None) -> np.ndarray:
+    """Carry the last valid value forward along each row (at most limit steps)."""
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return values.copy()
+    steps = np.arange(values.shape[1])
+    last = np.where(~np.isnan(values), steps, -1)
+    np.maximum.accumulate(last, axis=1, out=last)
+    filled = np.take_along_axis(values, np.maximum(last, 0), axis=1)
+    stale = last < 0
+    if limit is not None:
+        stale |= (steps - last) > limit
+    filled[stale] = np.nan
+    return filled
+
+
+def delta(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """values[t] - values[t - periods] (NaN where either side is missing)."""
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(values.shape, np.nan)
+    if 0 < periods < values.shape[-1]:
+        result[:, periods:] = values[:, periods:] - values[:, :-periods]
+    return result
+
+
+def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sum over window steps (fewer at the start of a row) via one cumsum."""
+    total = np.cumsum(values, axis=1)
+    total[:, window:] -= total[:, :-window].copy()
+    return total
+
+
+def _demeaned(values: np.ndarray):
+    """
+    (valid mask, row-demeaned values with 0 for NaN, row means). Demeaning
+    keeps the cumulative sums well conditioned for large-magnitude metrics.
+    """
+    valid = ~np.isnan(values)
+    with warnings.catch_warnings():
+        # All-missing rows give a NaN mean; they stay masked out
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(values, axis=1, keepdims=True) if values.size else np.zeros((len(values), 1))
+    mean = np.nan_to_num(mean)
+    return valid, np.where(valid, values - mean, 0.0), mean
+
+
+def rolling_slope(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """Least-squares slope per date-axis step over each trailing window."""
+    values = np.asarray(values, dtype=np.float64)
+    min_periods = max(2, window if min_periods is None else min_periods)
+    valid, y, _ = _demeaned(values)
+    x = np.arange(values.shape[1], dtype=np.float64) - (values.shape[1] - 1) / 2
+    xv = np.where(valid, x, 0.0)
+
+    n = _window_sum(valid.astype(np.float64), window)
+    sx, sy = _window_sum(xv, window), _window_sum(y, window)
+    sxx, sxy = _window_sum(xv * x, window), _window_sum(xv * y, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denominator = n * sxx - sx * sx
+        slope = (n * sxy - sx * sy) / denominator
+    return np.where((n >= min_periods) & (denominator > 0), slope, np.nan)
+
+
+def rolling_mean_std(values: np.ndarray, window: int, min_periods: int = None):
+    """(mean, sample std) over each trailing window including the current step."""
+    values = np.asarray(values, dtype=np.float64)
+    min_periods = max(2, window if min_periods is None else min_periods)
+    valid, y, row_mean = _demeaned(values)
+
+    n = _window_sum(valid.astype(np.float64), window)
+    sy, syy = _window_sum(y, window), _window_sum(y * y, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = sy / n
+        variance = np.maximum(syy - sy * mean, 0.0) / (n - 1)
+    enough = n >= min_periods
+    return (np.where(enough, mean + row_mean, np.nan), np.where(enough, np.sqrt(variance), np.nan))
+
+
+def rolling_zscore(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """
+    (values[t] - mean) / std of the window *preceding* t, so a point is
+    scored against its trailing history rather than diluting it.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean, std = rolling_mean_std(values, window, min_periods)
+    previous_mean = np.full(values.shape, np.nan)
+    previous_std = np.full(values.shape, np.nan)
+    previous_mean[:, 1:], previous_std[:, 1:] = mean[:, :-1], std[:, :-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(previous_std > 0, (values - previous_mean) / previous_std, np.nan)
+
+
+# ------------------------------------------------------------------ panels
+
+
+class MetricHistory:
+    """
+    Aligned metric history: self[metric] is a float64 array of shape
+    (len(symbols), len(dates)) with NaN where a symbol has no observation.
+    dates is the sorted union of analysis dates present for the selection
+    (datetime64[D]), so rolling windows count observations, not calendar days.
+
+    Usage:
+        history = await db.get_metric_history(symbols, ['sentiment_score'], start='2023-01-01')
+        trend = history.rolling_slope('sentiment_score', window=20)
+        surprise = history.rolling_zscore('sentiment_score', window=60)
+    """
+
+    def __init__(self, symbols: List[str], dates: np.ndarray, values: Dict[str, np.ndarray]):
+        self.symbols = list(symbols)
+        self.dates = dates
+        self.values = values
+        self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def __getitem__(self, metric: str) -> np.ndarray:
+        return self.values[metric]
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self.values)
+
+    @property
+    def shape(self) -> tuple:
+        return len(self.symbols), len(self.dates)
+
+    def series(self, symbol: str, metric: str) -> np.ndarray:
+        """One symbol's row of a metric panel."""
+        return self.values[metric][self._index[symbol]]
+
+    def forward_fill(self, limit: int = None) -> 'MetricHistory':
+        return MetricHistory(self.symbols, self.dates,
+                             {metric: forward_fill(panel, limit) for metric, panel in self.values.items()})
+
+    def delta(self, metric: str, periods: int = 1) -> np.ndarray:
+        return delta(self.values[metric], periods)
+
+    def rolling_slope(self, metric: str, window: int, min_periods: int = None) -> np.ndarray:
+        return rolling_slope(self.values[metric], window, min_periods)
+
+    def rolling_zscore(self, metric: str, window: int, min_periods: int = None) -> np.ndarray:
+        return rolling_zscore(self.values[metric], window, min_periods)
+
+    # ------------------------------------------------------------ building
+
+    @classmethod
+    def from_arrays(cls, symbols: List[str], symbol_codes: np.ndarray, days: np.ndarray,
+                    values: Dict[str, np.ndarray], priorities: np.ndarray = None) -> 'MetricHistory':
+        """
+        Scatter observations into panels.
+
+        symbol_codes index symbols, days are int days since 1970-01-01. When
+        the same (symbol, day) appears more than once (several analysis
+        types), the valid value with the lowest priority wins.
+        """
+        day_axis = np.unique(days)
+        n_dates = len(day_axis)
+        cells = symbol_codes.astype(np.int64) * n_dates + np.searchsorted(day_axis, days)
+
+        panels = {}
+        for metric, column in values.items():
+            panel = np.full(len(symbols) * n_dates, np.nan)
+            valid = ~np.isnan(column)
+            metric_cells, metric_values = cells[valid], column[valid]
+            if priorities is not None and len(metric_cells):
+                order = np.lexsort((priorities[valid], metric_cells))
+                metric_cells, metric_values = metric_cells[order], metric_values[order]
+                first = np.ones(len(metric_cells), dtype=bool)
+                first[1:] = metric_cells[1:] != metric_cells[:-1]
+                metric_cells, metric_values = metric_cells[first], metric_values[first]
+            panel[metric_cells] = metric_values
+            panels[metric] = panel.reshape(len(symbols), n_dates)
+        return cls(symbols, day_axis.astype('datetime64[D]'), panels)
+
+    @classmethod
+    def from_sources(cls, sources: Sequence['_Observations'], symbols: Optional[Sequence[str]],
+                     metrics: Sequence[str], analysis_types: Optional[Sequence[str]] = None) -> 'MetricHistory':
+        """Combine observations read from one or more sources into panels."""
+        if symbols is None:
+            symbols = sorted(set().union(*(source.symbols() for source in sources)))
+        symbols = list(symbols)
+        types = list(analysis_types or sorted(set().union(*(source.types() for source in sources))))
+        type_rank = {analysis_type: i for i, analysis_type in enumerate(types)}
+
+        parts = [source.encode(symbols, type_rank, metrics) for source in sources]
+        codes, days, priorities = (
+            np.concatenate([part[i] for part in parts]) if parts else np.empty(0, dtype=np.int64)
+            for i in range(3)
+        )
+        values = {
+            metric: np.concatenate([part[3][metric] for part in parts]) if parts else np.empty(0)
+            for metric in metrics
+        }
+        # Only several analysis types can put two rows on one (symbol, date)
+        return cls.from_arrays(symbols, codes, days, values, priorities if len(types) > 1 else None)
+
+    @classmethod
+    def from_sqlite(cls, conn: sqlite3.Connection, symbols: Optional[Sequence[str]], metrics: Sequence[str],
+                    start: str = None, end: str = None,
+                    analysis_types: Optional[Sequence[str]] = None) -> 'MetricHistory':
+        """Load from stock_analysis (metrics must be validated column names)."""
+        source = _SqliteObservations(conn, symbols, metrics, start, end, analysis_types)
+        return cls.from_sources([source], symbols, metrics, analysis_types)
+
+    @classmethod
+    def from_columnar(cls, store, symbols: Optional[Sequence[str]], metrics: Sequence[str],
+                      start: str = None, end: str = None,
+                      analysis_types: Optional[Sequence[str]] = None) -> 'MetricHistory':
+        """Load from a ColumnarStore export (memory-mapped Arrow/Parquet partitions)."""
+        source = _ColumnarObservations(store, symbols, metrics, start, end, analysis_types)
+        return cls.from_sources([source], symbols, metrics, analysis_types)
+
+    @classmethod
+    def from_snapshot(cls, conn: sqlite3.Connection, store, symbols: Optional[Sequence[str]],
+                      metrics: Sequence[str], start: str = None, end: str = None,
+                      analysis_types: Optional[Sequence[str]] = None) -> 'MetricHistory':
+        """
+        Columnar export for partitions whose signature still matches
+        stock_analysis, SQLite for partitions that are new or changed since
+        the last sync (see ColumnarStore.verify()).
+        """
+        fresh, stale = store.verify(conn, analysis_types, start, end)
+        sources = []
+        if fresh:
+            sources.append(_ColumnarObservations(store, symbols, metrics, start, end, analysis_types, fresh))
+        if stale or not sources:
+            sources.append(_SqliteObservations(conn, symbols, metrics, start, end, analysis_types, stale))
+        return cls.from_sources(sources, symbols, metrics, analysis_types)
+
+
+class _Observations:
+    """Rows read from one source: symbols()/types() seen, encode() -> (codes, days, priorities, values)."""
+
+    def symbols(self) -> set:
+        raise NotImplementedError
+
+    def types(self) -> set:
+        raise NotImplementedError
+
+    def encode(self, symbols: List[str], type_rank: Dict[str, int], metrics: Sequence[str]) -> tuple:
+        raise NotImplementedError
+
+
+class _SqliteObservations(_Observations):
+    """
+    One query against stock_analysis; dates come back as int days since the
+    epoch. partitions ('type/YYYY-MM' keys) limits the rows to those months.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, symbols: Optional[Sequence[str]], metrics: Sequence[str],
+                 start: str = None, end: str = None, analysis_types: Optional[Sequence[str]] = None,
+                 partitions: Optional[Iterable[str]] = None):
+        where, params = [], []
+        if partitions is not None:
+            ranges = []
+            for key in sorted(partitions):
+                analysis_type, month = key.split('/')
+                ranges.append("(analysis_type = ? AND analysis_date >= ? AND analysis_date < date(?, '+1 month'))")
+                params.extend((analysis_type, f'{month}-01', f'{month}-01'))
+            where.append('(' + (' OR '.join(ranges) or '0') + ')')
+        if symbols is not None:
+            where.append('symbol IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(symbols)))
+        if start:
+            where.append('analysis_date >= ?')
+            params.append(str(start))
+        if end:
+            # Inclusive end date, also for timestamps stored on that day
+            where.append("analysis_date < date(?, '+1 day')")
+            params.append(str(end))
+        if analysis_types:
+            where.append('analysis_type IN (SELECT value FROM json_each(?))')
+            params.append(json.dumps(list(analysis_types)))
+        where.append('(' + ' OR '.join(f'{m} IS NOT NULL' for m in metrics) + ')')
+
+        rows = conn.execute(f'''
+            SELECT symbol, CAST(julianday(substr(analysis_date, 1, 10)) - {_UNIX_EPOCH_JULIAN} AS INTEGER),
+                   analysis_type, {', '.join(metrics)}
+            FROM stock_analysis
+            WHERE {' AND '.join(where)}
+        ''', params).fetchall()
+        self._count = len(rows)
+        self._columns = list(zip(*rows)) if rows else [()] * (3 + len(metrics))
+
+    def symbols(self) -> set:
+        return set(self._columns[0])
+
+    def types(self) -> set:
+        return set(self._columns[2])
+
+    def encode(self, symbols: List[str], type_rank: Dict[str, int], metrics: Sequence[str]) -> tuple:
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        count = self._count
+        return (
+            np.fromiter((index[s] for s in self._columns[0]), dtype=np.int64, count=count),
+            np.fromiter(self._columns[1], dtype=np.int64, count=count),
+            np.fromiter((type_rank[t] for t in self._columns[2]), dtype=np.int64, count=count),
+            {metric: _float_column(column) for metric, column in zip(metrics, self._columns[3:])},
+        )
+
+
+class _ColumnarObservations(_Observations):
+    """
+    Partitions of a ColumnarStore export, one Arrow table per analysis type,
+    optionally limited to the given partition keys.
+    """
+
+    def __init__(self, store, symbols: Optional[Sequence[str]], metrics: Sequence[str],
+                 start: str = None, end: str = None, analysis_types: Optional[Sequence[str]] = None,
+                 partitions: Optional[Iterable[str]] = None):
+        if not analysis_types:
+            keys = partitions if partitions is not None else store.manifest().get('partitions', {})
+            analysis_types = sorted({key.split('/')[0] for key in keys})
+        self._tables = []
+        for analysis_type in analysis_types:
+            table = store.read_table(analysis_type, metrics, start=start, end=end, symbols=symbols,
+                                     partitions=partitions)
+            if table.num_rows:
+                self._tables.append((analysis_type, table))
+
+    def symbols(self) -> set:
+        import pyarrow.compute as pc
+        found = set()
+        for _, table in self._tables:
+            found.update(pc.unique(table['symbol']).to_pylist())
+        return found
+
+    def types(self) -> set:
+        return {analysis_type for analysis_type, _ in self._tables}
+
+    def encode(self, symbols: List[str], type_rank: Dict[str, int], metrics: Sequence[str]) -> tuple:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        value_set = pa.array(symbols, type=pa.string())
+        codes, days, priorities, values = [], [], [], {metric: [] for metric in metrics}
+        for analysis_type, table in self._tables:
+            codes.append(pc.index_in(table['symbol'], value_set=value_set).to_numpy(zero_copy_only=False))
+            days.append(table['analysis_date'].cast(pa.int32()).to_numpy().astype(np.int64))
+            priorities.append(np.full(table.num_rows, type_rank[analysis_type], dtype=np.int64))
+            for metric in metrics:
+                if metric in table.column_names:
+                    values[metric].append(table[metric].cast(pa.float64()).to_numpy(zero_copy_only=False))
+                else:
+                    values[metric].append(np.full(table.num_rows, np.nan))
+
+        def combine(parts, dtype):
+            return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+
+        return (combine(codes, np.int64), combine(days, np.int64), combine(priorities, np.int64),
+                {metric: combine(parts, np.float64) for metric, parts in values.items()})
+
+
+def _float_column(values: Sequence[Any]) -> np.ndarray:
+    """float64 array with None -> NaN; non-numeric values are dropped to NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        def coerce(value):
+            try:
+                return float(value) if value is not None else np.nan
+            except (TypeError, ValueError):
+                return np.nan
+        return np.fromiter((coerce(v) for v in values), dtype=np.float64, count=len(values))
@@ -0,0 +1,100 @@
+"""
+Cache Pre-Warm Scheduler
+Refreshes frequently read sentiment / market pulse entries shortly before they expire
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class PrewarmScheduler:
+    """
+    Periodic refresh-ahead for UnifiedAnalyticsDB cache-check entries.
+
+    Each pass looks at the entries this process has served (with their
+    access counts since the last refresh and last seen cache_expiry), picks
+    the ones with a registered refresher that were read since they were last
+    refreshed and expire within lead_seconds (or expired less than
+    max_overdue_seconds ago), and refreshes them most-accessed first, at most
+    max_concurrent at a time. Refreshes go through the single-flight lease,
+    so several processes running a scheduler against the same database do
+    not duplicate work.
+
+    Usage:
+        db.register_refresher('market_pulse', lambda _: run_market_pulse_agent())
+        db.register_refresher('sentiment', lambda symbol: run_sentiment_agent(symbol))
+        scheduler = db.start_prewarm(lead_seconds=300)
+        ...
+        await scheduler.stop()
+    """
+
+    def __init__(self, db, lead_seconds: float = 300.0, interval_seconds: float = 60.0,
+                 max_concurrent: int = 2, max_per_pass: int = 20, max_overdue_seconds: float = 600.0):
+        self.db = db
+        self.lead_seconds = lead_seconds
+        self.max_overdue_seconds = max_overdue_seconds
+        self.interval_seconds = interval_seconds
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_per_pass = max_per_pass
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'passes': 0, 'refreshed': 0, 'skipped': 0, 'errors': 0}
+
+    def due(self, now: datetime = None) -> List[Tuple[tuple, int]]:
+        """(key, access_count) for read entries near (or just past) expiry, most accessed first."""
+        now = now or datetime.now()
+        candidates = []
+        for key, (count, expiry) in self.db.prewarm_candidates().items():
+            if count <= 0 or not expiry:
+                continue
+            remaining = (datetime.fromisoformat(expiry) - now).total_seconds()
+            if -self.max_overdue_seconds <= remaining <= self.lead_seconds:
+                candidates.append((key, count))
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        return candidates[:self.max_per_pass]
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run one pass and return what it did."""
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+        due = self.due()
+
+        async def refresh(key):
+            async with semaphore:
+                return await self.db.prewarm(key, self.lead_seconds)
+
+        results = await asyncio.gather(*(refresh(key) for key, _ in due), return_exceptions=True)
+
+        summary = {'due': len(due), 'refreshed': 0, 'skipped': 0, 'errors': 0}
+        for result in results:
+            if isinstance(result, Exception) or result.get('status') == 'error':
+                summary['errors'] += 1
+            elif result.get('refreshed'):
+                summary['refreshed'] += 1
+            else:
+                summary['skipped'] += 1
+
+        self.stats['passes'] += 1
+        for field in ('refreshed', 'skipped', 'errors'):
+            self.stats[field] += summary[field]
+        return summary
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Pre-warm pass failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
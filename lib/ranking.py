@@ -0,0 +1,223 @@
+"""
+Vectorized Metric Ranking
+Percentile, z-score and sector-relative ranks for many metrics in one NumPy pass
+"""
+
+import warnings
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Metrics compared for each analysis dimension
+DIMENSION_METRICS = {
+    'fundamental': ['roe', 'pe_ratio', 'revenue_growth_1yr'],
+    'technical': ['rsi_14', 'price_vs_sma_50'],
+    'sentiment': ['sentiment_score'],
+    'volatility': ['iv_rank'],
+}
+
+# 'desc': higher is better, 'asc': lower is better
+DEFAULT_DIRECTIONS = {
+    'roe': 'desc',
+    'roa': 'desc',
+    'roic': 'desc',
+    'pe_ratio': 'asc',
+    'pb_ratio': 'asc',
+    'ps_ratio': 'asc',
+    'peg_ratio': 'asc',
+    'debt_to_equity': 'asc',
+    'revenue_growth_1yr': 'desc',
+    'rsi_14': 'desc',
+    'price_vs_sma_50': 'desc',
+    'sentiment_score': 'desc',
+    'iv_rank': 'desc',
+    'overall_score': 'desc',
+    'total_risk_score': 'asc',
+}
+
+
+DIRECTIONS = ('asc', 'desc')
+
+
+def normalize_direction(metric: str, direction: str) -> str:
+    """'asc'/'desc' (any case) for metric, or ValueError."""
+    normalized = direction.lower() if isinstance(direction, str) else direction
+    if normalized not in DIRECTIONS:
+        raise ValueError(f"Invalid direction for {metric}: {direction!r} (expected 'asc' or 'desc')")
+    return normalized
+
+
+def metrics_for(dimensions: Sequence[str]) -> List[str]:
+    """Metrics for the requested dimensions, in order, without duplicates."""
+    metrics = []
+    for dimension in dimensions:
+        for metric in DIMENSION_METRICS.get(dimension, []):
+            if metric not in metrics:
+                metrics.append(metric)
+    return metrics
+
+
+def _competition_ranks(keys: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    1-based ranks down each column of keys (smaller key = better), ties share
+    the lowest rank (1, 2, 2, 4). Invalid cells get rank 0.
+    """
+    n, m = keys.shape
+    order = np.argsort(keys, axis=0, kind='stable')
+    sorted_keys = np.take_along_axis(keys, order, axis=0)
+    positions = np.broadcast_to(np.arange(n)[:, None], (n, m))
+    starts = np.ones((n, m), dtype=bool)
+    starts[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    sorted_ranks = np.maximum.accumulate(np.where(starts, positions, 0), axis=0) + 1
+
+    ranks = np.empty((n, m), dtype=np.int64)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=0)
+    return np.where(valid, ranks, 0)
+
+
+def rank_matrix(values: np.ndarray, directions: Sequence[str],
+                sectors: Optional[Sequence[Optional[str]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Rank every column of an (n_symbols x n_metrics) float matrix (NaN = missing).
+
+    Returns arrays of the same shape:
+        rank             1 = best within the comparison (0 where missing)
+        percentile       100 = best, 0 = worst (NaN where missing)
+        zscore           direction-adjusted: positive is better (NaN where missing)
+        sector_rank      rank among symbols of the same sector (0 where missing)
+        sector_percentile
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n, m = values.shape
+    sign = np.array([-1.0 if normalize_direction(f'column {j}', d) == 'desc' else 1.0
+                     for j, d in enumerate(directions)])
+    valid = ~np.isnan(values)
+    # Lower key = better; missing values sort last
+    keys = np.where(valid, values * sign, np.inf)
+
+    rank = _competition_ranks(keys, valid)
+    counts = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        percentile = np.where(valid, np.where(counts > 1, (counts - rank) / (counts - 1), 1.0) * 100, np.nan)
+
+        adjusted = np.where(valid, -keys, np.nan)
+        with warnings.catch_warnings():
+            # All-missing metrics give NaN mean/std; their z-scores are masked below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(adjusted, axis=0) if n else np.zeros(m)
+            std = np.nanstd(adjusted, axis=0) if n else np.zeros(m)
+        zscore = np.where(valid, np.where(std > 0, (adjusted - mean) / std, 0.0), np.nan)
+
+    if sectors is None:
+        sectors = [None] * n
+    _, codes = np.unique(np.array([s or '' for s in sectors], dtype=object), return_inverse=True)
+    codes = codes.reshape(-1)
+
+    # Rank the global rank within each sector: sector code is the major sort key
+    sector_keys = codes[:, None].astype(np.float64) * (n + 2) + np.where(valid, rank, n + 1)
+    order = np.argsort(sector_keys, axis=0, kind='stable')
+    sorted_codes = codes[order]
+    sorted_keys = np.take_along_axis(sector_keys, order, axis=0)
+    positions = np.broadcast_to(np.arange(n)[:, None], (n, m))
+
+    group_start = np.ones((n, m), dtype=bool)
+    group_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    tie_start = np.ones((n, m), dtype=bool)
+    tie_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    first_in_sector = np.maximum.accumulate(np.where(group_start, positions, 0), axis=0)
+    first_in_tie = np.maximum.accumulate(np.where(tie_start | group_start, positions, 0), axis=0)
+
+    sector_rank = np.empty((n, m), dtype=np.int64)
+    np.put_along_axis(sector_rank, order, first_in_tie - first_in_sector + 1, axis=0)
+    sector_rank = np.where(valid, sector_rank, 0)
+
+    sector_counts = np.zeros((codes.max() + 1 if n else 0, m))
+    np.add.at(sector_counts, codes, valid)
+    per_row_counts = sector_counts[codes] if n else np.zeros((0, m))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sector_percentile = np.where(
+            valid,
+            np.where(per_row_counts > 1, (per_row_counts - sector_rank) / (per_row_counts - 1), 1.0) * 100,
+            np.nan
+        )
+
+    return {
+        'rank': rank,
+        'percentile': percentile,
+        'zscore': zscore,
+        'sector_rank': sector_rank,
+        'sector_percentile': sector_percentile,
+    }
+
+
+def _to_float(value) -> float:
+    """float(value), or NaN for None and values that are not numbers (e.g. text in a REAL column)."""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _metric_matrix(values: Dict[str, Sequence], metrics: Sequence[str], n: int) -> np.ndarray:
+    """(n x len(metrics)) float matrix; unparseable cells become NaN (missing)."""
+    matrix = np.full((n, len(metrics)), np.nan)
+    for j, metric in enumerate(metrics):
+        column = values[metric]
+        try:
+            matrix[:, j] = np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+        except (TypeError, ValueError):
+            matrix[:, j] = [_to_float(v) for v in column]
+    return matrix
+
+
+def _column_list(array: np.ndarray, missing: np.ndarray, digits: int = None) -> list:
+    """JSON-friendly list with None for missing cells."""
+    if digits is not None:
+        array = np.round(array, digits)
+    return [None if miss else value for value, miss in zip(array.tolist(), missing.tolist())]
+
+
+def compare(symbols: Sequence[str], values: Dict[str, Sequence], metrics: Sequence[str],
+            sectors: Optional[Sequence[Optional[str]]] = None,
+            directions: Optional[Dict[str, str]] = None) -> Dict[str, object]:
+    """
+    Columnar comparison of symbols across metrics.
+
+    Args:
+        symbols: One entry per symbol
+        values: metric -> sequence aligned with symbols (None = missing)
+        metrics: Metrics to rank
+        sectors: Sector per symbol for sector-relative ranks
+        directions: Per-metric 'asc'/'desc' overrides of DEFAULT_DIRECTIONS
+            (case-insensitive; anything else raises ValueError)
+
+    Returns:
+        dict with 'metrics', 'directions' and 'scores': metric -> {'rank',
+        'percentile', 'zscore', 'sector_rank', 'sector_percentile'}, each a
+        list aligned with symbols.
+    """
+    directions = {**DEFAULT_DIRECTIONS, **(directions or {})}
+    metric_directions = [normalize_direction(metric, directions.get(metric, 'desc')) for metric in metrics]
+    matrix = _metric_matrix(values, metrics, len(symbols))
+
+    ranked = rank_matrix(matrix, metric_directions, sectors)
+    missing = np.isnan(matrix)
+
+    scores = {}
+    for j, metric in enumerate(metrics):
+        miss = missing[:, j]
+        scores[metric] = {
+            'rank': _column_list(ranked['rank'][:, j], miss),
+            'percentile': _column_list(ranked['percentile'][:, j], miss, 2),
+            'zscore': _column_list(ranked['zscore'][:, j], miss, 4),
+            'sector_rank': _column_list(ranked['sector_rank'][:, j], miss),
+            'sector_percentile': _column_list(ranked['sector_percentile'][:, j], miss, 2),
+        }
+
+    return {
+        'metrics': list(metrics),
+        'directions': dict(zip(metrics, metric_directions)),
+        'scores': scores,
+    }
@@ -0,0 +1,131 @@
+"""
+In-Process Read Cache
+Thread-safe TTL/LRU cache used in front of the UnifiedAnalyticsDB cache-check reads
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class ReadThroughCache:
+    """
+    LRU map of key -> value with a per-entry expiry.
+
+    Each entry expires at the earlier of the expiry supplied by the caller
+    (e.g. the row's cache_expiry) and max_age_seconds after it was cached;
+    the second bound limits how long a row written by another process can
+    be shadowed. Writers call invalidate() for the keys they touch.
+
+    Values are returned as stored - callers that hand them out should copy.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_age_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        """Cache value until expires_at (epoch seconds), capped at max_age_seconds."""
+        now = time.time()
+        deadline = now + self.max_age_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if deadline <= now or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, deadline)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+class AccessTracker:
+    """
+    Per-key access counts and last seen cache_expiry for cache-check reads.
+
+    Feeds the pre-warm scheduler, which refreshes the most-read entries just
+    before they expire. Counts are since the key's last refresh (reset() on
+    every refresh), so an entry nobody reads after it was refreshed is not
+    refreshed again. Bounded LRU so one-off symbols age out.
+    """
+
+    def __init__(self, max_keys: int = 4096):
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, cache_expiry: Optional[str]) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [0, None]
+                while len(self._entries) > self.max_keys:
+                    self._entries.popitem(last=False)
+            entry[0] += 1
+            entry[1] = cache_expiry or entry[1]
+            self._entries.move_to_end(key)
+
+    def reset(self, key: Hashable, cache_expiry: Optional[str]) -> None:
+        """Start counting afresh after key was refreshed (now valid until cache_expiry)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0] = 0
+                entry[1] = cache_expiry or entry[1]
+
+    def snapshot(self) -> Dict[Hashable, tuple]:
+        """key -> (access_count, cache_expiry)"""
+        with self._lock:
+            return {key: tuple(entry) for key, entry in self._entries.items()}
@@ -0,0 +1,218 @@
+"""
+Agent Result Retention
+Keep-latest / weekly downsampling of agent_results with compressed archival and incremental vacuum
+"""
+
+import gzip
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used instead
+    zstandard = None
+
+# Per agent_type policies; '*' applies to agent types without their own entry.
+#   keep_latest: newest rows per (symbol, agent_type) always kept
+#   downsample:  'weekly' keeps the newest row of each Monday-to-Sunday (ISO)
+#                week among older rows, None archives every row beyond keep_latest
+DEFAULT_RETENTION_POLICIES = {
+    '*': {'keep_latest': 10, 'downsample': 'weekly'},
+}
+
+ARCHIVE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS agent_results_archive (
+    id INTEGER PRIMARY KEY,           -- agent_results.id of the archived row
+    symbol TEXT NOT NULL,
+    agent_type TEXT NOT NULL,
+    analysis_date DATE NOT NULL,
+    execution_time_ms INTEGER,
+    data_freshness TEXT,
+    created_at TIMESTAMP,
+    codec TEXT NOT NULL,              -- 'zstd' or 'gzip'
+    raw_size INTEGER NOT NULL,        -- bytes of the uncompressed JSON
+    raw_result BLOB NOT NULL,         -- compressed JSON
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)'''
+
+_SELECT_EXPIRED_SQL = '''
+WITH ranked AS (
+    SELECT id, agent_type,
+           ROW_NUMBER() OVER (
+               PARTITION BY symbol, agent_type ORDER BY created_at DESC, id DESC
+           ) AS recency,
+           ROW_NUMBER() OVER (
+               -- Monday starting the week; strftime('%W') restarts at new year
+               PARTITION BY symbol, agent_type, date(analysis_date, '-6 days', 'weekday 1')
+               ORDER BY created_at DESC, id DESC
+           ) AS week_rank
+    FROM agent_results
+)
+SELECT id, agent_type, recency, week_rank FROM ranked WHERE recency > ?
+'''
+
+
+def compress(data: bytes) -> tuple:
+    """(codec, payload) using zstd when available, gzip otherwise."""
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(data)
+    return 'gzip', gzip.compress(data, compresslevel=6)
+
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("zstandard is required to read zstd archives. Install it with: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return gzip.decompress(payload)
+
+
+def _database_bytes(conn: sqlite3.Connection) -> int:
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    return page_size * page_count
+
+
+class AgentResultRetention:
+    """
+    Applies retention policies to agent_results.
+
+    Rows a policy no longer keeps are compressed into agent_results_archive
+    (in the main database, or in a separate SQLite file when archive_path is
+    given) and deleted, then the freed pages are returned to the filesystem
+    with PRAGMA incremental_vacuum.
+    """
+
+    def __init__(self, connections, archive_path: str = None, batch_size: int = 500):
+        self._connections = connections
+        self.archive_path = archive_path
+        self.batch_size = max(1, batch_size)
+
+    @staticmethod
+    def _policy(policies: Dict[str, dict], agent_type: str) -> dict:
+        return {**DEFAULT_RETENTION_POLICIES['*'], **policies.get('*', {}), **policies.get(agent_type, {})}
+
+    def expired_ids(self, conn: sqlite3.Connection, policies: Dict[str, dict]) -> List[int]:
+        """ids of agent_results rows the policies do not keep."""
+        min_keep = min(self._policy(policies, t)['keep_latest'] for t in list(policies) + ['*'])
+        expired = []
+        for row_id, agent_type, recency, week_rank in conn.execute(_SELECT_EXPIRED_SQL, (min_keep,)):
+            policy = self._policy(policies, agent_type)
+            if recency <= policy['keep_latest']:
+                continue
+            if policy.get('downsample') == 'weekly' and week_rank == 1:
+                continue
+            expired.append(row_id)
+        return expired
+
+    def run(self, policies: Dict[str, dict] = None, dry_run: bool = False,
+            vacuum: bool = True) -> Dict[str, Any]:
+        policies = policies or {}
+        conn = self._connections.connection()
+        bytes_before = _database_bytes(conn)
+
+        with self._connections.transaction(immediate=False) as read_conn:
+            total_rows = read_conn.execute('SELECT COUNT(*) FROM agent_results').fetchone()[0]
+            expired = self.expired_ids(read_conn, policies)
+
+        result = {
+            'status': 'success',
+            'dry_run': dry_run,
+            'rows_examined': total_rows,
+            'rows_expired': len(expired),
+            'rows_archived': 0,
+            'raw_bytes_archived': 0,
+            'compressed_bytes_archived': 0,
+            'codec': 'zstd' if zstandard is not None else 'gzip',
+            'archive': self.archive_path or 'agent_results_archive',
+        }
+        if dry_run:
+            return result
+
+        archive_conn = self._archive_connection()
+        try:
+            for start in range(0, len(expired), self.batch_size):
+                self._archive_batch(expired[start:start + self.batch_size], archive_conn, result)
+        finally:
+            if archive_conn is not None:
+                archive_conn.close()
+
+        if vacuum:
+            result['vacuum'] = self._vacuum(conn)
+        bytes_after = _database_bytes(conn)
+        result.update({
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'reclaimed_bytes': bytes_before - bytes_after,
+        })
+        return result
+
+    def _archive_connection(self) -> Optional[sqlite3.Connection]:
+        if self.archive_path is None:
+            with self._connections.transaction() as conn:
+                conn.execute(ARCHIVE_SCHEMA)
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(self.archive_path)), exist_ok=True)
+        archive_conn = sqlite3.connect(self.archive_path, isolation_level=None)
+        archive_conn.execute(ARCHIVE_SCHEMA)
+        return archive_conn
+
+    def _archive_batch(self, ids: List[int], archive_conn: Optional[sqlite3.Connection],
+                       result: Dict[str, Any]) -> None:
+        placeholders = ', '.join(['?'] * len(ids))
+        with self._connections.transaction(immediate=False) as conn:
+            rows = conn.execute(f'''
+                SELECT id, symbol, agent_type, analysis_date, execution_time_ms, data_freshness,
+                       created_at, raw_result
+                FROM agent_results WHERE id IN ({placeholders})
+            ''', ids).fetchall()
+
+        # Compress outside the write lock; agent_results rows are never
+        # updated, so the rows read above are what gets deleted below
+        archived = []
+        for *meta, raw in rows:
+            data = raw.encode('utf-8') if isinstance(raw, str) else bytes(raw)
+            codec, payload = compress(data)
+            archived.append(tuple(meta) + (codec, len(data), payload))
+        archived_ids = [row[0] for row in archived]
+
+        insert_sql = '''
+            INSERT OR IGNORE INTO agent_results_archive (
+                id, symbol, agent_type, analysis_date, execution_time_ms, data_freshness,
+                created_at, codec, raw_size, raw_result
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+        with self._connections.transaction() as conn:
+            if archive_conn is None:
+                conn.executemany(insert_sql, archived)
+            else:
+                # Archive first: a crash between the two commits leaves a
+                # duplicate the next run ignores, never a lost row
+                archive_conn.execute('BEGIN IMMEDIATE')
+                try:
+                    archive_conn.executemany(insert_sql, archived)
+                    archive_conn.execute('COMMIT')
+                except BaseException:
+                    archive_conn.execute('ROLLBACK')
+                    raise
+            conn.execute(f"DELETE FROM agent_results WHERE id IN ({', '.join(['?'] * len(archived_ids))})",
+                         archived_ids)
+        result['rows_archived'] += len(archived)
+        result['raw_bytes_archived'] += sum(row[-2] for row in archived)
+        result['compressed_bytes_archived'] += sum(len(row[-1]) for row in archived)
+
+    def _vacuum(self, conn: sqlite3.Connection) -> str:
+        """Return free pages to the OS; converts the database to incremental auto_vacuum once."""
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            # auto_vacuum mode only changes with a full VACUUM
+            conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+            conn.execute('VACUUM')
+            mode = 'full (converted to incremental auto_vacuum)'
+        else:
+            # sqlite3's execute() steps the pragma once, freeing a single page;
+            # executescript() runs it to completion
+            conn.executescript('PRAGMA incremental_vacuum;')
+            mode = 'incremental'
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+        return mode
@@ -0,0 +1,388 @@
+"""
+Declarative Screening Engine
+Composable range/IN screens over the latest stock_analysis snapshot and composite_scores
+"""
+
+import base64
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Legacy advanced_screening() keys -> (column, predicate)
+LEGACY_CRITERIA = {
+    'min_roe': ('roe', 'min'),
+    'max_pe': ('pe_ratio', 'max'),
+    'min_rsi': ('rsi_14', 'min'),
+    'technical_signals': ('technical_signal', 'in'),
+    'min_sentiment': ('sentiment_score', 'min'),
+}
+
+DEFAULT_SELECT_COLUMNS = [
+    'roe', 'pe_ratio', 'rsi_14', 'sentiment_score',
+    'investment_grade', 'technical_signal', 'current_price', 'market_cap'
+]
+
+DEFAULT_SORT = [('roe', 'desc')]
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+
+# Indexes for the screens the agents run every day; created by create_recommended_indexes()
+RECOMMENDED_SCREENING_INDEXES = [
+    ('stock_analysis', ('analysis_type', 'roe', 'pe_ratio')),
+    ('stock_analysis', ('analysis_type', 'pe_ratio')),
+    ('stock_analysis', ('analysis_type', 'rsi_14', 'technical_signal')),
+    ('stock_analysis', ('analysis_type', 'sentiment_score')),
+    ('composite_scores', ('overall_score', 'total_risk_score')),
+]
+
+# advanced_screening() flushes usage counts to SQLite after this many runs
+USAGE_FLUSH_RUNS = 100
+
+# Screen shapes run, persisted so index advice survives process restarts
+SCREENING_USAGE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS screening_usage (
+    analysis_type TEXT NOT NULL DEFAULT '',  -- '' for screens across every type
+    filter_columns TEXT NOT NULL,            -- JSON list, sorted
+    sort_columns TEXT NOT NULL,              -- JSON list, in sort order
+    runs INTEGER NOT NULL DEFAULT 0,
+    last_run_at TIMESTAMP,
+    PRIMARY KEY (analysis_type, filter_columns, sort_columns)
+)'''
+
+_TABLE_ALIASES = {'stock_analysis': 'sa', 'composite_scores': 'cs'}
+# Declared column types that hold numbers (range screens, rankings)
+NUMERIC_TYPES = ('REAL', 'INTEGER', 'BOOLEAN', 'NUMERIC')
+
+
+class ScreeningError(ValueError):
+    """Raised for screens that reference unknown columns or invalid predicates."""
+
+
+class ScreeningEngine:
+    """
+    Builds and runs screens of the form:
+
+        {
+            'filters': {
+                'roe': {'min': 0.15},
+                'pe_ratio': {'min': 0, 'max': 25},
+                'technical_signal': {'in': ['BUY', 'STRONG_BUY']},
+                'composite.overall_score': {'min': 70}
+            },
+            'analysis_type': 'fundamental',      # optional
+            'sort': [('roe', 'desc'), ('pe_ratio', 'asc')],
+            'columns': ['roe', 'pe_ratio'],      # optional extra output columns
+            'limit': 50,
+            'after': '<next_cursor from the previous page>'
+        }
+
+    Range predicates (min/max) accept any numeric column of stock_analysis or
+    composite_scores; IN accepts any column. Names present in both tables
+    resolve to stock_analysis unless prefixed with 'composite.'. The legacy
+    advanced_screening keys (min_roe, max_pe, ...) are still accepted.
+
+    Pagination is keyset-based: each page returns next_cursor, which encodes
+    the sort values of its last row, so deep pages cost the same as page one.
+    """
+
+    def __init__(self):
+        self._schema: Optional[Dict[str, Dict[str, str]]] = None
+        # Runs not yet written to screening_usage (see flush_usage)
+        self.usage: Counter = Counter()
+        self._usage_lock = threading.Lock()
+        # (schema_version, sql) -> (plan, warnings); a new index bumps schema_version
+        self._plans: Dict[Tuple[int, str], Tuple[List[str], List[str]]] = {}
+
+    # ------------------------------------------------------------------ schema
+
+    def schema(self, conn: sqlite3.Connection) -> Dict[str, Dict[str, str]]:
+        """Column name -> declared type for each screenable table (cached)."""
+        if self._schema is None:
+            self._schema = {
+                table: {row[1]: (row[2] or '').upper() for row in conn.execute(f'PRAGMA table_info({table})')}
+                for table in _TABLE_ALIASES
+            }
+        return self._schema
+
+    def _resolve(self, conn: sqlite3.Connection, name: str) -> Tuple[str, str, str]:
+        """Map a screen column name to (table, column, declared type)."""
+        schema = self.schema(conn)
+        if name.startswith('composite.'):
+            table, column = 'composite_scores', name.split('.', 1)[1]
+        elif name in schema['stock_analysis']:
+            table, column = 'stock_analysis', name
+        else:
+            table, column = 'composite_scores', name
+
+        if column not in schema[table]:
+            raise ScreeningError(f'Unknown screening column: {name}')
+        return table, column, schema[table][column]
+
+    # ------------------------------------------------------------------- build
+
+    def normalize(self, criteria: dict) -> dict:
+        """Fold legacy keys into the declarative form and apply defaults."""
+        filters: Dict[str, Dict[str, Any]] = {}
+        for key, (column, op) in LEGACY_CRITERIA.items():
+            if key in criteria:
+                filters.setdefault(column, {})[op] = criteria[key]
+        for column, predicate in (criteria.get('filters') or {}).items():
+            filters.setdefault(column, {}).update(predicate)
+
+        sort = [(s, 'asc') if isinstance(s, str) else (s[0], s[1].lower()) for s in criteria.get('sort') or DEFAULT_SORT]
+        for _, direction in sort:
+            if direction not in ('asc', 'desc'):
+                raise ScreeningError(f'Sort direction must be asc or desc, got {direction}')
+
+        return {
+            'filters': filters,
+            'analysis_type': criteria.get('analysis_type'),
+            'sort': sort,
+            'columns': list(criteria.get('columns') or DEFAULT_SELECT_COLUMNS),
+            'limit': max(1, min(int(criteria.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)),
+            'after': criteria.get('after'),
+        }
+
+    def build_query(self, conn: sqlite3.Connection, criteria: dict) -> Tuple[str, list, dict]:
+        """Return (sql, params, normalized spec) for a screen."""
+        spec = self.normalize(criteria)
+        conditions: List[str] = []
+        params: List[Any] = []
+        uses_composite = False
+
+        def ref(name: str) -> Tuple[str, str]:
+            nonlocal uses_composite
+            table, column, col_type = self._resolve(conn, name)
+            uses_composite = uses_composite or table == 'composite_scores'
+            return f'{_TABLE_ALIASES[table]}.{column}', col_type
+
+        # Filters
+        for name, predicate in spec['filters'].items():
+            expr, col_type = ref(name)
+            for op, value in predicate.items():
+                if op in ('min', 'max'):
+                    if not col_type.startswith(NUMERIC_TYPES):
+                        raise ScreeningError(f'Range predicate on non-numeric column: {name}')
+                    conditions.append(f'{expr} {">=" if op == "min" else "<="} ?')
+                    params.append(value)
+                elif op == 'in':
+                    values = list(value)
+                    if not values:
+                        conditions.append('0')
+                        continue
+                    conditions.append(f'{expr} IN ({", ".join(["?"] * len(values))})')
+                    params.extend(values)
+                else:
+                    raise ScreeningError(f'Unsupported predicate {op!r} for {name}')
+
+        # Latest rows only: one analysis_type, or every type on the symbol's newest date
+        if spec['analysis_type']:
+            conditions.append('latest.analysis_type = ?')
+            params.append(spec['analysis_type'])
+        else:
+            conditions.append('''latest.analysis_date = (
+                SELECT MAX(latest2.analysis_date)
+                FROM stock_analysis_latest latest2
+                WHERE latest2.symbol = latest.symbol
+            )''')
+
+        # Sort keys: NULLs always last, then symbol/analysis_type as unique tie-breakers
+        sort_keys = [(ref(name)[0], direction) for name, direction in spec['sort']]
+        sort_keys += [('sa.symbol', 'asc'), ('sa.analysis_type', 'asc')]
+        order_by = [f'{expr} {direction.upper()} NULLS LAST' for expr, direction in sort_keys]
+
+        if spec['after']:
+            after_sql, after_params = self._keyset_condition(sort_keys, self.decode_cursor(spec['after']))
+            conditions.append(after_sql)
+            params.extend(after_params)
+
+        select = ['sa.symbol', 'sa.analysis_type', 'sa.analysis_date']
+        for name in spec['columns']:
+            expr, _ = ref(name)
+            select.append(f'{expr} AS "{name}"')
+        for i, (expr, _) in enumerate(sort_keys[:-2]):
+            select.append(f'{expr} AS "_sort_{i}"')
+
+        composite_join = ''
+        if uses_composite:
+            composite_join = '''
+        JOIN composite_scores cs
+          ON cs.symbol = sa.symbol
+         AND cs.analysis_date = (
+            SELECT MAX(cs2.analysis_date) FROM composite_scores cs2 WHERE cs2.symbol = sa.symbol
+         )'''
+
+        sql = f'''
+        SELECT {", ".join(select)}
+        FROM stock_analysis_latest latest
+        JOIN stock_analysis sa
+          ON sa.symbol = latest.symbol
+         AND sa.analysis_date = latest.analysis_date
+         AND sa.analysis_type = latest.analysis_type{composite_join}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {", ".join(order_by)}
+        LIMIT ?
+        '''
+        params.append(spec['limit'])
+        return sql, params, spec
+
+    @staticmethod
+    def _keyset_condition(sort_keys: List[Tuple[str, str]], values: list) -> Tuple[str, list]:
+        """Lexicographic 'comes after' predicate for keyset pagination (NULLs sort last)."""
+        if len(values) != len(sort_keys):
+            raise ScreeningError('Cursor does not match the screen sort order')
+
+        branches, params = [], []
+        equal_sql, equal_params = [], []
+        for (expr, direction), value in zip(sort_keys, values):
+            if value is not None:
+                op = '>' if direction == 'asc' else '<'
+                branches.append(' AND '.join(equal_sql + [f'({expr} {op} ? OR {expr} IS NULL)']))
+                params.extend(equal_params + [value])
+                equal_sql.append(f'{expr} = ?')
+                equal_params.append(value)
+            else:
+                # Nothing sorts after NULL within this key; only ties continue
+                equal_sql.append(f'{expr} IS NULL')
+
+        if not branches:
+            return '0', []
+        return '(' + ' OR '.join(f'({b})' for b in branches) + ')', params
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list:
+        try:
+            return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError) as e:
+            raise ScreeningError(f'Invalid screening cursor: {e}')
+
+    # ----------------------------------------------------------------- explain
+
+    @staticmethod
+    def explain(conn: sqlite3.Connection, sql: str, params: list) -> Tuple[List[str], List[str]]:
+        """Return (query plan lines, full-scan warnings) from EXPLAIN QUERY PLAN."""
+        plan = [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+        warnings = [
+            f'Full table scan: {line}' for line in plan
+            if line.startswith('SCAN') and 'INDEX' not in line
+            and line.split()[1] in ('sa', 'cs', 'stock_analysis', 'composite_scores')
+        ]
+        return plan, warnings
+
+    def cached_explain(self, conn: sqlite3.Connection, sql: str, params: list) -> Tuple[List[str], List[str]]:
+        """explain(), run once per query shape and schema version rather than per call."""
+        key = (conn.execute('PRAGMA schema_version').fetchone()[0], sql)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self.explain(conn, sql, params)
+        return plan
+
+    # --------------------------------------------------------------------- run
+
+    def run(self, conn: sqlite3.Connection, criteria: dict) -> dict:
+        """Execute a screen and return one page of results (plan warnings are returned, not printed)."""
+        sql, params, spec = self.build_query(conn, criteria)
+        plan, plan_warnings = self.cached_explain(conn, sql, params)
+
+        with self._usage_lock:
+            self.usage[self.signature(spec)] += 1
+
+        cursor = conn.execute(sql, params)
+        names = [d[0] for d in cursor.description]
+        sort_count = len(spec['sort'])
+        results, last_sort_values = [], None
+        for row in cursor:
+            record = dict(zip(names, row))
+            last_sort_values = [record.pop(f'_sort_{i}') for i in range(sort_count)]
+            last_sort_values += [record['symbol'], record['analysis_type']]
+            results.append(record)
+
+        next_cursor = None
+        if len(results) == spec['limit'] and last_sort_values is not None:
+            next_cursor = self.encode_cursor(last_sort_values)
+
+        return {
+            'results': results,
+            'next_cursor': next_cursor,
+            'query_plan': plan,
+            'plan_warnings': plan_warnings,
+        }
+
+    # ----------------------------------------------------------------- indexes
+
+    @staticmethod
+    def signature(spec: dict) -> Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]:
+        """Shape of a screen (type, filter columns, sort columns) used for index advice."""
+        return (
+            spec['analysis_type'],
+            tuple(sorted(spec['filters'])),
+            tuple(name for name, _ in spec['sort']),
+        )
+
+    def pending_runs(self) -> int:
+        """Screen runs counted since the last flush_usage()."""
+        with self._usage_lock:
+            return sum(self.usage.values())
+
+    def flush_usage(self, conn: sqlite3.Connection) -> int:
+        """Add pending run counts to screening_usage (inside a write transaction); returns shapes written."""
+        with self._usage_lock:
+            pending, self.usage = self.usage, Counter()
+        conn.executemany(
+            'INSERT INTO screening_usage (analysis_type, filter_columns, sort_columns, runs, last_run_at) '
+            'VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP) '
+            'ON CONFLICT (analysis_type, filter_columns, sort_columns) DO UPDATE SET '
+            'runs = runs + excluded.runs, last_run_at = excluded.last_run_at',
+            [(analysis_type or '', json.dumps(list(filter_cols)), json.dumps(list(sort_cols)), runs)
+             for (analysis_type, filter_cols, sort_cols), runs in pending.items()]
+        )
+        return len(pending)
+
+    def usage_counts(self, conn: sqlite3.Connection) -> Counter:
+        """Runs per screen shape: persisted counts plus those not flushed yet."""
+        counts: Counter = Counter()
+        for analysis_type, filter_cols, sort_cols, runs in conn.execute(
+                'SELECT analysis_type, filter_columns, sort_columns, runs FROM screening_usage'):
+            counts[(analysis_type or None, tuple(json.loads(filter_cols)), tuple(json.loads(sort_cols)))] += runs
+        with self._usage_lock:
+            counts.update(self.usage)
+        return counts
+
+    def recommended_indexes(self, conn: sqlite3.Connection, top_n: int = 5, min_runs: int = 3) -> List[Tuple[str, Tuple[str, ...]]]:
+        """Baseline indexes plus one per frequently run screen shape (counted across processes)."""
+        recommended = list(RECOMMENDED_SCREENING_INDEXES)
+        for (analysis_type, filter_cols, sort_cols), runs in self.usage_counts(conn).most_common(top_n):
+            if runs < min_runs:
+                break
+            # Equality on analysis_type first, then range columns, then sort columns
+            columns = ['analysis_type']
+            try:
+                for name in filter_cols + sort_cols:
+                    table, column, _ = self._resolve(conn, name)
+                    if table == 'stock_analysis' and column not in columns:
+                        columns.append(column)
+            except ScreeningError:
+                continue  # shape recorded before one of its columns was dropped
+            # symbol/analysis_date make the index covering for the snapshot join
+            columns += ['symbol', 'analysis_date']
+            recommended.append(('stock_analysis', tuple(columns)))
+        return recommended
+
+    def create_recommended_indexes(self, conn: sqlite3.Connection, top_n: int = 5, min_runs: int = 3) -> List[str]:
+        """CREATE INDEX IF NOT EXISTS for every recommended index; returns their names."""
+        self.flush_usage(conn)
+        created = []
+        for table, columns in self.recommended_indexes(conn, top_n, min_runs):
+            digest = hashlib.sha1(','.join(columns).encode()).hexdigest()[:10]
+            name = f'idx_screen_{table}_{digest}'
+            conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table}({", ".join(columns)})')
+            created.append(name)
+        conn.execute('ANALYZE')
+        return created
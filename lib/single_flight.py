@@ -0,0 +1,188 @@
+"""
+Single-Flight Refresh Coordination
+One recomputation per (analysis_type, symbol), in-process and across processes
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    from .db_connection import ConnectionManager
+except ImportError:  # imported as a top-level module with lib/ on sys.path
+    from db_connection import ConnectionManager
+
+Key = Tuple[str, str]
+
+
+class SQLiteLease:
+    """
+    Cross-process refresh leases stored in the refresh_leases table.
+
+    A lease is a row keyed by (analysis_type, symbol) holding an owner id and
+    an expiry (epoch seconds). Acquiring succeeds when no row exists or the
+    existing row has expired, so a crashed owner blocks others for at most
+    one lease period. All methods are blocking; run them on the writer thread.
+    """
+
+    def __init__(self, connections: ConnectionManager):
+        self._connections = connections
+
+    def acquire(self, key: Key, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+        with self._connections.transaction() as conn:
+            conn.execute('''
+            INSERT INTO refresh_leases (analysis_type, symbol, owner, acquired_at, expires_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(analysis_type, symbol) DO UPDATE SET
+                owner = excluded.owner,
+                acquired_at = excluded.acquired_at,
+                expires_at = excluded.expires_at
+            WHERE refresh_leases.expires_at <= ?
+            ''', (key[0], key[1], owner, now, now + lease_seconds, now))
+            row = conn.execute(
+                'SELECT owner FROM refresh_leases WHERE analysis_type = ? AND symbol = ?', key
+            ).fetchone()
+        return row is not None and row[0] == owner
+
+    def renew(self, key: Key, owner: str, lease_seconds: float) -> bool:
+        with self._connections.transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE refresh_leases SET expires_at = ? WHERE analysis_type = ? AND symbol = ? AND owner = ?',
+                (time.time() + lease_seconds, key[0], key[1], owner)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, key: Key, owner: str) -> None:
+        with self._connections.transaction() as conn:
+            conn.execute(
+                'DELETE FROM refresh_leases WHERE analysis_type = ? AND symbol = ? AND owner = ?',
+                (key[0], key[1], owner)
+            )
+
+
+class _Flight:
+    """State shared by every in-process caller waiting on one refresh."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.lease_attempted = loop.create_future()  # True once this process holds the lease
+        self.result = loop.create_future()
+        # The result may be set with nobody left awaiting it
+        self.result.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent refreshes of the same key.
+
+    Within a process, callers for a key share one in-flight task. Across
+    processes, the task must hold the SQLite lease before recomputing;
+    otherwise it polls until the lease holder's result shows up (or the lease
+    expires and it can take over). Callers that did not start the refresh get
+    the stale value immediately when one is available.
+    """
+
+    def __init__(self, lease: SQLiteLease, run_write: Callable[..., Awaitable[Any]],
+                 poll_interval: float = 0.5):
+        self._lease = lease
+        self._run_write = run_write
+        self.poll_interval = poll_interval
+        self._flights: Dict[Key, _Flight] = {}
+        self._owner_prefix = f'{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+    async def run(self, key: Key,
+                  fetch: Callable[[], Awaitable[dict]],
+                  refresh: Callable[[], Awaitable[dict]],
+                  stale: Optional[dict] = None,
+                  lease_seconds: float = 600.0,
+                  wait_timeout: float = 900.0) -> dict:
+        """
+        Return fresh data for key, recomputing at most once across callers.
+
+        Args:
+            key: (analysis_type, symbol)
+            fetch: Returns the cached payload ({'status': 'cache_hit', ...} when valid)
+            refresh: Recomputes, stores and returns the fresh payload
+            stale: Expired payload handed to non-leading callers, if any
+            lease_seconds: Lease period; renewed while refresh() runs
+            wait_timeout: Longest a caller waits for someone else's refresh
+        """
+        flight = self._flights.get(key)
+        started_here = flight is None
+        if started_here:
+            flight = _Flight(asyncio.get_running_loop())
+            self._flights[key] = flight
+            asyncio.ensure_future(self._lead(key, flight, fetch, refresh, lease_seconds, wait_timeout))
+
+        if started_here and await asyncio.shield(flight.lease_attempted):
+            return await asyncio.shield(flight.result)
+        if stale is not None:
+            return stale
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.result), wait_timeout)
+        except asyncio.TimeoutError:
+            return {'status': 'error', 'error': f'Timed out waiting for {key[0]} refresh', 'symbol': key[1] or None}
+
+    async def _lead(self, key: Key, flight: _Flight,
+                    fetch: Callable[[], Awaitable[dict]],
+                    refresh: Callable[[], Awaitable[dict]],
+                    lease_seconds: float, wait_timeout: float) -> None:
+        owner = f'{self._owner_prefix}:{uuid.uuid4().hex[:8]}'
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait_timeout
+
+        try:
+            while True:
+                acquired = await self._run_write(self._lease.acquire, key, owner, lease_seconds)
+                if not flight.lease_attempted.done():
+                    flight.lease_attempted.set_result(acquired)
+
+                if acquired:
+                    flight.result.set_result(await self._refresh_with_lease(key, owner, fetch, refresh, lease_seconds))
+                    return
+
+                # Another process is refreshing: wait for its result to land
+                cached = await fetch()
+                if cached.get('status') == 'cache_hit':
+                    flight.result.set_result(cached)
+                    return
+                if loop.time() >= deadline:
+                    flight.result.set_result({
+                        'status': 'error',
+                        'error': f'Timed out waiting for {key[0]} refresh lease',
+                        'symbol': key[1] or None
+                    })
+                    return
+                await asyncio.sleep(self.poll_interval)
+
+        except BaseException as e:
+            if not flight.lease_attempted.done():
+                flight.lease_attempted.set_result(False)
+            if not flight.result.done():
+                flight.result.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            self._flights.pop(key, None)
+
+    async def _refresh_with_lease(self, key: Key, owner: str,
+                                  fetch: Callable[[], Awaitable[dict]],
+                                  refresh: Callable[[], Awaitable[dict]],
+                                  lease_seconds: float) -> dict:
+        async def keep_alive():
+            while True:
+                await asyncio.sleep(lease_seconds / 3)
+                await self._run_write(self._lease.renew, key, owner, lease_seconds)
+
+        renewer = asyncio.ensure_future(keep_alive())
+        try:
+            # Someone may have finished between our miss and taking the lease
+            cached = await fetch()
+            if cached.get('status') == 'cache_hit':
+                return cached
+            return await refresh()
+        finally:
+            renewer.cancel()
+            await self._run_write(self._lease.release, key, owner)
@@ -0,0 +1,161 @@
+"""
+NYSE Trading Calendar
+Rule-generated US market holidays with a precomputed index of trading days
+"""
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Optional
+
+DEFAULT_START_YEAR = 2000
+DEFAULT_END_YEAR = 2050
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th given weekday (Mon=0) of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed Friday, Sunday holidays Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def nyse_holidays(year: int) -> Dict[date, str]:
+    """
+    Full-day NYSE holidays observed in a calendar year.
+
+    Special one-off closures (e.g. national days of mourning) are not
+    rule-based and are not included.
+    """
+    holidays = {}
+
+    # New Year's Day: a Saturday Jan 1 is not made up on Friday Dec 31
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays[_observed(new_year)] = "New Year's Day"
+
+    if year >= 1998:
+        holidays[_nth_weekday(year, 1, 0, 3)] = 'Martin Luther King Jr. Day'
+    holidays[_nth_weekday(year, 2, 0, 3)] = "Presidents' Day"
+    holidays[_easter(year) - timedelta(days=2)] = 'Good Friday'
+    holidays[_nth_weekday(year, 5, 0, -1)] = 'Memorial Day'
+    if year >= 2022:
+        holidays[_observed(date(year, 6, 19))] = 'Juneteenth'
+    holidays[_observed(date(year, 7, 4))] = 'Independence Day'
+    holidays[_nth_weekday(year, 9, 0, 1)] = 'Labor Day'
+    holidays[_nth_weekday(year, 11, 3, 4)] = 'Thanksgiving Day'
+    holidays[_observed(date(year, 12, 25))] = 'Christmas Day'
+
+    return holidays
+
+
+class TradingCalendar:
+    """
+    Trading-day index over a range of years.
+
+    Trading days are stored as a sorted array of date ordinals plus a set,
+    giving O(1) is_trading_day and O(log n) next/previous/between lookups.
+    Dates outside the indexed range extend it on demand.
+    """
+
+    def __init__(self, start_year: int = DEFAULT_START_YEAR, end_year: int = DEFAULT_END_YEAR):
+        self._lock = threading.Lock()
+        self._build(start_year, end_year)
+
+    def _build(self, start_year: int, end_year: int) -> None:
+        holidays: Dict[int, str] = {}
+        for year in range(start_year, end_year + 1):
+            holidays.update((d.toordinal(), name) for d, name in nyse_holidays(year).items())
+
+        first = date(start_year, 1, 1).toordinal()
+        last = date(end_year, 12, 31).toordinal()
+        # date.fromordinal(1) is a Monday, so ordinal % 7 is 0 on Sundays, 6 on Saturdays
+        days = array('l', (o for o in range(first, last + 1) if o % 7 not in (0, 6) and o not in holidays))
+
+        # Publish atomically: readers never see a half-built index
+        self._holidays, self._days, self._day_set = holidays, days, frozenset(days)
+        self.start_year, self.end_year = start_year, end_year
+        self._first, self._last = first, last
+
+    def _ensure(self, ordinal: int) -> None:
+        if self._first <= ordinal <= self._last:
+            return
+        with self._lock:
+            year = date.fromordinal(ordinal).year
+            if not (self.start_year <= year <= self.end_year):
+                self._build(min(self.start_year, year - 1), max(self.end_year, year + 1))
+
+    def is_trading_day(self, day: date) -> bool:
+        ordinal = day.toordinal()
+        self._ensure(ordinal)
+        return ordinal in self._day_set
+
+    def is_holiday(self, day: date) -> bool:
+        """True for weekday exchange holidays (weekends are not holidays)."""
+        ordinal = day.toordinal()
+        self._ensure(ordinal)
+        return ordinal in self._holidays
+
+    def holiday_name(self, day: date) -> Optional[str]:
+        ordinal = day.toordinal()
+        self._ensure(ordinal)
+        return self._holidays.get(ordinal)
+
+    def next_trading_day(self, day: date) -> date:
+        """First trading day strictly after day."""
+        ordinal = day.toordinal()
+        self._ensure(ordinal + 10)
+        return date.fromordinal(self._days[bisect_right(self._days, ordinal)])
+
+    def previous_trading_day(self, day: date) -> date:
+        """Last trading day strictly before day."""
+        ordinal = day.toordinal()
+        self._ensure(ordinal - 10)
+        return date.fromordinal(self._days[bisect_left(self._days, ordinal) - 1])
+
+    def trading_days_between(self, start: date, end: date) -> int:
+        """Number of trading days d with start <= d < end (negative if end < start)."""
+        if end < start:
+            return -self.trading_days_between(end, start)
+        self._ensure(start.toordinal())
+        self._ensure(end.toordinal())
+        return bisect_left(self._days, end.toordinal()) - bisect_left(self._days, start.toordinal())
+
+
+_default_calendar: Optional[TradingCalendar] = None
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """Process-wide calendar, built on first use."""
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = TradingCalendar()
+    return _default_calendar
@@ -7,8 +7,23 @@ import sqlite3
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-import pandas as pd
+from itertools import islice
+from typing import Dict, Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+try:
+    from .column_mapping import normalized_mapper
+    from .db_connection import ConnectionManager, SQLiteWorkerPool
+    from .instrumentation import METRICS_SCHEMA, get_instrumentation, instrumented
+    from .read_cache import AccessTracker, ReadThroughCache
+    from .screening import NUMERIC_TYPES, SCREENING_USAGE_SCHEMA, USAGE_FLUSH_RUNS, ScreeningEngine
+    from .trading_calendar import get_trading_calendar
+except ImportError:  # imported as a top-level module with lib/ on sys.path
+    from column_mapping import normalized_mapper
+    from db_connection import ConnectionManager, SQLiteWorkerPool
+    from instrumentation import METRICS_SCHEMA, get_instrumentation, instrumented
+    from read_cache import AccessTracker, ReadThroughCache
+    from screening import NUMERIC_TYPES, SCREENING_USAGE_SCHEMA, USAGE_FLUSH_RUNS, ScreeningEngine
+    from trading_calendar import get_trading_calendar
 
 class UnifiedAnalyticsDB:
     """Unified database for storing multi-dimensional stock analysis results."""
@@ -29,7 +44,8 @@ class UnifiedAnalyticsDB:
         'D-': {'score': 25, 'recommendation': 'STRONG_SELL', 'risk': 'HIGH'}
     }
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, busy_timeout_ms: int = 5000, reader_threads: int = 4,
+                 read_cache_entries: int = 1024, read_cache_max_age: float = 300.0):
         # Use absolute path in the Claude project data directory
         if db_path is None:
             # Get the directory where this file is located (lib/)
@@ -44,12 +60,270 @@ class UnifiedAnalyticsDB:
             self.db_path = os.path.join(data_dir, "unified_analytics.db")
         else:
             self.db_path = db_path
+        self._connections = ConnectionManager(self.db_path, busy_timeout_ms=busy_timeout_ms)
+        self._workers = SQLiteWorkerPool(reader_threads=reader_threads)
+        self._screening = ScreeningEngine()
+        self._column_mapper = normalized_mapper()
+        # Cache-check results; entries live until the row's cache_expiry or
+        # read_cache_max_age seconds, whichever is sooner
+        self._read_cache = ReadThroughCache(read_cache_entries, read_cache_max_age)
+        self._single_flight = None  # created on first get_or_refresh_* call
+        self._background_tasks = set()
+        self._access = AccessTracker()
+        self._refreshers: Dict[str, Callable[[Optional[str]], Awaitable[dict]]] = {}
         self._init_database()
+
+    def transaction(self):
+        """
+        Group several store_* calls into one transaction.
+
+        Usage:
+            async with db.transaction():
+                await db.store_normalized_analysis(...)
+                await db.store_agent_result(...)
+
+        The transaction is held on the writer thread for the calling task:
+        store (and read) calls made by that task join it as savepoints, while
+        writes from other tasks wait until the block exits.
+        """
+        return self._workers.transaction(self._connections)
+
+    def close(self):
+        """Persist screening usage, stop worker threads and close all pooled connections."""
+        if self._screening.pending_runs():
+            with self._connections.transaction() as conn:
+                self._screening.flush_usage(conn)
+        self._workers.shutdown()
+        self._connections.close_all()
+
+    @staticmethod
+    def _fetch_records(conn, query: str, params=()) -> List[Dict[str, Any]]:
+        """Run a query and return rows as dicts keyed by column name (no pandas)."""
+        cursor = conn.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    @instrumented('db')
+    async def query_records(self, query: str, params=(), as_dataframe: bool = False):
+        """
+        Run a read-only query and return a list of dicts, or a pandas DataFrame
+        when as_dataframe=True. pandas is imported only on that path so cache
+        checks don't pay for it.
+        """
+        return await self._run_read(self._query_records_sync, query, params, as_dataframe)
+
+    def _query_records_sync(self, query: str, params=(), as_dataframe: bool = False):
+        """Blocking body of query_records()."""
+        records = self._fetch_records(self._connections.connection(), query, params)
+        if as_dataframe:
+            import pandas as pd
+            return pd.DataFrame.from_records(records)
+        return records
+
+    def metrics(self) -> dict:
+        """
+        Latency/row/outcome aggregates recorded by @instrumented methods and
+        other instrumented code in this process (empty unless instrumentation
+        is enabled with FIN_AGENTS_METRICS=1 or get_instrumentation().enable()).
+        """
+        return get_instrumentation().snapshot()
+
+    def prometheus_metrics(self) -> str:
+        """The same aggregates in Prometheus text exposition format."""
+        return get_instrumentation().prometheus_text()
+
+    async def write_metrics(self, run_id: str = None) -> int:
+        """Append the current aggregates to instrumentation_metrics; returns rows written."""
+        return await self._run_write(self._write_metrics_sync, run_id)
+
+    def _write_metrics_sync(self, run_id: str = None) -> int:
+        """Blocking body of write_metrics()."""
+        with self._connections.transaction() as conn:
+            return get_instrumentation().write_to(conn, run_id)
+
+    def read_cache_stats(self) -> dict:
+        """Hit/miss/eviction counters for the in-process cache-check layer."""
+        return self._read_cache.stats()
+
+    def _cache_payload(self, key: tuple, payload: dict, age_from: str, cache_expiry: str) -> dict:
+        """
+        Remember a cache-check payload and return a copy with cache_age_hours
+        filled in. Reads inside a transaction() may see uncommitted rows and
+        are not cached.
+        """
+        entry = (payload, datetime.fromisoformat(age_from))
+        if not self._connections.in_transaction():
+            self._read_cache.set(key, entry, datetime.fromisoformat(cache_expiry).timestamp())
+        return self._from_cache_entry(entry)
+
+    def _cached_read(self, key: tuple) -> Optional[dict]:
+        """Cached cache-check payload for key, or None."""
+        entry = self._read_cache.get(key)
+        return self._from_cache_entry(entry) if entry is not None else None
+
+    @staticmethod
+    def _from_cache_entry(entry: tuple) -> dict:
+        payload, age_from = entry
+        result = dict(payload)
+        if 'market_pulse' in result:
+            result['market_pulse'] = dict(result['market_pulse'])
+        result['cache_age_hours'] = (datetime.now() - age_from).total_seconds() / 3600
+        return result
+
+    def _note_access(self, key: tuple, result: dict) -> dict:
+        """Count a cache-check hit for the pre-warm scheduler; returns result unchanged."""
+        if result.get('status') == 'cache_hit':
+            self._access.record(key, result.get('cache_expiry'))
+        return result
+
+    def _invalidate_cached_reads(self, analysis_type: str, symbol: str = None) -> None:
+        """
+        Drop the in-process cache entry a store_* call just superseded, once
+        the write commits: inside an outer transaction() an earlier drop would
+        let a concurrent reader refill the entry with pre-commit data.
+        """
+        key = (analysis_type, symbol)
+        self._connections.on_commit(lambda: self._read_cache.invalidate(key))
+
+    async def _run_write(self, fn, *args, **kwargs):
+        """
+        Run a blocking write off the event loop on the writer thread (joining
+        the calling task's transaction() if it holds one).
+        """
+        return await self._workers.write(fn, *args, **kwargs)
+
+    async def _run_read(self, fn, *args, **kwargs):
+        """Run a blocking query on a reader thread (on the writer inside a transaction())."""
+        return await self._workers.read(fn, *args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
     
     def _init_database(self):
         """Initialize the unified analytics database with all dimensions."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._connections.transaction() as conn:
+            self._create_schema(conn.cursor())
+
+            # Columns added after the first release of their tables
+            added_columns = {
+                'stock_analysis': {'content_hash': 'INTEGER', 'revision': 'INTEGER NOT NULL DEFAULT 0'},
+                'stock_analysis_latest': {'change_seq': 'INTEGER'},
+                'composite_score_runs': {'high_water': 'INTEGER'},
+            }
+            for table, added in added_columns.items():
+                existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+                for column, declaration in added.items():
+                    if column not in existing:
+                        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_latest_change_seq ON stock_analysis_latest(change_seq)')
+            # (analysis_type, analysis_date) lookups plus index-only partition signatures
+            conn.execute('DROP INDEX IF EXISTS idx_stock_type_date')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_stock_type_date_revision '
+                         'ON stock_analysis(analysis_type, analysis_date, revision)')
+            conn.execute(self._REVISION_TRIGGER_SQL)
+
+            # Backfill the snapshot table once for databases created before it existed
+            has_latest = conn.execute('SELECT 1 FROM stock_analysis_latest LIMIT 1').fetchone()
+            has_history = conn.execute('SELECT 1 FROM stock_analysis LIMIT 1').fetchone()
+            if has_history and not has_latest:
+                self._rebuild_latest_snapshot(conn)
+
+    # Merge upserts bump revision themselves; this catches every other UPDATE
+    # (ad-hoc SQL, older code paths) so a changed row always changes its
+    # partition's signature (ColumnarStore.sync, MetricHistory)
+    _REVISION_TRIGGER_SQL = '''
+        CREATE TRIGGER IF NOT EXISTS trg_stock_analysis_revision
+        AFTER UPDATE ON stock_analysis
+        WHEN NEW.revision IS OLD.revision
+        BEGIN
+            UPDATE stock_analysis SET revision = OLD.revision + 1 WHERE rowid = NEW.rowid;
+        END
+    '''
+
+    # change_seq is a database-wide counter bumped on every snapshot change;
+    # incremental composite scoring rescores symbols whose change_seq is above
+    # the previous run's high-water mark
+    _NEXT_CHANGE_SEQ = '(SELECT COALESCE(MAX(change_seq), 0) + 1 FROM stock_analysis_latest)'
+
+    _LATEST_UPSERT_SQL = f'''
+        INSERT INTO stock_analysis_latest (symbol, analysis_type, analysis_date, change_seq)
+        VALUES (?, ?, ?, {_NEXT_CHANGE_SEQ})
+        ON CONFLICT(symbol, analysis_type) DO UPDATE SET
+            analysis_date = excluded.analysis_date,
+            updated_at = CURRENT_TIMESTAMP,
+            change_seq = excluded.change_seq
+        WHERE excluded.analysis_date >= stock_analysis_latest.analysis_date
+    '''
+
+    # Store paths run this *before* their stock_analysis upsert: a row whose
+    # content_hash already matches is not rewritten, so the snapshot is left
+    # alone too (change_seq drives incremental composite scoring)
+    _LATEST_REFRESH_SQL = f'''
+        INSERT INTO stock_analysis_latest (symbol, analysis_type, analysis_date, change_seq)
+        VALUES (?1, ?2, ?3, {_NEXT_CHANGE_SEQ})
+        ON CONFLICT(symbol, analysis_type) DO UPDATE SET
+            analysis_date = excluded.analysis_date,
+            updated_at = CURRENT_TIMESTAMP,
+            change_seq = excluded.change_seq
+        WHERE excluded.analysis_date >= stock_analysis_latest.analysis_date
+          AND NOT EXISTS (
+              SELECT 1 FROM stock_analysis
+              WHERE symbol = ?1 AND analysis_type = ?2 AND analysis_date = ?3 AND content_hash = ?4
+          )
+    '''
+
+    @staticmethod
+    def _latest_params(row: tuple, digest: int) -> tuple:
+        """_LATEST_REFRESH_SQL parameters for a stock_analysis row tuple and its content hash."""
+        return (row[0], row[2], row[1], digest)
+
+    def _rebuild_latest_snapshot(self, conn) -> int:
+        """
+        Recompute stock_analysis_latest from stock_analysis; returns row count.
+
+        Rebuilt rows are numbered above every change_seq handed out so far
+        (and every composite high-water mark), so the next incremental
+        composite run treats them all as changed.
+        """
+        previous = conn.execute('''
+            SELECT MAX(COALESCE((SELECT MAX(change_seq) FROM stock_analysis_latest), 0),
+                       COALESCE((SELECT MAX(high_water) FROM composite_score_runs), 0))
+        ''').fetchone()[0]
+        conn.execute('DELETE FROM stock_analysis_latest')
+        conn.execute('''
+        INSERT INTO stock_analysis_latest (symbol, analysis_type, analysis_date, change_seq)
+        SELECT symbol, analysis_type, MAX(analysis_date), ? + ROW_NUMBER() OVER ()
+        FROM stock_analysis
+        GROUP BY symbol, analysis_type
+        ''', (previous,))
+        return conn.execute('SELECT COUNT(*) FROM stock_analysis_latest').fetchone()[0]
+
+    @instrumented('db')
+    async def rebuild_latest_snapshot(self) -> dict:
+        """
+        Rebuild the stock_analysis_latest table from full history.
+
+        Needed only for databases written by code that bypassed the store
+        paths; also available as `python lib/unified_analytics_db.py rebuild-latest`.
+        """
+        return await self._run_write(self._rebuild_latest_snapshot_sync)
+
+    def _rebuild_latest_snapshot_sync(self) -> dict:
+        """Blocking body of rebuild_latest_snapshot()."""
+        try:
+            with self._connections.transaction() as conn:
+                rows = self._rebuild_latest_snapshot(conn)
+            return {'status': 'success', 'latest_rows': rows}
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    def _create_schema(self, cursor):
+        """Create tables and indexes."""
         
         # Main stock analysis table - normalized key metrics
         cursor.execute('''
@@ -141,6 +415,8 @@ class UnifiedAnalyticsDB:
             confidence_score INTEGER, -- 1-100 confidence in analysis
             next_catalyst_date DATE,
             cache_expiry DATE,
+            content_hash INTEGER, -- hash of the last merged payload; an identical rewrite is skipped
+            revision INTEGER NOT NULL DEFAULT 0, -- bumped by every update (see _REVISION_TRIGGER_SQL)
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             
             PRIMARY KEY (symbol, analysis_date, analysis_type)
@@ -211,6 +487,18 @@ class UnifiedAnalyticsDB:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )''')
         
+        # Latest-snapshot table - one row per (symbol, analysis_type) pointing at
+        # the newest stock_analysis row; maintained by every store path
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stock_analysis_latest (
+            symbol TEXT NOT NULL,
+            analysis_type TEXT NOT NULL,
+            analysis_date DATE NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            change_seq INTEGER,               -- bumped on every change, see _NEXT_CHANGE_SEQ
+            PRIMARY KEY (symbol, analysis_type)
+        )''')
+
         # Market pulse analysis table - market-wide data
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS market_pulse_analysis (
@@ -254,10 +542,50 @@ class UnifiedAnalyticsDB:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )''')
 
+        # Refresh leases: at most one process recomputes a given analysis at a time
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS refresh_leases (
+            analysis_type TEXT NOT NULL,
+            symbol TEXT NOT NULL DEFAULT '',  -- '' for market-wide analyses
+            owner TEXT NOT NULL,              -- pid:token of the holder
+            acquired_at REAL NOT NULL,        -- epoch seconds
+            expires_at REAL NOT NULL,         -- epoch seconds
+            PRIMARY KEY (analysis_type, symbol)
+        )''')
+
+        # Migration checkpoints - last committed legacy rowid per source database
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS migration_checkpoints (
+            source TEXT PRIMARY KEY,          -- absolute path of the legacy database
+            last_rowid INTEGER NOT NULL DEFAULT 0,
+            rows_migrated INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP
+        )''')
+
+        # Instrumentation aggregates appended by write_metrics()
+        cursor.execute(METRICS_SCHEMA)
+
+        # Screen shape run counts behind create_screening_indexes()
+        cursor.execute(SCREENING_USAGE_SCHEMA)
+
+        # Composite score runs - watermark for incremental compute_composite_scores()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS composite_score_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at TIMESTAMP NOT NULL,    -- CURRENT_TIMESTAMP when the run began
+            mode TEXT NOT NULL,               -- 'full' or 'incremental'
+            symbols_scored INTEGER,
+            duration_ms REAL,
+            high_water INTEGER                -- MAX(stock_analysis_latest.change_seq) scored
+        )''')
+
         # Create comprehensive indexes
         indexes = [
             # Main analysis table indexes
             "CREATE INDEX IF NOT EXISTS idx_stock_symbol_date ON stock_analysis(symbol, analysis_date)",
+            "CREATE INDEX IF NOT EXISTS idx_latest_type_date ON stock_analysis_latest(analysis_type, analysis_date)",
+            "CREATE INDEX IF NOT EXISTS idx_latest_updated ON stock_analysis_latest(updated_at)",
             "CREATE INDEX IF NOT EXISTS idx_stock_type ON stock_analysis(analysis_type)",
             "CREATE INDEX IF NOT EXISTS idx_stock_sector ON stock_analysis(sector)",
             "CREATE INDEX IF NOT EXISTS idx_stock_grade ON stock_analysis(investment_grade)",
@@ -267,6 +595,7 @@ class UnifiedAnalyticsDB:
             "CREATE INDEX IF NOT EXISTS idx_composite_overall ON composite_scores(overall_score DESC)",
             "CREATE INDEX IF NOT EXISTS idx_composite_recommendation ON composite_scores(overall_recommendation)",
             "CREATE INDEX IF NOT EXISTS idx_composite_risk ON composite_scores(risk_profile, total_risk_score)",
+            "CREATE INDEX IF NOT EXISTS idx_composite_symbol_date ON composite_scores(symbol, analysis_date DESC)",
 
             # Agent results indexes
             "CREATE INDEX IF NOT EXISTS idx_agent_symbol ON agent_results(symbol, agent_type)",
@@ -283,180 +612,184 @@ class UnifiedAnalyticsDB:
         
         for index in indexes:
             cursor.execute(index)
-        
-        conn.commit()
-        conn.close()
     
+    def _columnar_store(self, root: str = None, fmt: str = 'arrow'):
+        try:
+            from .columnar_store import ColumnarStore
+        except ImportError:
+            from columnar_store import ColumnarStore
+        if root is None:
+            root = os.path.join(os.path.dirname(self.db_path), 'columnar')
+        return ColumnarStore(root, fmt)
+
+    @instrumented('db')
+    async def export_columnar(self, root: str = None, fmt: str = 'arrow', full: bool = False) -> dict:
+        """
+        Export or incrementally sync stock_analysis to partitioned Arrow/Parquet files.
+
+        Partitions are analysis_type x month under root (default: data/columnar
+        next to the database); only partitions whose rows changed are rewritten.
+        Runs on a reader thread inside one read transaction. Requires pyarrow.
+
+        Returns:
+            dict: Status, partitions written/removed and rows written
+        """
+        return await self._run_read(self._export_columnar_sync, root, fmt, full)
+
+    def _export_columnar_sync(self, root: str = None, fmt: str = 'arrow', full: bool = False) -> dict:
+        """Blocking body of export_columnar()."""
+        try:
+            store = self._columnar_store(root, fmt)
+            with self._connections.transaction(immediate=False) as conn:
+                return store.sync(conn, full=full)
+        except ImportError:
+            raise
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    def columnar_reader(self, root: str = None, fmt: str = 'arrow'):
+        """
+        ColumnarStore for reading the export (read_table / read_columns).
+
+            store = db.columnar_reader()
+            table = store.read_table('fundamental', ['roe', 'pe_ratio'], start='2023-01-01')
+        """
+        return self._columnar_store(root, fmt)
+
+    @instrumented('db')
+    async def compute_composite_scores(self, incremental: bool = False) -> dict:
+        """Recompute composite_scores from the latest analyses (see _compute_composite_scores_sync)."""
+        return await self._run_write(self._compute_composite_scores_sync, incremental)
+
+    def _compute_composite_scores_sync(self, incremental: bool = False) -> dict:
+        """
+        Score every symbol from its latest fundamental, technical, sentiment and
+        volatility rows and upsert composite_scores in one transaction.
+
+        With incremental=True only symbols whose latest rows changed since the
+        previous run are rescored (the first run is always full). Also
+        available as `python lib/unified_analytics_db.py composite-scores`.
+
+        Returns:
+            dict: Status, mode, symbols scored and duration
+        """
+        # numpy is only needed here; keep it off the cache-check import path
+        try:
+            from .composite_scores import CompositeScoreEngine
+        except ImportError:
+            from composite_scores import CompositeScoreEngine
+
+        try:
+            engine = CompositeScoreEngine(self.INVESTMENT_GRADE_MAPPING)
+            with self._connections.transaction() as conn:
+                return engine.run(conn, incremental=incremental)
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    @instrumented('db')
+    async def compact_agent_results(self, policies: Dict[str, dict] = None, archive_path: str = None,
+                                    dry_run: bool = False, vacuum: bool = True) -> dict:
+        """Apply agent_results retention (see _compact_agent_results_sync)."""
+        return await self._run_write(self._compact_agent_results_sync, policies, archive_path, dry_run, vacuum)
+
+    def _compact_agent_results_sync(self, policies: Dict[str, dict] = None, archive_path: str = None,
+                                    dry_run: bool = False, vacuum: bool = True) -> dict:
+        """
+        Archive and delete agent_results rows outside the retention policies.
+
+        Policies are keyed by agent_type ('*' for the default), e.g.
+        {'*': {'keep_latest': 10, 'downsample': 'weekly'}, 'sentiment': {'keep_latest': 30}}:
+        the newest keep_latest rows per (symbol, agent_type) are kept, and of
+        the older ones only the newest per week. Dropped rows are compressed
+        into agent_results_archive (or the SQLite file at archive_path)
+        before deletion, then free pages are released with incremental
+        vacuum. Also available as `python lib/unified_analytics_db.py compact-agent-results`.
+
+        Returns:
+            dict: Rows examined/archived, archived raw vs compressed bytes and reclaimed bytes
+        """
+        try:
+            from .retention import AgentResultRetention
+        except ImportError:
+            from retention import AgentResultRetention
+
+        try:
+            retention = AgentResultRetention(self._connections, archive_path)
+            return retention.run(policies, dry_run=dry_run, vacuum=vacuum)
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    @instrumented('db')
     async def store_agent_result(self, symbol: str, agent_type: str, result_data: dict, execution_time: int = None) -> bool:
         """Store raw agent analysis result."""
+        return await self._run_write(self._store_agent_result_sync, symbol, agent_type, result_data, execution_time)
+
+    def _store_agent_result_sync(self, symbol: str, agent_type: str, result_data: dict, execution_time: int = None) -> bool:
+        """Blocking body of store_agent_result()."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            INSERT OR REPLACE INTO agent_results 
-            (symbol, agent_type, analysis_date, raw_result, execution_time_ms, data_freshness)
-            VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                symbol,
-                agent_type, 
-                datetime.now().date(),
-                json.dumps(result_data),
-                execution_time,
-                result_data.get('data_freshness', 'UNKNOWN')
-            ))
-            
-            conn.commit()
-            conn.close()
+            row = self._agent_result_row(symbol, agent_type, result_data, execution_time)
+            with self._connections.transaction() as conn:
+                conn.execute(self._AGENT_RESULT_INSERT_SQL, row)
             return True
             
         except Exception as e:
             print(f"Error storing agent result: {e}")
             return False
-    
-    def _extract_nested_data(self, data: dict, path: str, default=None):
-        """Extract data from nested dictionary using dot notation path."""
-        keys = path.split('.')
-        current = data
-        for key in keys:
-            if isinstance(current, dict) and key in current:
-                current = current[key]
-            else:
-                return default
-        return current
 
+    _AGENT_RESULT_INSERT_SQL = '''
+        INSERT OR REPLACE INTO agent_results
+        (symbol, agent_type, analysis_date, raw_result, execution_time_ms, data_freshness)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+
+    def _agent_result_row(self, symbol: str, agent_type: str, result_data: dict, execution_time: int = None) -> tuple:
+        """Build the parameter tuple for _AGENT_RESULT_INSERT_SQL."""
+        return (
+            symbol,
+            agent_type,
+            datetime.now().date(),
+            json.dumps(result_data),
+            execution_time,
+            result_data.get('data_freshness', 'UNKNOWN')
+        )
+    
+    @instrumented('db')
     async def store_normalized_analysis(self, symbol: str, analysis_data: dict) -> bool:
-        """Store normalized analysis data in the main stock_analysis table."""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        """
+        Store normalized analysis data in the main stock_analysis table.
 
-            # Extract and normalize data
-            today = datetime.now().date()
-            analysis_type = analysis_data.get('analysis_type', 'multi_dimensional')
-
-            # Extract key nested values for easier access (correct agent output paths)
-            investment_grade = self._extract_nested_data(analysis_data, 'investment_classification.investment_grade')
-            stock_classification = self._extract_nested_data(analysis_data, 'investment_classification.primary_category')
-
-            # Extract financial metrics from nested structure (correct paths with year suffix)
-            roe = self._extract_nested_data(analysis_data, 'financial_health.profitability.roe_2024')
-            roa = self._extract_nested_data(analysis_data, 'financial_health.profitability.roa_2024')
-            roic = self._extract_nested_data(analysis_data, 'financial_health.profitability.roic_2024')
-            net_margin = self._extract_nested_data(analysis_data, 'financial_health.profitability.net_margin_2024')
-            operating_margin = self._extract_nested_data(analysis_data, 'financial_health.profitability.operating_margin_2024')
-            gross_margin = self._extract_nested_data(analysis_data, 'financial_health.profitability.gross_margin_2024')
-
-            # Extract liquidity metrics (correct paths with year suffix)
-            current_ratio = self._extract_nested_data(analysis_data, 'financial_health.liquidity.current_ratio_2024')
-            quick_ratio = self._extract_nested_data(analysis_data, 'financial_health.liquidity.quick_ratio_2024')
-
-            # Extract leverage metrics (correct paths with year suffix)
-            debt_to_equity = self._extract_nested_data(analysis_data, 'financial_health.leverage.debt_to_equity_2024')
-            interest_coverage = self._extract_nested_data(analysis_data, 'financial_health.leverage.interest_coverage')
-
-            # Extract growth metrics (correct paths)
-            revenue_growth_1yr = self._extract_nested_data(analysis_data, 'growth_analysis.revenue_growth.cagr_5yr')
-            earnings_growth_1yr = None  # Not directly available in this structure
-
-            # Extract valuation metrics (correct paths)
-            pe_ratio = self._extract_nested_data(analysis_data, 'valuation_metrics.pe_ratio')
-            pb_ratio = self._extract_nested_data(analysis_data, 'valuation_metrics.pb_ratio')
-            ps_ratio = self._extract_nested_data(analysis_data, 'valuation_metrics.ps_ratio')
-            peg_ratio = self._extract_nested_data(analysis_data, 'valuation_metrics.peg_ratio')
-
-            # Extract company overview (correct paths)
-            market_cap = self._extract_nested_data(analysis_data, 'company_profile.market_cap')
-            current_price = self._extract_nested_data(analysis_data, 'current_price.price')
-            sector = self._extract_nested_data(analysis_data, 'company_profile.sector')
-            industry = self._extract_nested_data(analysis_data, 'company_profile.industry')
-
-            # Extract earnings context (correct paths)
-            next_earnings_date = self._extract_nested_data(analysis_data, 'earnings_cache_strategy.next_earnings_date')
-            
-            cursor.execute('''
-            INSERT OR REPLACE INTO stock_analysis (
-                symbol, analysis_date, analysis_type,
-                -- Fundamental
-                roe, roa, roic, net_margin, operating_margin, gross_margin,
-                debt_to_equity, current_ratio, interest_coverage,
-                revenue_growth_1yr, revenue_growth_5yr_cagr,
-                earnings_growth_1yr, eps_growth_5yr_cagr,
-                pe_ratio, pb_ratio, ps_ratio, peg_ratio,
-                fcf_yield, dividend_yield, investment_grade, stock_classification,
-                financial_health_score,
-                -- Enhanced Fundamental (Earnings-Aware)
-                last_earnings_date, next_earnings_date, days_since_earnings,
-                days_until_earnings, earnings_cache_strategy,
-                asset_turnover, inventory_turnover, receivables_turnover,
-                cash_conversion_cycle, quick_ratio, tangible_book_value_growth,
-                fcf_growth_1yr, book_value_growth, revenue_growth_3yr_cagr,
-                ev_ebitda, price_to_fcf, ev_revenue, peg_ratio_forward,
-                cash_position, total_debt, net_debt, debt_service_capability,
-                -- Technical
-                rsi_14, macd_signal, macd_histogram,
-                price_vs_sma_20, price_vs_sma_50, price_vs_sma_200,
-                technical_score, technical_signal,
-                -- Sentiment
-                sentiment_score, news_sentiment_1w, news_sentiment_1m,
-                social_sentiment, analyst_sentiment, sentiment_trend,
-                key_sentiment_drivers,
-                -- Volatility
-                realized_volatility_30d, implied_volatility, iv_rank,
-                volatility_trend, vol_trading_signal,
-                -- Market Context
-                market_cap, current_price, beta, sector, industry,
-                data_sources, confidence_score, cache_expiry
-            ) VALUES (
-                ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
-                ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
-            )
-            ''', (
-                symbol, today, analysis_type,
-                # Fundamental metrics (extracted from nested structure)
-                roe, roa, roic, net_margin, operating_margin, gross_margin,
-                debt_to_equity, current_ratio, interest_coverage,
-                revenue_growth_1yr, None,  # revenue_growth_5yr_cagr not in current structure
-                earnings_growth_1yr, None,  # eps_growth_5yr_cagr not in current structure
-                pe_ratio, pb_ratio, ps_ratio, peg_ratio,
-                None,  # fcf_yield not in current structure
-                None,  # dividend_yield not in current structure
-                investment_grade, stock_classification, None,  # financial_health_score not calculated
-                # Enhanced Fundamental (Earnings-Aware) metrics
-                None, next_earnings_date,  # last_earnings_date not in current structure
-                None, None,  # days_since_earnings, days_until_earnings not in current structure
-                None,  # earnings_cache_strategy not in current structure
-                self._extract_nested_data(analysis_data, 'financial_health.efficiency.asset_turnover'),
-                self._extract_nested_data(analysis_data, 'financial_health.efficiency.inventory_turnover'),
-                self._extract_nested_data(analysis_data, 'financial_health.efficiency.receivables_turnover'),
-                None, quick_ratio,  # cash_conversion_cycle not calculated
-                None, None, None, None,  # tangible_book_value_growth, fcf_growth_1yr, book_value_growth, revenue_growth_3yr_cagr not in current structure
-                self._extract_nested_data(analysis_data, 'valuation.ev_ebitda'),
-                self._extract_nested_data(analysis_data, 'valuation.pfcf_ratio'),
-                None, None,  # ev_revenue, peg_ratio_forward not in current structure
-                self._extract_nested_data(analysis_data, 'financial_health.liquidity.cash_and_equivalents'),
-                None, None, None,  # total_debt, net_debt, debt_service_capability not in current structure
-                # Technical metrics (not in current fundamental structure)
-                None, None, None, None, None, None, None, None,
-                # Sentiment metrics (not in current fundamental structure)
-                None, None, None, None, None, None, json.dumps([]),
-                # Volatility metrics (not in current fundamental structure)
-                None, None, None, None, None,
-                # Market context (extracted from nested structure)
-                market_cap, current_price, None, sector, industry,
-                json.dumps(['fundamental_analysis']),
-                80,  # default confidence score
-                next_earnings_date  # use next earnings as cache expiry
-            ))
-            
-            conn.commit()
-            conn.close()
+        The row is keyed on analysis_data['analysis_type'] (default
+        'multi_dimensional') and analysis_data['analysis_date'] (ISO date,
+        default today).
+        """
+        return await self._run_write(self._store_normalized_analysis_sync, symbol, analysis_data)
+
+    def _store_normalized_analysis_sync(self, symbol: str, analysis_data: dict) -> bool:
+        """Blocking body of store_normalized_analysis()."""
+        try:
+            sql, row, digest = self._normalized_statement(symbol, analysis_data)
+            with self._connections.transaction() as conn:
+                conn.execute(self._LATEST_REFRESH_SQL, self._latest_params(row, digest))
+                conn.execute(sql, row)
+            self._invalidate_cached_reads(row[2], symbol)
             return True
-            
+
         except Exception as e:
             print(f"Error storing normalized analysis: {e}")
             return False
-    
+
+    def _normalized_statement(self, symbol: str, analysis_data: dict) -> Tuple[str, tuple, int]:
+        """
+        (sql, params, content hash) for one normalized row. The upsert names
+        only the columns the payload populates and merges them into an
+        existing row; params start with the (symbol, analysis_date,
+        analysis_type) key.
+        """
+        analysis_type = analysis_data.get('analysis_type', 'multi_dimensional')
+        analysis_date = analysis_data.get('analysis_date') or datetime.now().date().isoformat()
+        return self._column_mapper.statement((symbol, analysis_date, analysis_type), analysis_data)
+
+    @instrumented('db')
     async def store_fundamental_analysis(self, symbol: str, analysis_result: dict) -> dict:
         """Enhanced storage specifically for fundamental analysis results with earnings-aware features."""
         try:
@@ -601,145 +934,212 @@ class UnifiedAnalyticsDB:
                 'error': str(e)
             }
     
-    async def migrate_fundamental_analyses_db(self, legacy_db_path: str = "fundamental_analyses.db") -> dict:
-        """Migrate data from separate fundamental_analyses.db to unified schema."""
+    # Rows per executemany() call in the store_*_many bulk APIs
+    DEFAULT_BATCH_CHUNK_SIZE = 500
+
+    @instrumented('db')
+    async def store_normalized_many(self, items: Iterable[Tuple[str, dict]],
+                                    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> dict:
+        """
+        Bulk variant of store_normalized_analysis().
+
+        Args:
+            items: Iterable of (symbol, analysis_data) pairs
+            chunk_size: Rows per executemany() call; all chunks share one transaction
+
+        Returns:
+            dict: Overall status, stored/failed counts and per-item results in input order
+        """
+        return await self._run_write(self._store_normalized_many_sync, items, chunk_size)
+
+    def _store_normalized_many_sync(self, items: Iterable[Tuple[str, dict]],
+                                    chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> dict:
+        """Blocking body of store_normalized_many()."""
+        touched = []
+
+        def build(item):
+            symbol, analysis_data = item
+            sql, row, digest = self._normalized_statement(symbol, analysis_data)
+            statements = [
+                (self._LATEST_REFRESH_SQL, self._latest_params(row, digest)),
+                (sql, row)
+            ]
+            touched.append((row[2], symbol))
+            return {'symbol': symbol, 'status': 'success'}, statements
+
+        result = self._store_many(items, build, chunk_size)
+        for analysis_type, symbol in touched:
+            self._invalidate_cached_reads(analysis_type, symbol)
+        return result
+
+    @instrumented('db')
+    async def store_sentiment_many(self, items: Iterable[Tuple[str, dict]],
+                                   chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> dict:
+        """
+        Bulk variant of store_sentiment_analysis().
+
+        Args:
+            items: Iterable of (symbol, sentiment_data) pairs
+            chunk_size: Rows per executemany() call; all chunks share one transaction
+
+        Returns:
+            dict: Overall status, stored/failed counts and per-item results in input
+                order (each success carries the same cache fields as the single call)
+        """
+        return await self._run_write(self._store_sentiment_many_sync, items, chunk_size)
+
+    def _store_sentiment_many_sync(self, items: Iterable[Tuple[str, dict]],
+                                   chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> dict:
+        """Blocking body of store_sentiment_many()."""
+        touched = []
+
+        def build(item):
+            symbol, sentiment_data = item
+            sql, row, digest, cache_hours, cache_expiry = self._sentiment_row(symbol, sentiment_data)
+            statements = [
+                (self._LATEST_REFRESH_SQL, self._latest_params(row, digest)),
+                (sql, row),
+                (self._AGENT_RESULT_INSERT_SQL, self._agent_result_row(symbol, 'sentiment', sentiment_data))
+            ]
+            touched.append(symbol)
+            return self._sentiment_stored_status(symbol, sentiment_data, cache_hours, cache_expiry), statements
+
+        result = self._store_many(items, build, chunk_size)
+        for symbol in touched:
+            self._invalidate_cached_reads('sentiment', symbol)
+        return result
+
+    @instrumented('db')
+    async def store_agent_results_many(self, items: Iterable[tuple],
+                                       chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> dict:
+        """
+        Bulk variant of store_agent_result().
+
+        Args:
+            items: Iterable of (symbol, agent_type, result_data[, execution_time]) tuples
+            chunk_size: Rows per executemany() call; all chunks share one transaction
+
+        Returns:
+            dict: Overall status, stored/failed counts and per-item results in input order
+        """
+        return await self._run_write(self._store_agent_results_many_sync, items, chunk_size)
+
+    def _store_agent_results_many_sync(self, items: Iterable[tuple],
+                                       chunk_size: int = DEFAULT_BATCH_CHUNK_SIZE) -> dict:
+        """Blocking body of store_agent_results_many()."""
+        def build(item):
+            symbol, agent_type, result_data = item[:3]
+            execution_time = item[3] if len(item) > 3 else None
+            row = self._agent_result_row(symbol, agent_type, result_data, execution_time)
+            return {'symbol': symbol, 'agent_type': agent_type, 'status': 'success'}, [(self._AGENT_RESULT_INSERT_SQL, row)]
+
+        return self._store_many(items, build, chunk_size)
+
+    def _store_many(self, items: Iterable, build: Callable[[Any], Tuple[dict, List[tuple]]], chunk_size: int) -> dict:
+        """
+        Shared engine for the store_*_many APIs.
+
+        build(item) returns (result_dict, [(sql, params), ...]). Items are
+        consumed chunk by chunk; each chunk runs as one executemany() per
+        statement inside a savepoint of a single outer transaction. If a chunk
+        fails, its items are replayed one by one so only the bad rows are
+        marked as errors.
+        """
+        results = []
+        iterator = iter(items)
+        chunk_size = max(1, chunk_size)
+
         try:
-            import os
-            if not os.path.exists(legacy_db_path):
-                return {
-                    'status': 'warning',
-                    'message': f'Legacy database {legacy_db_path} not found',
-                    'migrated_records': 0
-                }
-            
-            # Connect to legacy database
-            legacy_conn = sqlite3.connect(legacy_db_path)
-            legacy_cursor = legacy_conn.cursor()
-            
-            # Get all records from legacy database
-            legacy_cursor.execute('''
-            SELECT symbol, analysis_date, last_earnings_date, next_earnings_date,
-                   roe, roa, roic, current_ratio, debt_to_equity,
-                   net_margin, operating_margin, gross_margin,
-                   interest_coverage, cash_position,
-                   revenue_growth_1yr, revenue_growth_5yr_cagr,
-                   earnings_growth_1yr, eps_growth_5yr_cagr,
-                   fcf_growth_1yr, book_value_growth,
-                   pe_ratio, pb_ratio, ps_ratio, peg_ratio,
-                   ev_ebitda, fcf_yield, price_to_fcf, dividend_yield,
-                   market_cap, current_price,
-                   price_change_1m, price_change_3m,
-                   stock_classification, investment_grade,
-                   sector, industry, market_cap_category,
-                   financial_health_score, growth_score,
-                   valuation_score, overall_score,
-                   analyst_recommendation, target_price_low, target_price_high,
-                   key_strengths, key_risks,
-                   cache_expiration_date, data_source, created_at
-            FROM fundamental_analyses
-            ORDER BY symbol, analysis_date DESC
-            ''')
-            
-            legacy_records = legacy_cursor.fetchall()
-            legacy_conn.close()
-            
-            migrated_count = 0
-            errors = []
-            
-            for record in legacy_records:
+            with self._connections.transaction():
+                while True:
+                    chunk = list(islice(iterator, chunk_size))
+                    if not chunk:
+                        break
+
+                    prepared = []
+                    for item in chunk:
+                        try:
+                            result, statements = build(item)
+                            prepared.append((result, statements))
+                        except Exception as e:
+                            symbol = item[0] if isinstance(item, (tuple, list)) and item else None
+                            result = {'symbol': symbol, 'status': 'error', 'error': str(e)}
+                        results.append(result)
+
+                    self._execute_chunk(prepared)
+
+        except Exception as e:
+            return {
+                'status': 'error',
+                'error': str(e),
+                'stored': 0,
+                'failed': len(results),
+                'results': results
+            }
+
+        stored = sum(1 for r in results if r['status'] == 'success')
+        failed = len(results) - stored
+        return {
+            'status': 'success' if failed == 0 else ('partial' if stored else 'error'),
+            'stored': stored,
+            'failed': failed,
+            'results': results
+        }
+
+    def _execute_chunk(self, prepared: List[Tuple[dict, List[tuple]]]) -> None:
+        """executemany() one chunk, falling back to per-item savepoints on failure."""
+        grouped: Dict[str, list] = {}
+        for _, statements in prepared:
+            for sql, params in statements:
+                grouped.setdefault(sql, []).append(params)
+
+        try:
+            with self._connections.transaction() as conn:
+                for sql, rows in grouped.items():
+                    conn.executemany(sql, rows)
+        except sqlite3.Error:
+            for result, statements in prepared:
                 try:
-                    # Map legacy fields to new schema
-                    symbol = record[0]
-                    analysis_date = record[1]
-                    
-                    # Create fundamental analysis data structure
-                    fundamental_data = {
-                        'analysis_type': 'fundamental',
-                        'symbol': symbol,
-                        'analysis_date': analysis_date,
-                        
-                        # Map investment grade
-                        'investment_grade': record[30] or 'C',
-                        'stock_classification': record[29],
-                        
-                        # Earnings context
-                        'last_earnings_date': record[2],
-                        'next_earnings_date': record[3],
-                        'earnings_cache_strategy': 'MIGRATED_LEGACY',
-                        
-                        # Financial health metrics
-                        'roe': record[4],
-                        'roa': record[5], 
-                        'roic': record[6],
-                        'current_ratio': record[7],
-                        'debt_to_equity': record[8],
-                        'net_margin': record[9],
-                        'operating_margin': record[10],
-                        'gross_margin': record[11],
-                        'interest_coverage': record[12],
-                        'cash_position': record[13],
-                        
-                        # Growth metrics
-                        'revenue_growth_1yr': record[14],
-                        'revenue_growth_5yr_cagr': record[15],
-                        'earnings_growth_1yr': record[16],
-                        'eps_growth_5yr_cagr': record[17],
-                        'fcf_growth_1yr': record[18],
-                        'book_value_growth': record[19],
-                        
-                        # Valuation metrics
-                        'pe_ratio': record[20],
-                        'pb_ratio': record[21],
-                        'ps_ratio': record[22],
-                        'peg_ratio': record[23],
-                        'ev_ebitda': record[24],
-                        'fcf_yield': record[25],
-                        'price_to_fcf': record[26],
-                        'dividend_yield': record[27],
-                        
-                        # Market data
-                        'market_cap': record[28],
-                        'current_price': record[29],
-                        
-                        # Market context
-                        'sector': record[32],
-                        'industry': record[33],
-                        
-                        # Scores (map to new system)
-                        'financial_health_score': record[35],
-                        'confidence_score': record[37] or 80,
-                        
-                        # Analysis metadata
-                        'data_sources': [record[40] or 'FMP_LEGACY'],
-                        'cache_expiry': record[39],
-                        'data_freshness': 'MIGRATED'
-                    }
-                    
-                    # Apply investment grade mapping
-                    grade_info = self.INVESTMENT_GRADE_MAPPING.get(
-                        fundamental_data['investment_grade'], 
-                        {'score': 60, 'recommendation': 'HOLD', 'risk': 'MEDIUM'}
-                    )
-                    fundamental_data['financial_health_score'] = grade_info['score']
-                    
-                    # Store in unified database
-                    success = await self.store_normalized_analysis(symbol, fundamental_data)
-                    if success:
-                        migrated_count += 1
-                    else:
-                        errors.append(f"Failed to migrate {symbol} from {analysis_date}")
-                        
-                except Exception as e:
-                    errors.append(f"Error migrating record for {symbol}: {str(e)}")
-            
+                    with self._connections.transaction() as conn:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    result.update({'status': 'error', 'error': str(e)})
+
+    @instrumented('db')
+    async def migrate_fundamental_analyses_db(self, legacy_db_path: str = "fundamental_analyses.db",
+                                              batch_size: int = 1000, restart: bool = False) -> dict:
+        """
+        Migrate data from separate fundamental_analyses.db to unified schema.
+
+        Legacy rows are streamed in batches of batch_size, mapped by column
+        name and committed per batch together with a checkpoint, so calling
+        this again after a crash resumes where it stopped (restart=True
+        starts over). The result reports rows/s and peak memory.
+        """
+        return await self._run_write(self._migrate_fundamental_analyses_sync, legacy_db_path, batch_size, restart)
+
+    def _migrate_fundamental_analyses_sync(self, legacy_db_path: str, batch_size: int = 1000,
+                                           restart: bool = False) -> dict:
+        """Blocking body of migrate_fundamental_analyses_db()."""
+        try:
+            from .legacy_migration import LegacyFundamentalMigrator
+        except ImportError:
+            from legacy_migration import LegacyFundamentalMigrator
+
+        if not os.path.exists(legacy_db_path):
             return {
-                'status': 'success' if migrated_count > 0 else 'error',
-                'migrated_records': migrated_count,
-                'total_records': len(legacy_records),
-                'errors': errors[:10],  # Limit error list
-                'migration_summary': f'Migrated {migrated_count}/{len(legacy_records)} records'
+                'status': 'warning',
+                'message': f'Legacy database {legacy_db_path} not found',
+                'migrated_records': 0
             }
-            
+
+        try:
+            migrator = LegacyFundamentalMigrator(
+                self._connections, self._column_mapper, self.INVESTMENT_GRADE_MAPPING, self._LATEST_UPSERT_SQL,
+                batch_size
+            )
+            return migrator.run(legacy_db_path, restart=restart)
         except Exception as e:
             return {
                 'status': 'error',
@@ -747,108 +1147,277 @@ class UnifiedAnalyticsDB:
                 'migrated_records': 0
             }
     
-    async def get_multi_dimensional_comparison(self, symbols: List[str], dimensions: List[str] = None) -> dict:
-        """Compare stocks across multiple dimensions."""
+    @instrumented('db')
+    async def get_multi_dimensional_comparison(self, symbols: List[str], dimensions: List[str] = None,
+                                               metrics: List[str] = None, directions: Dict[str, str] = None,
+                                               include_matrix: bool = True) -> dict:
+        """
+        Compare stocks across multiple dimensions.
+
+        Metrics come from the requested dimensions (see lib/ranking.py) unless
+        given explicitly, and each is ranked in its own direction (pe_ratio
+        ascending, roe descending, ...; override with directions). Output is
+        columnar: 'columns' holds one list per field aligned with
+        columns['symbol'], and 'scores' holds rank, percentile, z-score and
+        sector-relative ranks per metric. 'rankings' keeps the best-first
+        per-metric lists and 'comparison_matrix' the row-per-analysis
+        records (include_matrix=False leaves it out). Unknown or non-numeric
+        metrics and invalid directions return a status 'error' dict.
+        """
+        return await self._run_read(self._get_multi_dimensional_comparison_sync,
+                                    symbols, dimensions, metrics, directions, include_matrix)
+
+    _COMPARISON_INFO_COLUMNS = [
+        'investment_grade', 'technical_signal', 'sentiment_trend', 'volatility_trend',
+        'current_price', 'market_cap', 'sector'
+    ]
+    _COMPARISON_COMPOSITE_COLUMNS = ['overall_score', 'total_risk_score', 'overall_recommendation']
+
+    def _get_multi_dimensional_comparison_sync(self, symbols: List[str], dimensions: List[str] = None,
+                                               metrics: List[str] = None, directions: Dict[str, str] = None,
+                                               include_matrix: bool = True) -> dict:
+        """Blocking body of get_multi_dimensional_comparison()."""
+        # numpy is only needed here; keep it off the cache-check import path
+        try:
+            from .ranking import DIMENSION_METRICS, compare, metrics_for
+        except ImportError:
+            from ranking import DIMENSION_METRICS, compare, metrics_for
+
         if dimensions is None:
             dimensions = ['fundamental', 'technical', 'sentiment', 'volatility']
+        metrics = list(metrics) if metrics else metrics_for(dimensions)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connections.connection()
+        schema = self._screening.schema(conn)
+        known_columns = schema['stock_analysis']
+        # Metrics only composite_scores has (overall_score, total_risk_score, ...) come from there
+        composite_fields = list(dict.fromkeys(
+            [m for m in metrics if m not in known_columns and m in schema['composite_scores']]
+            + [c for c in self._COMPARISON_COMPOSITE_COLUMNS if c not in known_columns]
+        ))
+        unknown = [m for m in metrics if m not in known_columns and m not in composite_fields]
+        if unknown:
+            return {'status': 'error', 'error': f"Unknown comparison metrics: {', '.join(unknown)}"}
+        non_numeric = [
+            m for m in metrics
+            if not schema['composite_scores' if m in composite_fields else 'stock_analysis'][m].startswith(NUMERIC_TYPES)
+        ]
+        if non_numeric:
+            return {'status': 'error', 'error': f"Non-numeric comparison metrics: {', '.join(non_numeric)}"}
+        fields = list(dict.fromkeys(
+            [m for m in metrics if m not in composite_fields] + self._COMPARISON_INFO_COLUMNS
+        ))
         
         # Get latest analysis for each symbol across all dimensions
         query = '''
-        SELECT symbol, analysis_type,
-               roe, pe_ratio, revenue_growth_1yr, investment_grade,
-               rsi_14, technical_signal, price_vs_sma_50,
-               sentiment_score, sentiment_trend,
-               iv_rank, volatility_trend,
-               overall_score, current_price, market_cap
-        FROM stock_analysis sa1
-        WHERE symbol IN ({}) 
-        AND analysis_date = (
-            SELECT MAX(analysis_date) 
-            FROM stock_analysis sa2 
-            WHERE sa2.symbol = sa1.symbol AND sa2.analysis_type = sa1.analysis_type
-        )
-        ORDER BY symbol, analysis_type
-        '''.format(', '.join(['?'] * len(symbols)))
+        SELECT sa1.symbol, sa1.analysis_type, sa1.analysis_date, {}
+        FROM stock_analysis_latest latest
+        JOIN stock_analysis sa1
+          ON sa1.symbol = latest.symbol
+         AND sa1.analysis_date = latest.analysis_date
+         AND sa1.analysis_type = latest.analysis_type
+        WHERE latest.symbol IN ({})
+        ORDER BY sa1.symbol, sa1.analysis_date DESC, sa1.analysis_type
+        '''.format(', '.join(f'sa1.{f}' for f in fields), ', '.join(['?'] * len(symbols)))
         
-        df = pd.read_sql_query(query, conn, params=symbols)
-        conn.close()
+        records = self._fetch_records(conn, query, symbols)
+        
+        # Collapse to one value per symbol and field: prefer the row of the
+        # metric's own dimension, then the newest row that has a value
+        rows_by_symbol: Dict[str, List[dict]] = {}
+        for record in records:
+            rows_by_symbol.setdefault(record['symbol'], []).append(record)
+        compared = [s for s in dict.fromkeys(symbols) if s in rows_by_symbol]
+        dimension_of = {m: d for d, ms in DIMENSION_METRICS.items() for m in ms}
+        
+        fields_by_dimension: Dict[Optional[str], List[str]] = {}
+        for field in fields:
+            fields_by_dimension.setdefault(dimension_of.get(field), []).append(field)
+        
+        columns: Dict[str, list] = {'symbol': compared}
+        columns.update((field, []) for field in fields)
+        for symbol in compared:
+            rows = rows_by_symbol[symbol]
+            for preferred, group in fields_by_dimension.items():
+                candidates = [r for r in rows if r['analysis_type'] == preferred] + rows
+                for field in group:
+                    columns[field].append(next((r[field] for r in candidates if r[field] is not None), None))
+        
+        # Newest composite score per symbol
+        composite = {
+            record['symbol']: record
+            for record in self._fetch_records(conn, '''
+            SELECT cs.symbol, {}
+            FROM composite_scores cs
+            WHERE cs.symbol IN ({})
+              AND cs.analysis_date = (
+                  SELECT MAX(analysis_date) FROM composite_scores WHERE symbol = cs.symbol
+              )
+            '''.format(', '.join(f'cs.{f}' for f in composite_fields), ', '.join(['?'] * len(compared))), compared)
+        } if compared and composite_fields else {}
+        for field in composite_fields:
+            columns[field] = [composite.get(symbol, {}).get(field) for symbol in compared]
+        
+        try:
+            ranked = compare(compared, columns, metrics, columns['sector'], directions)
+        except ValueError as e:  # invalid ranking direction
+            return {'status': 'error', 'error': str(e)}
+        
+        # Best-first lists per metric (ranks are 1-based, 0 = missing)
+        rankings = {}
+        for metric in metrics:
+            ranks = ranked['scores'][metric]['rank']
+            order = sorted((i for i, r in enumerate(ranks) if r), key=lambda i: ranks[i])
+            rankings[metric] = [{'symbol': compared[i], metric: columns[metric][i]} for i in order]
         
-        # Pivot to create comparison matrix
         comparison = {
             'symbols': symbols,
             'dimensions': dimensions,
-            'comparison_matrix': df.to_dict('records'),
-            'rankings': {}
+            'metrics': ranked['metrics'],
+            'directions': ranked['directions'],
+            'columns': columns,
+            'scores': ranked['scores'],
+            'rankings': rankings,
+            'missing_symbols': [s for s in symbols if s not in rows_by_symbol]
         }
-        
-        # Add rankings for key metrics
-        ranking_metrics = ['roe', 'pe_ratio', 'rsi_14', 'sentiment_score', 'iv_rank']
-        for metric in ranking_metrics:
-            if metric in df.columns:
-                ranked = df.dropna(subset=[metric]).nlargest(len(symbols), metric)
-                comparison['rankings'][metric] = ranked[['symbol', metric]].to_dict('records')
+        if include_matrix:
+            comparison['comparison_matrix'] = records
         
         return comparison
     
+    @instrumented('db')
+    async def get_metric_history(self, symbols: Optional[List[str]], metrics: List[str],
+                                 start: str = None, end: str = None, analysis_types: List[str] = None,
+                                 source: str = 'auto'):
+        """
+        Daily history of metrics as dense, aligned NumPy panels.
+
+        Args:
+            symbols: Row order of the panels (None = every symbol with data)
+            metrics: stock_analysis columns, e.g. ['sentiment_score', 'technical_score']
+            start, end: Inclusive ISO date bounds (None = unbounded)
+            analysis_types: Rows to read, in order of preference when a symbol
+                has several rows on one date (None = all types)
+            source: 'sqlite' reads stock_analysis row by row (always current,
+                ~3s for 1000 symbols x 750 days); 'columnar' reads only the
+                export_columnar() snapshot (memory-mapped, ~0.15s, but stale
+                until the next export); 'auto' checks each requested
+                type/month partition's signature against the export and reads
+                partitions that are new or changed since the last sync from
+                SQLite, so results are always current (~0.6s with a current
+                export). 'auto' is only as fast as the export is current: run
+                export_columnar() after bulk writes to stay under a second.
+                Without pyarrow it is 'sqlite'.
+
+        Returns:
+            MetricHistory: history[metric] is a (len(symbols) x len(dates))
+                float array, NaN where missing, with rolling_slope(),
+                rolling_zscore(), delta() and forward_fill() helpers
+        """
+        return await self._run_read(self._get_metric_history_sync, symbols, metrics, start, end,
+                                    analysis_types, source)
+
+    def _get_metric_history_sync(self, symbols: Optional[List[str]], metrics: List[str],
+                                 start: str = None, end: str = None, analysis_types: List[str] = None,
+                                 source: str = 'auto'):
+        """Blocking body of get_metric_history()."""
+        # numpy is only needed here; keep it off the cache-check import path
+        try:
+            from .metric_history import MetricHistory
+        except ImportError:
+            from metric_history import MetricHistory
+
+        metrics = list(dict.fromkeys(metrics))
+        conn = self._connections.connection()
+        unknown = [m for m in metrics if m not in self._screening.schema(conn)['stock_analysis']]
+        if unknown or not metrics:
+            raise ValueError(f"Unknown history metrics: {', '.join(unknown) or '(none given)'}")
+
+        if source not in ('auto', 'sqlite', 'columnar'):
+            raise ValueError(f"Unsupported history source: {source} (expected 'auto', 'sqlite' or 'columnar')")
+        if source == 'sqlite':
+            return MetricHistory.from_sqlite(conn, symbols, metrics, start, end, analysis_types)
+
+        try:
+            store = self._columnar_store()
+            exported_fmt = store.manifest().get('format', store.fmt)
+            if exported_fmt != store.fmt:
+                store = self._columnar_store(fmt=exported_fmt)
+        except ImportError:
+            if source == 'columnar':
+                raise
+            return MetricHistory.from_sqlite(conn, symbols, metrics, start, end, analysis_types)
+
+        if source == 'columnar':
+            return MetricHistory.from_columnar(store, symbols, metrics, start, end, analysis_types)
+        return MetricHistory.from_snapshot(conn, store, symbols, metrics, start, end, analysis_types)
+
+    @instrumented('db')
     async def advanced_screening(self, criteria: dict) -> dict:
-        """Advanced multi-dimensional screening."""
-        conn = sqlite3.connect(self.db_path)
-        
-        # Build dynamic query
-        conditions = ['1=1']  # Base condition
-        params = []
-        
-        # Fundamental criteria
-        if 'min_roe' in criteria:
-            conditions.append('roe >= ?')
-            params.append(criteria['min_roe'])
-        
-        if 'max_pe' in criteria:
-            conditions.append('pe_ratio <= ?')
-            params.append(criteria['max_pe'])
-        
-        # Technical criteria
-        if 'min_rsi' in criteria:
-            conditions.append('rsi_14 >= ?')
-            params.append(criteria['min_rsi'])
-        
-        if 'technical_signals' in criteria:
-            signal_placeholders = ', '.join(['?'] * len(criteria['technical_signals']))
-            conditions.append(f'technical_signal IN ({signal_placeholders})')
-            params.extend(criteria['technical_signals'])
-        
-        # Sentiment criteria
-        if 'min_sentiment' in criteria:
-            conditions.append('sentiment_score >= ?')
-            params.append(criteria['min_sentiment'])
-        
-        # Build final query with latest data only
-        where_clause = ' AND '.join(conditions)
-        query = f'''
-        SELECT DISTINCT symbol, roe, pe_ratio, rsi_14, sentiment_score, 
-               investment_grade, technical_signal, current_price, market_cap
-        FROM stock_analysis sa1
-        WHERE {where_clause}
-        AND analysis_date = (
-            SELECT MAX(analysis_date) 
-            FROM stock_analysis sa2 
-            WHERE sa2.symbol = sa1.symbol
-        )
-        ORDER BY roe DESC
-        LIMIT 50
-        '''
-        
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        
+        """
+        Advanced multi-dimensional screening.
+
+        Accepts the legacy keys (min_roe, max_pe, min_rsi, technical_signals,
+        min_sentiment) or a declarative screen with 'filters', 'sort', 'limit'
+        and 'after' (see lib/screening.py). Pass the returned next_cursor as
+        'after' to fetch the following page.
+        """
+        result = await self._run_read(self._advanced_screening_sync, criteria)
+        if self._screening.pending_runs() >= USAGE_FLUSH_RUNS:
+            await self._run_write(self._flush_screening_usage_sync)
+        return result
+
+    def _flush_screening_usage_sync(self) -> int:
+        """Write pending screen run counts to screening_usage."""
+        with self._connections.transaction() as conn:
+            return self._screening.flush_usage(conn)
+
+    def _advanced_screening_sync(self, criteria: dict) -> dict:
+        """Blocking body of advanced_screening()."""
+        conn = self._connections.connection()
+        page = self._screening.run(conn, criteria)
+
         return {
             'criteria': criteria,
-            'total_matches': len(df),
-            'results': df.to_dict('records')
+            'total_matches': len(page['results']),
+            'results': page['results'],
+            'next_cursor': page['next_cursor'],
+            'plan_warnings': page['plan_warnings']
         }
 
+    @instrumented('db')
+    async def explain_screening(self, criteria: dict) -> dict:
+        """Return the SQL, query plan and full-scan warnings for a screen without running it."""
+        return await self._run_read(self._explain_screening_sync, criteria)
+
+    def _explain_screening_sync(self, criteria: dict) -> dict:
+        """Blocking body of explain_screening()."""
+        conn = self._connections.connection()
+        sql, params, _ = self._screening.build_query(conn, criteria)
+        plan, warnings = self._screening.explain(conn, sql, params)
+        return {'sql': sql, 'params': params, 'query_plan': plan, 'plan_warnings': warnings}
+
+    @instrumented('db')
+    async def create_screening_indexes(self, top_n: int = 5, min_runs: int = 3) -> dict:
+        """
+        Create the recommended covering indexes: a baseline set for the
+        standard screens plus one per screen shape run at least min_runs
+        times. Run counts are kept in the screening_usage table, so a
+        maintenance process (the screening-indexes command) sees the screens
+        other processes ran.
+        """
+        return await self._run_write(self._create_screening_indexes_sync, top_n, min_runs)
+
+    def _create_screening_indexes_sync(self, top_n: int = 5, min_runs: int = 3) -> dict:
+        """Blocking body of create_screening_indexes()."""
+        try:
+            with self._connections.transaction() as conn:
+                created = self._screening.create_recommended_indexes(conn, top_n, min_runs)
+            return {'status': 'success', 'indexes': created}
+        except Exception as e:
+            return {'status': 'error', 'error': str(e)}
+
+    @instrumented('db')
     async def store_sentiment_analysis(self, symbol: str, sentiment_data: dict) -> dict:
         """
         Store comprehensive sentiment analysis results with intelligent caching strategy.
@@ -873,68 +1442,86 @@ class UnifiedAnalyticsDB:
         Returns:
             dict: Storage status and sentiment cache strategy
         """
+        return await self._run_write(self._store_sentiment_analysis_sync, symbol, sentiment_data)
+
+    def _store_sentiment_analysis_sync(self, symbol: str, sentiment_data: dict) -> dict:
+        """Blocking body of store_sentiment_analysis()."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            today = datetime.now().date()
-            analysis_type = 'sentiment'
-            
-            # Determine sentiment cache TTL (shorter than fundamentals)
-            cache_hours = self._get_sentiment_cache_ttl(sentiment_data.get('confidence_level', 'Medium'))
-            cache_expiry = datetime.now() + timedelta(hours=cache_hours)
-            
-            # Store in unified analytics table
-            cursor.execute('''
-            INSERT OR REPLACE INTO stock_analysis (
-                symbol, analysis_date, analysis_type,
-                -- Sentiment metrics
-                sentiment_score, news_sentiment_1w, news_sentiment_1m,
-                social_sentiment, analyst_sentiment, sentiment_trend,
-                key_sentiment_drivers,
-                -- Meta data
-                confidence_score, data_sources, cache_expiry
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                symbol, today, analysis_type,
-                # Sentiment data
-                sentiment_data.get('sentiment_score'),
-                sentiment_data.get('news_sentiment_1w'),
-                sentiment_data.get('news_sentiment_1m'),
-                sentiment_data.get('social_sentiment'),
-                sentiment_data.get('analyst_sentiment'),
-                sentiment_data.get('sentiment_trend'),
-                json.dumps(sentiment_data.get('key_sentiment_drivers', [])),
-                # Meta data
-                self._confidence_to_score(sentiment_data.get('confidence_level', 'Medium')),
-                json.dumps(sentiment_data.get('data_sources', [])),
-                cache_expiry.isoformat()
-            ))
-            
-            # Also store in agent_results for raw data
-            await self.store_agent_result(symbol, 'sentiment', sentiment_data)
-            
-            conn.commit()
-            conn.close()
-            
-            return {
-                'status': 'success',
-                'symbol': symbol,
-                'analysis_type': 'sentiment',
-                'cache_strategy': f'{cache_hours}h TTL',
-                'cache_expiry': cache_expiry.isoformat(),
-                'confidence_level': sentiment_data.get('confidence_level'),
-                'sentiment_score': sentiment_data.get('sentiment_score'),
-                'stored_at': datetime.now().isoformat()
-            }
-            
+            sql, row, digest, cache_hours, cache_expiry = self._sentiment_row(symbol, sentiment_data)
+            with self._connections.transaction() as conn:
+                # Store in unified analytics table
+                conn.execute(self._LATEST_REFRESH_SQL, self._latest_params(row, digest))
+                conn.execute(sql, row)
+
+                # Also store in agent_results for raw data
+                self._store_agent_result_sync(symbol, 'sentiment', sentiment_data)
+            self._invalidate_cached_reads('sentiment', symbol)
+
+            return self._sentiment_stored_status(symbol, sentiment_data, cache_hours, cache_expiry)
+
         except Exception as e:
             return {
                 'status': 'error',
                 'error': str(e),
                 'symbol': symbol
             }
-    
+
+    # Filled in when a sentiment row is first inserted; a later partial
+    # payload leaves the stored values alone
+    _SENTIMENT_DEFAULTS = {
+        'key_sentiment_drivers': '[]',
+        'data_sources': '[]',
+        'confidence_score': 70,  # _confidence_to_score('Medium')
+    }
+
+    def _sentiment_row(self, symbol: str, sentiment_data: dict) -> tuple:
+        """
+        Build (sql, params, content hash, cache_hours, cache_expiry) for the
+        sentiment upsert. cache_expiry is left out of the hash, so an
+        unchanged refresh only rewrites the row once the stored one expired.
+        """
+        now = datetime.now()
+
+        # Determine sentiment cache TTL (shorter than fundamentals)
+        cache_hours = self._get_sentiment_cache_ttl(sentiment_data.get('confidence_level', 'Medium'))
+        cache_expiry = now + timedelta(hours=cache_hours)
+
+        drivers = sentiment_data.get('key_sentiment_drivers')
+        sources = sentiment_data.get('data_sources')
+        confidence_level = sentiment_data.get('confidence_level')
+        values = {
+            # Sentiment data
+            'sentiment_score': sentiment_data.get('sentiment_score'),
+            'news_sentiment_1w': sentiment_data.get('news_sentiment_1w'),
+            'news_sentiment_1m': sentiment_data.get('news_sentiment_1m'),
+            'social_sentiment': sentiment_data.get('social_sentiment'),
+            'analyst_sentiment': sentiment_data.get('analyst_sentiment'),
+            'sentiment_trend': sentiment_data.get('sentiment_trend'),
+            'key_sentiment_drivers': json.dumps(drivers) if drivers is not None else None,
+            # Meta data
+            'confidence_score': self._confidence_to_score(confidence_level) if confidence_level else None,
+            'data_sources': json.dumps(sources) if sources is not None else None,
+            'cache_expiry': cache_expiry.isoformat()
+        }
+        sql, row, digest = self._column_mapper.upsert(
+            (symbol, now.date(), 'sentiment'), values, expiry_column='cache_expiry', now=now.isoformat(),
+            defaults=self._SENTIMENT_DEFAULTS
+        )
+        return sql, row, digest, cache_hours, cache_expiry
+
+    def _sentiment_stored_status(self, symbol: str, sentiment_data: dict, cache_hours: int, cache_expiry: datetime) -> dict:
+        """Success payload returned by the sentiment store paths."""
+        return {
+            'status': 'success',
+            'symbol': symbol,
+            'analysis_type': 'sentiment',
+            'cache_strategy': f'{cache_hours}h TTL',
+            'cache_expiry': cache_expiry.isoformat(),
+            'confidence_level': sentiment_data.get('confidence_level'),
+            'sentiment_score': sentiment_data.get('sentiment_score'),
+            'stored_at': datetime.now().isoformat()
+        }
+
     def _get_sentiment_cache_ttl(self, confidence_level: str) -> int:
         """
         Get cache TTL hours based on sentiment confidence level.
@@ -952,6 +1539,7 @@ class UnifiedAnalyticsDB:
         mapping = {'High': 90, 'Medium': 70, 'Low': 50}
         return mapping.get(confidence_level, 70)
 
+    @instrumented('db')
     async def get_cached_sentiment(self, symbol: str) -> dict:
         """
         Retrieve cached sentiment analysis if still valid.
@@ -962,29 +1550,42 @@ class UnifiedAnalyticsDB:
         Returns:
             dict: Cached sentiment data or None if expired/missing
         """
+        cached = self._cached_read(('sentiment', symbol))
+        if cached is None:
+            cached = await self._run_read(self._load_cached_sentiment, symbol)
+        return self._note_access(('sentiment', symbol), cached)
+
+    def _load_cached_sentiment(self, symbol: str, include_expired: bool = False) -> dict:
+        """
+        Read a valid sentiment row from the database and populate the read cache.
+
+        With include_expired=True the newest row is returned even if expired,
+        as status 'stale' (used to serve callers while a refresh runs).
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connections.connection()
             cursor = conn.cursor()
             
             now = datetime.now()
+            expiry_clause = '' if include_expired else 'AND cache_expiry > ?'
+            params = (symbol,) if include_expired else (symbol, now.isoformat())
             
-            cursor.execute('''
+            cursor.execute(f'''
             SELECT sentiment_score, news_sentiment_1w, news_sentiment_1m,
                    social_sentiment, analyst_sentiment, sentiment_trend,
                    key_sentiment_drivers, confidence_score, analysis_date,
                    cache_expiry
             FROM stock_analysis 
             WHERE symbol = ? AND analysis_type = 'sentiment'
-            AND cache_expiry > ?
+            {expiry_clause}
             ORDER BY analysis_date DESC
             LIMIT 1
-            ''', (symbol, now.isoformat()))
+            ''', params)
             
             result = cursor.fetchone()
-            conn.close()
             
             if result:
-                return {
+                payload = {
                     'status': 'cache_hit',
                     'symbol': symbol,
                     'sentiment_score': result[0],
@@ -996,79 +1597,258 @@ class UnifiedAnalyticsDB:
                     'key_sentiment_drivers': json.loads(result[6] or '[]'),
                     'confidence_score': result[7],
                     'analysis_date': result[8],
-                    'cache_expiry': result[9],
-                    'cache_age_hours': (now - datetime.fromisoformat(result[8])).total_seconds() / 3600
+                    'cache_expiry': result[9]
                 }
+                if result[9] and result[9] > now.isoformat():
+                    return self._cache_payload(('sentiment', symbol), payload, result[8], result[9])
+                payload.update({'status': 'stale', 'stale': True})
+                return self._from_cache_entry((payload, datetime.fromisoformat(result[8])))
             else:
                 return {'status': 'cache_miss', 'symbol': symbol}
 
         except Exception as e:
             return {'status': 'error', 'error': str(e), 'symbol': symbol}
 
-    def _is_us_market_holiday(self, check_date: datetime.date = None) -> bool:
+    @instrumented('db')
+    async def get_or_refresh_sentiment(self, symbol: str,
+                                       compute: Callable[[], Awaitable[dict]],
+                                       serve_stale: bool = True,
+                                       stale_while_revalidate: bool = True,
+                                       max_stale_seconds: float = 6 * 3600,
+                                       lease_seconds: float = 600.0,
+                                       wait_timeout: float = 900.0) -> dict:
         """
-        Check if a given date is a US market holiday or weekend.
+        Return valid cached sentiment, recomputing it at most once across callers.
+
+        On a cache miss exactly one caller (across all processes sharing this
+        database) awaits compute() and stores its result through
+        store_sentiment_analysis(). With stale_while_revalidate, an expired
+        row younger than max_stale_seconds is returned immediately (status
+        'stale', stale=True) and the refresh runs in the background. Without
+        it, concurrent callers wait for the refresh, or get the stale row
+        when serve_stale is set.
 
         Args:
-            check_date: Date to check (defaults to today)
+            symbol: Stock symbol
+            compute: Async callable returning sentiment_data for store_sentiment_analysis()
+            serve_stale: Hand the expired row to callers that are not recomputing
+            stale_while_revalidate: Serve the expired row to every caller and refresh in the background
+            max_stale_seconds: Expired rows older than this are never served
+            lease_seconds: Cross-process lease period, renewed while compute() runs
+            wait_timeout: Longest a caller waits for another caller's refresh
 
         Returns:
-            bool: True if holiday/weekend, False if trading day
+            dict: Same shape as get_cached_sentiment()
         """
-        if check_date is None:
-            check_date = datetime.now().date()
+        return await self._coalesced_refresh(
+            ('sentiment', symbol), compute, serve_stale, stale_while_revalidate,
+            max_stale_seconds, lease_seconds, wait_timeout
+        )
 
-        # Check if weekend
-        if check_date.weekday() >= 5:  # Saturday = 5, Sunday = 6
-            return True
+    @instrumented('db')
+    async def get_or_refresh_market_pulse(self, compute: Callable[[], Awaitable[dict]],
+                                          serve_stale: bool = True,
+                                          stale_while_revalidate: bool = True,
+                                          max_stale_seconds: float = 6 * 3600,
+                                          lease_seconds: float = 600.0,
+                                          wait_timeout: float = 900.0) -> dict:
+        """
+        Market-pulse counterpart of get_or_refresh_sentiment().
 
-        # US Market Holidays (2024-2026 - can be extended)
-        us_holidays = [
-            # 2024
-            (2024, 1, 1),   # New Year's Day
-            (2024, 1, 15),  # MLK Day
-            (2024, 2, 19),  # Presidents' Day
-            (2024, 3, 29),  # Good Friday
-            (2024, 5, 27),  # Memorial Day
-            (2024, 6, 19),  # Juneteenth
-            (2024, 7, 4),   # Independence Day
-            (2024, 9, 2),   # Labor Day
-            (2024, 11, 28), # Thanksgiving
-            (2024, 12, 25), # Christmas
-
-            # 2025
-            (2025, 1, 1),   # New Year's Day
-            (2025, 1, 20),  # MLK Day
-            (2025, 2, 17),  # Presidents' Day
-            (2025, 4, 18),  # Good Friday
-            (2025, 5, 26),  # Memorial Day
-            (2025, 6, 19),  # Juneteenth
-            (2025, 7, 4),   # Independence Day
-            (2025, 9, 1),   # Labor Day
-            (2025, 11, 27), # Thanksgiving
-            (2025, 12, 25), # Christmas
-
-            # 2026
-            (2026, 1, 1),   # New Year's Day
-            (2026, 1, 19),  # MLK Day
-            (2026, 2, 16),  # Presidents' Day
-            (2026, 4, 3),   # Good Friday
-            (2026, 5, 25),  # Memorial Day
-            (2026, 6, 19),  # Juneteenth
-            (2026, 7, 3),   # Independence Day (observed)
-            (2026, 9, 7),   # Labor Day
-            (2026, 11, 26), # Thanksgiving
-            (2026, 12, 25), # Christmas
-        ]
+        compute() returns pulse_data for store_market_pulse_analysis().
+        """
+        return await self._coalesced_refresh(
+            ('market_pulse', None), compute, serve_stale, stale_while_revalidate,
+            max_stale_seconds, lease_seconds, wait_timeout
+        )
+
+    def _cache_loader(self, key: tuple) -> Callable[..., dict]:
+        """Blocking database loader (include_expired=False) for a cache-check key."""
+        analysis_type, symbol = key
+        if analysis_type == 'sentiment':
+            return lambda include_expired=False: self._load_cached_sentiment(symbol, include_expired)
+        if analysis_type == 'market_pulse':
+            return self._load_cached_market_pulse
+        raise ValueError(f"No cache-check refresh for analysis type: {analysis_type}")
+
+    def _refresh_ops(self, key: tuple, compute: Callable[[], Awaitable[dict]]):
+        """(fetch, refresh, fetch_stale) coroutine functions for a cache-check key."""
+        analysis_type, symbol = key
+        load = self._cache_loader(key)
+        if analysis_type == 'sentiment':
+            fetch = lambda: self.get_cached_sentiment(symbol)
+            store = lambda data: self.store_sentiment_analysis(symbol, data)
+        else:
+            fetch = self.get_cached_market_pulse
+            store = self.store_market_pulse_analysis
+
+        async def refresh():
+            stored = await store(await compute())
+            if stored.get('status') != 'success':
+                return stored
+            result = await self._run_read(load)
+            self._access.reset(key, result.get('cache_expiry'))
+            return result
+
+        async def fetch_stale():
+            return await self._run_read(load, True)
+
+        return fetch, refresh, fetch_stale
+
+    def _flights(self):
+        """Lazily created single-flight coordinator (keeps asyncio off the cache-check import path)."""
+        if self._single_flight is None:
+            try:
+                from .single_flight import SingleFlight, SQLiteLease
+            except ImportError:
+                from single_flight import SingleFlight, SQLiteLease
+            self._single_flight = SingleFlight(SQLiteLease(self._connections), self._run_write)
+        return self._single_flight
+
+    @staticmethod
+    def _lease_key(key: tuple) -> tuple:
+        # refresh_leases.symbol is NOT NULL; market-wide analyses use ''
+        return (key[0], key[1] or '')
+
+    async def _coalesced_refresh(self, key: tuple, compute, serve_stale: bool,
+                                 stale_while_revalidate: bool, max_stale_seconds: float,
+                                 lease_seconds: float, wait_timeout: float) -> dict:
+        """Shared single-flight / stale-while-revalidate path behind the get_or_refresh_* methods."""
+        fetch, refresh, fetch_stale = self._refresh_ops(key, compute)
+        cached = await fetch()
+        if cached.get('status') == 'cache_hit':
+            return cached
+
+        stale = None
+        if serve_stale or stale_while_revalidate:
+            candidate = await fetch_stale()
+            expiry = candidate.get('cache_expiry')
+            if (candidate.get('status') == 'stale' and expiry and
+                    (datetime.now() - datetime.fromisoformat(expiry)).total_seconds() <= max_stale_seconds):
+                stale = candidate
+
+        flights = self._flights()
+        lease_key = self._lease_key(key)
+        if stale is not None and stale_while_revalidate:
+            self._spawn_background(flights.run(lease_key, fetch, refresh, None, lease_seconds, wait_timeout))
+            return stale
+
+        return await flights.run(lease_key, fetch, refresh, stale if serve_stale else None,
+                                 lease_seconds, wait_timeout)
+
+    def _spawn_background(self, coro) -> None:
+        """Run a refresh detached from the caller, keeping a reference until it finishes."""
+        import asyncio
+
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+
+        def done(t):
+            self._background_tasks.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                print(f"Background refresh failed: {t.exception()}")
+
+        task.add_done_callback(done)
+
+    async def wait_for_background_refreshes(self) -> None:
+        """Await refreshes started by stale-while-revalidate or the pre-warm scheduler."""
+        import asyncio
+
+        while self._background_tasks:
+            await asyncio.gather(*list(self._background_tasks), return_exceptions=True)
+
+    def register_refresher(self, analysis_type: str,
+                           compute_factory: Callable[[Optional[str]], Awaitable[dict]]) -> None:
+        """
+        Register how to recompute an analysis for the pre-warm scheduler.
+
+        compute_factory(symbol) returns an awaitable of the data the matching
+        store_* method takes (symbol is None for market_pulse).
+        """
+        if analysis_type not in ('sentiment', 'market_pulse'):
+            raise ValueError(f"No cache-check refresh for analysis type: {analysis_type}")
+        self._refreshers[analysis_type] = compute_factory
+
+    async def prewarm(self, key: tuple, lead_seconds: float = 300.0,
+                      lease_seconds: float = 600.0, wait_timeout: float = 900.0) -> dict:
+        """
+        Refresh one cache-check entry if it expires within lead_seconds.
+
+        Goes through the same single-flight lease as get_or_refresh_*, so
+        concurrent pre-warmers (or a request-driven refresh) never duplicate work.
+        The result carries refreshed=True only when this call recomputed it.
+        """
+        analysis_type, symbol = key
+        factory = self._refreshers[analysis_type]
+        _, recompute, _ = self._refresh_ops(key, lambda: factory(symbol))
+        load = self._cache_loader(key)
+        recomputed = False
+
+        async def refresh():
+            nonlocal recomputed
+            recomputed = True
+            return await recompute()
+
+        async def fetch_fresh_enough():
+            cached = await self._run_read(load)
+            expiry = cached.get('cache_expiry')
+            if (cached.get('status') == 'cache_hit' and expiry and
+                    (datetime.fromisoformat(expiry) - datetime.now()).total_seconds() > lead_seconds):
+                return cached
+            return {'status': 'cache_miss'}
 
-        # Check if date is in holidays list
-        date_tuple = (check_date.year, check_date.month, check_date.day)
-        return date_tuple in us_holidays
+        result = await self._flights().run(self._lease_key(key), fetch_fresh_enough, refresh, None,
+                                           lease_seconds, wait_timeout)
+        # False when the entry was still fresh or another caller refreshed it
+        return {**result, 'refreshed': recomputed}
 
+    def prewarm_candidates(self) -> Dict[tuple, Tuple[int, Optional[str]]]:
+        """
+        key -> (cache-check hits since the key was last refreshed, last seen
+        cache_expiry) for entries with a registered refresher.
+        """
+        return {
+            key: entry for key, entry in self._access.snapshot().items()
+            if key[0] in self._refreshers
+        }
+
+    def start_prewarm(self, lead_seconds: float = 300.0, interval_seconds: float = 60.0,
+                      max_concurrent: int = 2, max_per_pass: int = 20, max_overdue_seconds: float = 600.0):
+        """
+        Start the pre-warm scheduler on the running event loop and return it.
+
+        Every interval_seconds it refreshes registered entries that were read
+        since their last refresh and expire within lead_seconds (or expired
+        less than max_overdue_seconds ago), most-accessed first. Stop with
+        `await scheduler.stop()`.
+        """
+        try:
+            from .prewarm import PrewarmScheduler
+        except ImportError:
+            from prewarm import PrewarmScheduler
+        scheduler = PrewarmScheduler(self, lead_seconds, interval_seconds, max_concurrent, max_per_pass,
+                                     max_overdue_seconds)
+        scheduler.start()
+        return scheduler
+
+    def _is_us_market_holiday(self, check_date: datetime.date = None) -> bool:
+        """
+        Check if a given date is a US market holiday or weekend.
+        
+        Args:
+            check_date: Date to check (defaults to today)
+            
+        Returns:
+            bool: True if holiday/weekend, False if trading day
+        """
+        if check_date is None:
+            check_date = datetime.now().date()
+        return not get_trading_calendar().is_trading_day(check_date)
+    
     def _get_market_pulse_cache_ttl(self) -> tuple[int, bool]:
         """
         Get cache TTL hours for market pulse based on market status.
-
+        
         Returns:
             tuple: (cache_hours, is_holiday)
                 - 1 hour on trading days
@@ -1076,24 +1856,19 @@ class UnifiedAnalyticsDB:
         """
         now = datetime.now()
         current_date = now.date()
-
-        is_holiday = self._is_us_market_holiday(current_date)
-
-        if is_holiday:
-            # On holidays/weekends, cache until next trading day
-            # Find next trading day
-            next_trading_day = current_date + timedelta(days=1)
-            while self._is_us_market_holiday(next_trading_day):
-                next_trading_day += timedelta(days=1)
-
-            # Set cache to expire at 9:30 AM ET on next trading day
-            next_expiry = datetime.combine(next_trading_day, datetime.min.time()) + timedelta(hours=9, minutes=30)
-            hours_until_next_trading = (next_expiry - now).total_seconds() / 3600
-            return (int(hours_until_next_trading), True)
-        else:
+        calendar = get_trading_calendar()
+        
+        if calendar.is_trading_day(current_date):
             # Trading day: 1 hour cache
             return (1, False)
-
+        
+        # On holidays/weekends, cache until 9:30 AM ET on the next trading day
+        next_trading_day = calendar.next_trading_day(current_date)
+        next_expiry = datetime.combine(next_trading_day, datetime.min.time()) + timedelta(hours=9, minutes=30)
+        hours_until_next_trading = (next_expiry - now).total_seconds() / 3600
+        return (int(hours_until_next_trading), True)
+    
+    @instrumented('db')
     async def store_market_pulse_analysis(self, pulse_data: dict) -> dict:
         """
         Store market pulse analysis with holiday-aware caching.
@@ -1123,54 +1898,57 @@ class UnifiedAnalyticsDB:
         Returns:
             dict: Storage status and cache info
         """
+        return await self._run_write(self._store_market_pulse_analysis_sync, pulse_data)
+
+    def _store_market_pulse_analysis_sync(self, pulse_data: dict) -> dict:
+        """Blocking body of store_market_pulse_analysis()."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            with self._connections.transaction() as conn:
+                cursor = conn.cursor()
 
-            now = datetime.now()
-            today = now.date()
-
-            # Determine cache TTL based on holiday status
-            cache_hours, is_holiday = self._get_market_pulse_cache_ttl()
-            cache_expiry = now + timedelta(hours=cache_hours)
-
-            # Extract market pulse data
-            market_pulse = pulse_data.get('market_pulse', {})
-
-            # Store in market pulse table
-            cursor.execute('''
-            INSERT OR REPLACE INTO market_pulse_analysis (
-                analysis_date, analysis_timestamp,
-                spy_price, spy_change, vix, vix_change,
-                top_sector, top_sector_change, worst_sector, worst_sector_change,
-                treasury_10y, treasury_2y, advance_decline,
-                sentiment, summary, news_json,
-                market_pulse_score, cache_expiry, is_holiday, cache_ttl_hours
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                today, now.isoformat(),
-                market_pulse.get('spy_price'),
-                market_pulse.get('spy_change'),
-                market_pulse.get('vix'),
-                market_pulse.get('vix_change'),
-                market_pulse.get('top_sector'),
-                market_pulse.get('top_sector_change'),
-                market_pulse.get('worst_sector'),
-                market_pulse.get('worst_sector_change'),
-                market_pulse.get('treasury_10y'),
-                market_pulse.get('treasury_2y'),
-                market_pulse.get('advance_decline'),
-                market_pulse.get('sentiment'),
-                market_pulse.get('summary'),
-                json.dumps(market_pulse.get('news', [])),
-                pulse_data.get('market_pulse_score'),
-                cache_expiry.isoformat(),
-                is_holiday,
-                cache_hours
-            ))
-
-            conn.commit()
-            conn.close()
+                now = datetime.now()
+                today = now.date()
+
+                # Determine cache TTL based on holiday status
+                cache_hours, is_holiday = self._get_market_pulse_cache_ttl()
+                cache_expiry = now + timedelta(hours=cache_hours)
+
+                # Extract market pulse data
+                market_pulse = pulse_data.get('market_pulse', {})
+
+                # Store in market pulse table
+                cursor.execute('''
+                INSERT OR REPLACE INTO market_pulse_analysis (
+                    analysis_date, analysis_timestamp,
+                    spy_price, spy_change, vix, vix_change,
+                    top_sector, top_sector_change, worst_sector, worst_sector_change,
+                    treasury_10y, treasury_2y, advance_decline,
+                    sentiment, summary, news_json,
+                    market_pulse_score, cache_expiry, is_holiday, cache_ttl_hours
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    today, now.isoformat(),
+                    market_pulse.get('spy_price'),
+                    market_pulse.get('spy_change'),
+                    market_pulse.get('vix'),
+                    market_pulse.get('vix_change'),
+                    market_pulse.get('top_sector'),
+                    market_pulse.get('top_sector_change'),
+                    market_pulse.get('worst_sector'),
+                    market_pulse.get('worst_sector_change'),
+                    market_pulse.get('treasury_10y'),
+                    market_pulse.get('treasury_2y'),
+                    market_pulse.get('advance_decline'),
+                    market_pulse.get('sentiment'),
+                    market_pulse.get('summary'),
+                    json.dumps(market_pulse.get('news', [])),
+                    pulse_data.get('market_pulse_score'),
+                    cache_expiry.isoformat(),
+                    is_holiday,
+                    cache_hours
+                ))
+
+            self._invalidate_cached_reads('market_pulse')
 
             return {
                 'status': 'success',
@@ -1189,6 +1967,7 @@ class UnifiedAnalyticsDB:
                 'analysis_date': pulse_data.get('analysis_date')
             }
 
+    @instrumented('db')
     async def get_cached_market_pulse(self) -> dict:
         """
         Retrieve cached market pulse analysis if still valid.
@@ -1196,13 +1975,27 @@ class UnifiedAnalyticsDB:
         Returns:
             dict: Cached market pulse data or cache_miss if expired/missing
         """
+        cached = self._cached_read(('market_pulse', None))
+        if cached is None:
+            cached = await self._run_read(self._load_cached_market_pulse)
+        return self._note_access(('market_pulse', None), cached)
+
+    def _load_cached_market_pulse(self, include_expired: bool = False) -> dict:
+        """
+        Read the newest valid market pulse row and populate the read cache.
+
+        With include_expired=True the newest row is returned even if expired,
+        as status 'stale'.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connections.connection()
             cursor = conn.cursor()
 
             now = datetime.now()
+            expiry_clause = '' if include_expired else 'WHERE cache_expiry > ?'
+            params = () if include_expired else (now.isoformat(),)
 
-            cursor.execute('''
+            cursor.execute(f'''
             SELECT analysis_date, analysis_timestamp,
                    spy_price, spy_change, vix, vix_change,
                    top_sector, top_sector_change, worst_sector, worst_sector_change,
@@ -1210,18 +2003,17 @@ class UnifiedAnalyticsDB:
                    sentiment, summary, news_json,
                    market_pulse_score, cache_expiry, is_holiday, cache_ttl_hours
             FROM market_pulse_analysis
-            WHERE cache_expiry > ?
+            {expiry_clause}
             ORDER BY analysis_timestamp DESC
             LIMIT 1
-            ''', (now.isoformat(),))
+            ''', params)
 
             result = cursor.fetchone()
-            conn.close()
 
             if result:
                 news_data = json.loads(result[15] or '[]')
 
-                return {
+                payload = {
                     'status': 'cache_hit',
                     'analysis_date': result[0],
                     'market_pulse': {
@@ -1243,11 +2035,48 @@ class UnifiedAnalyticsDB:
                     'market_pulse_score': result[16],
                     'cache_expiry': result[17],
                     'is_holiday': bool(result[18]),
-                    'cache_ttl_hours': result[19],
-                    'cache_age_hours': (now - datetime.fromisoformat(result[1])).total_seconds() / 3600
+                    'cache_ttl_hours': result[19]
                 }
+                if result[17] > now.isoformat():
+                    return self._cache_payload(('market_pulse', None), payload, result[1], result[17])
+                payload.update({'status': 'stale', 'stale': True})
+                return self._from_cache_entry((payload, datetime.fromisoformat(result[1])))
             else:
                 return {'status': 'cache_miss'}
 
         except Exception as e:
-            return {'status': 'error', 'error': str(e)}
\ No newline at end of file
+            return {'status': 'error', 'error': str(e)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Unified analytics database maintenance")
+    parser.add_argument("command", choices=["rebuild-latest", "screening-indexes", "export-columnar", "composite-scores", "migrate-legacy", "compact-agent-results"], help="Maintenance task to run")
+    parser.add_argument("--db", dest="db_path", default=None, help="Database path (default: data/unified_analytics.db)")
+    parser.add_argument("--format", dest="fmt", choices=["arrow", "parquet"], default="arrow", help="Columnar export format")
+    parser.add_argument("--full", action="store_true", help="Rewrite every columnar partition")
+    parser.add_argument("--legacy-db", default="fundamental_analyses.db", help="Legacy database for migrate-legacy")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per migration batch")
+    parser.add_argument("--restart", action="store_true", help="Ignore the migration checkpoint and start over")
+    parser.add_argument("--keep-latest", type=int, default=None, help="Agent results kept per symbol and agent type")
+    parser.add_argument("--archive", dest="archive_path", default=None, help="SQLite file for archived agent results")
+    parser.add_argument("--dry-run", action="store_true", help="Report what compact-agent-results would archive")
+    parser.add_argument("--incremental", action="store_true", help="Only rescore symbols whose analyses changed")
+    args = parser.parse_args()
+
+    db = UnifiedAnalyticsDB(args.db_path)
+    if args.command == "rebuild-latest":
+        print(json.dumps(db._rebuild_latest_snapshot_sync(), indent=2))
+    elif args.command == "screening-indexes":
+        print(json.dumps(db._create_screening_indexes_sync(), indent=2))
+    elif args.command == "export-columnar":
+        print(json.dumps(db._export_columnar_sync(fmt=args.fmt, full=args.full), indent=2))
+    elif args.command == "composite-scores":
+        print(json.dumps(db._compute_composite_scores_sync(incremental=args.incremental), indent=2))
+    elif args.command == "migrate-legacy":
+        print(json.dumps(db._migrate_fundamental_analyses_sync(args.legacy_db, args.batch_size, args.restart), indent=2))
+    elif args.command == "compact-agent-results":
+        policies = {'*': {'keep_latest': args.keep_latest}} if args.keep_latest is not None else None
+        print(json.dumps(db._compact_agent_results_sync(policies, args.archive_path, args.dry_run), indent=2))
+    db.close()
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+from unified_analytics_db import UnifiedAnalyticsDB  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = UnifiedAnalyticsDB(str(tmp_path / 'analytics.db'))
+    yield database
+    database.close()
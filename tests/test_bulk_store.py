@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from unified_analytics_db import UnifiedAnalyticsDB
+
+NORMALIZED = [
+    ('AAA', {'analysis_type': 'fundamental', 'roe': 0.3, 'pe_ratio': 20.0, 'sector': 'Technology'}),
+    ('BBB', {'analysis_type': 'technical', 'rsi_14': 55.0, 'technical_signal': 'BUY'}),
+    ('AAA', {'analysis_type': 'fundamental', 'roe': 0.35}),  # merges into the first row
+    ('CCC', {'analysis_type': 'fundamental', 'roe': 0.1, 'analysis_date': '2024-03-01'}),
+]
+SENTIMENT = [
+    ('AAA', {'sentiment_score': 65.0, 'confidence_level': 'High', 'key_sentiment_drivers': ['earnings']}),
+    ('BBB', {'sentiment_score': 40.0, 'confidence_level': 'Low'}),
+]
+
+
+def _rows(db, table, order_by):
+    rows = asyncio.run(db.query_records(f'SELECT * FROM {table} ORDER BY {order_by}'))
+    # Wall-clock columns differ between the two databases
+    return [{k: v for k, v in row.items() if not k.endswith('_at') and k != 'cache_expiry'} for row in rows]
+
+
+@pytest.fixture
+def other_db(tmp_path):
+    database = UnifiedAnalyticsDB(str(tmp_path / 'other.db'))
+    yield database
+    database.close()
+
+
+def test_bulk_stores_write_the_same_rows_as_single_stores(db, other_db):
+    async def single():
+        for symbol, data in NORMALIZED:
+            assert await db.store_normalized_analysis(symbol, data)
+        for symbol, data in SENTIMENT:
+            assert (await db.store_sentiment_analysis(symbol, data))['status'] == 'success'
+        await db.store_agent_result('AAA', 'technical', {'signal': 'BUY'}, 12)
+
+    async def bulk():
+        assert (await other_db.store_normalized_many(NORMALIZED, chunk_size=2))['stored'] == 4
+        assert (await other_db.store_sentiment_many(SENTIMENT))['stored'] == 2
+        assert (await other_db.store_agent_results_many([('AAA', 'technical', {'signal': 'BUY'}, 12)]))['stored'] == 1
+
+    asyncio.run(single())
+    asyncio.run(bulk())
+    for table, order_by in [('stock_analysis', 'symbol, analysis_type, analysis_date'),
+                            ('stock_analysis_latest', 'symbol, analysis_type'),
+                            ('agent_results', 'symbol, agent_type')]:
+        assert _rows(db, table, order_by) == _rows(other_db, table, order_by), table
+
+
+def test_bad_items_fail_alone(db):
+    items = [('AAA', {'roe': 0.3}), ('BAD', None), ('BBB', {'roe': 0.2})]
+    result = asyncio.run(db.store_normalized_many(items, chunk_size=3))
+    assert (result['status'], result['stored'], result['failed']) == ('partial', 2, 1)
+    assert [r['status'] for r in result['results']] == ['success', 'error', 'success']
+    symbols = asyncio.run(db.query_records('SELECT symbol FROM stock_analysis ORDER BY symbol'))
+    assert [row['symbol'] for row in symbols] == ['AAA', 'BBB']
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from column_mapping import normalized_mapper
+
+
+def _store(db, symbol, **values):
+    return asyncio.run(db.store_normalized_analysis(symbol, {'analysis_type': 'fundamental', **values}))
+
+
+def _row(db, symbol, *columns):
+    return asyncio.run(db.query_records(
+        f"SELECT {', '.join(columns)} FROM stock_analysis WHERE symbol = ? AND analysis_type = 'fundamental'",
+        (symbol,)
+    ))[0]
+
+
+def test_merge_keeps_columns_missing_from_later_payload(db):
+    _store(db, 'AAPL', roe=0.3, pe_ratio=25.0, sector='Technology')
+    _store(db, 'AAPL', roe=0.35)
+    assert _row(db, 'AAPL', 'roe', 'pe_ratio', 'sector') == {'roe': 0.35, 'pe_ratio': 25.0, 'sector': 'Technology'}
+
+
+def test_defaults_fill_inserts_but_never_overwrite(db):
+    _store(db, 'AAPL', roe=0.3)
+    assert _row(db, 'AAPL', 'confidence_score', 'data_sources') == {
+        'confidence_score': 80, 'data_sources': '["fundamental_analysis"]'
+    }
+
+    _store(db, 'MSFT', roe=0.3, confidence_score=60, data_sources=['sec_filings'])
+    _store(db, 'MSFT', roe=0.4)
+    assert _row(db, 'MSFT', 'confidence_score', 'data_sources') == {
+        'confidence_score': 60, 'data_sources': '["sec_filings"]'
+    }
+
+
+def test_every_applied_update_bumps_revision(db):
+    _store(db, 'AAPL', roe=0.3)
+    _store(db, 'AAPL', roe=0.3)  # identical payload: skipped
+    assert _row(db, 'AAPL', 'revision') == {'revision': 0}
+
+    _store(db, 'AAPL', roe=0.4)
+    assert _row(db, 'AAPL', 'revision') == {'revision': 1}
+
+    # Updates outside the upsert are caught by the trigger
+    with db._connections.transaction() as conn:
+        conn.execute("UPDATE stock_analysis SET pe_ratio = 20 WHERE symbol = 'AAPL'")
+    assert _row(db, 'AAPL', 'revision') == {'revision': 2}
+
+
+def test_export_detects_a_row_returning_to_an_earlier_payload(db, tmp_path):
+    pytest.importorskip('pyarrow')
+    root = str(tmp_path / 'columnar')
+    _store(db, 'AAPL', pe_ratio=25.0)
+    _store(db, 'AAPL', roe=0.3)
+    asyncio.run(db.export_columnar(root))
+
+    # The last merged payload is roe=0.3 again, but pe_ratio changed in between
+    _store(db, 'AAPL', pe_ratio=30.0)
+    _store(db, 'AAPL', roe=0.3)
+
+    result = asyncio.run(db.export_columnar(root))
+    assert len(result['written']) == 1
+    table = db.columnar_reader(root).read_table('fundamental', columns=['pe_ratio'])
+    assert table.column('pe_ratio').to_pylist() == [30.0]
+
+
+def test_payload_analysis_date_keys_the_row(db):
+    _store(db, 'AAPL', roe=0.3, analysis_date='2024-03-01')
+    _store(db, 'AAPL', roe=0.4)
+    rows = asyncio.run(db.query_records("SELECT analysis_date, roe FROM stock_analysis ORDER BY analysis_date"))
+    assert rows[0] == {'analysis_date': '2024-03-01', 'roe': 0.3}
+    assert len(rows) == 2
+
+
+def test_row_normalizes_nested_and_flat_payloads():
+    mapper = normalized_mapper()
+    row = mapper.row({
+        'financial_health': {'profitability': {'roe_2024': 0.3, 'roa_2024': None}},
+        'roe': 0.9,                                   # flat fallback loses to the nested path
+        'company_profile': {'sector': 'Technology', 'market_cap': 3e12},
+        'earnings_cache_strategy': {'next_earnings_date': '2024-04-25'},
+        'key_sentiment_drivers': ['earnings', 'ai'],
+        'pe_ratio': {'trailing': 30},                 # a sub-object, not a value
+        'unknown_field': 1,
+    })
+    assert row == {
+        'roe': 0.3, 'next_earnings_date': '2024-04-25', 'market_cap': 3e12, 'sector': 'Technology',
+        'cache_expiry': '2024-04-25', 'key_sentiment_drivers': '["earnings", "ai"]',
+    }
+    assert list(row) == [c for c in mapper.columns if c in row]  # mapping order
+
+
+def test_statements_group_payloads_by_column_set():
+    mapper = normalized_mapper()
+    grouped = mapper.statements([
+        (('AAA', '2024-01-02', 'fundamental'), {'roe': 0.1, 'pe_ratio': 10}),
+        (('BBB', '2024-01-02', 'fundamental'), {'pe_ratio': 12, 'roe': 0.2}),
+        (('CCC', '2024-01-02', 'fundamental'), {'roe': 0.3}),
+    ])
+    assert sorted(len(rows) for rows in grouped.values()) == [1, 2]
+    same_columns = next(rows for rows in grouped.values() if len(rows) == 2)
+    assert [params[:5] for params in same_columns] == [
+        ('AAA', '2024-01-02', 'fundamental', 0.1, 10), ('BBB', '2024-01-02', 'fundamental', 0.2, 12)
+    ]
@@ -0,0 +1,56 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+COLUMNS = ['roe', 'pe_ratio', 'sector', 'revision']
+
+
+def _seed(db):
+    items = [(symbol, {'analysis_type': 'fundamental', 'analysis_date': day, 'roe': roe, 'sector': 'Tech'})
+             for symbol, day, roe in [('AAA', '2024-01-10', 0.1), ('BBB', '2024-01-12', 0.2),
+                                      ('AAA', '2024-02-05', 0.3), ('CCC', '2024-02-06', None)]]
+    items.append(('AAA', {'analysis_type': 'technical', 'analysis_date': '2024-02-05', 'rsi_14': 40.0}))
+    assert asyncio.run(db.store_normalized_many(items))['stored'] == 5
+
+
+def _sqlite_rows(db, analysis_type):
+    rows = asyncio.run(db.query_records(
+        f"SELECT symbol, analysis_date, {', '.join(COLUMNS)} FROM stock_analysis "
+        "WHERE analysis_type = ? ORDER BY symbol, analysis_date", (analysis_type,)))
+    return [dict(row, analysis_date=date.fromisoformat(row['analysis_date'])) for row in rows]
+
+
+def _exported_rows(db, root, fmt, analysis_type):
+    table = db.columnar_reader(root, fmt).read_table(analysis_type, columns=COLUMNS)
+    return sorted(table.to_pylist(), key=lambda row: (row['symbol'], row['analysis_date']))
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_export_round_trips_stock_analysis(db, tmp_path, fmt):
+    root = str(tmp_path / 'columnar')
+    _seed(db)
+    result = asyncio.run(db.export_columnar(root, fmt=fmt))
+    assert (result['status'], result['rows_written']) == ('success', 5)
+    assert sorted(result['written']) == ['fundamental/2024-01', 'fundamental/2024-02', 'technical/2024-02']
+    for analysis_type in ('fundamental', 'technical'):
+        assert _exported_rows(db, root, fmt, analysis_type) == _sqlite_rows(db, analysis_type)
+
+
+def test_incremental_sync_rewrites_only_changed_partitions(db, tmp_path):
+    root = str(tmp_path / 'columnar')
+    _seed(db)
+    asyncio.run(db.export_columnar(root))
+    assert asyncio.run(db.export_columnar(root))['written'] == []
+
+    asyncio.run(db.store_normalized_analysis('BBB', {'analysis_type': 'fundamental',
+                                                     'analysis_date': '2024-01-12', 'pe_ratio': 18.0}))
+    with db._connections.transaction() as conn:
+        conn.execute("DELETE FROM stock_analysis WHERE analysis_type = 'technical'")
+
+    result = asyncio.run(db.export_columnar(root))
+    assert (result['written'], result['removed']) == (['fundamental/2024-01'], ['technical/2024-02'])
+    assert _exported_rows(db, root, 'arrow', 'fundamental') == _sqlite_rows(db, 'fundamental')
+    assert db.columnar_reader(root).partition_files('technical') == []
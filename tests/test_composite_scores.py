@@ -0,0 +1,65 @@
+import asyncio
+import sqlite3
+
+
+def _store(db, symbol, roe, grade='B'):
+    return asyncio.run(db.store_normalized_analysis(symbol, {
+        'analysis_type': 'fundamental', 'roe': roe, 'investment_grade': grade, 'market_cap': 5e10,
+    }))
+
+
+def test_incremental_run_after_full_run_scores_nothing(db):
+    for i in range(5):
+        _store(db, f'S{i}', 0.1 * i)
+
+    full = asyncio.run(db.compute_composite_scores())
+    incremental = asyncio.run(db.compute_composite_scores(incremental=True))
+    assert (full['mode'], full['symbols_scored']) == ('full', 5)
+    assert (incremental['mode'], incremental['symbols_scored']) == ('incremental', 0)
+
+
+def test_incremental_run_scores_only_changed_symbols(db):
+    for i in range(5):
+        _store(db, f'S{i}', 0.1 * i)
+    asyncio.run(db.compute_composite_scores())
+
+    _store(db, 'S2', 0.9, grade='A')
+    _store(db, 'S3', 0.1 * 3)  # unchanged content: not rewritten, not rescored
+    result = asyncio.run(db.compute_composite_scores(incremental=True))
+    assert result['symbols_scored'] == 1
+    scores = asyncio.run(db.query_records("SELECT fundamental_score FROM composite_scores WHERE symbol = 'S2'"))
+    assert scores == [{'fundamental_score': 90}]
+
+
+def test_first_incremental_run_on_existing_database_is_full(tmp_path):
+    from unified_analytics_db import UnifiedAnalyticsDB
+
+    path = str(tmp_path / 'legacy.db')
+    db = UnifiedAnalyticsDB(path)
+    _store(db, 'AAA', 0.2)
+    db.close()
+    # A database written before high_water was recorded
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO composite_score_runs (started_at, mode) VALUES (CURRENT_TIMESTAMP, 'full')")
+
+    db = UnifiedAnalyticsDB(path)
+    try:
+        result = asyncio.run(db.compute_composite_scores(incremental=True))
+    finally:
+        db.close()
+    assert (result['mode'], result['symbols_scored']) == ('full', 1)
+
+
+def test_changes_after_snapshot_rebuild_are_rescored(db):
+    for i in range(5):
+        _store(db, f'S{i}', 0.1 * i)
+    for k in range(10):
+        _store(db, 'S0', 0.5 + k / 100)
+    asyncio.run(db.compute_composite_scores())
+
+    assert asyncio.run(db.rebuild_latest_snapshot())['status'] == 'success'
+    _store(db, 'S1', 0.1, grade='A')
+    result = asyncio.run(db.compute_composite_scores(incremental=True))
+    assert result['symbols_scored'] >= 1
+    scores = asyncio.run(db.query_records("SELECT fundamental_score FROM composite_scores WHERE symbol = 'S1'"))
+    assert scores == [{'fundamental_score': 90}]
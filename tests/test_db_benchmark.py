@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SMALL = ['--symbols', '20', '--years', '1', '--interval-days', '30', '--iterations', '3', '--warmup', '1']
+
+
+def _run(*args):
+    return subprocess.run([sys.executable, os.path.join(ROOT, 'benchmarks', 'db_benchmark.py'), *SMALL, *args],
+                          capture_output=True, text=True)
+
+
+def test_benchmark_reports_every_operation_and_flags_regressions(tmp_path):
+    first = _run('--db', str(tmp_path / 'bench.db'))
+    assert first.returncode == 0, first.stderr
+    report = json.loads(first.stdout)
+    assert report['database']['rows'] == 20 * 13 * 5  # symbols x monthly dates x analysis types
+    assert set(report['operations']) >= {'store_normalized_analysis', 'get_cached_sentiment', 'advanced_screening'}
+
+    # A baseline that was impossibly fast makes the reused-database run fail
+    for stats in report['operations'].values():
+        stats['p50_ms'] = 1e-6
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps(report))
+    second = _run('--db', str(tmp_path / 'bench.db'), '--only', 'get_cached_sentiment', '--baseline', str(baseline))
+    assert second.returncode == 1
+    regressions = json.loads(second.stdout)['regressions']
+    assert [(r['operation'], r['metric']) for r in regressions] == [('get_cached_sentiment', 'p50_ms')]
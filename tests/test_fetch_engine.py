@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from big_cap_movers_analysis import (  # noqa: E402
+    FMP_BACKOFF_MAX_SECONDS, FetchEngine, HostRateLimiter, retry_delay
+)
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=None, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = json.dumps(body if body is not None else []).encode()
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f'HTTP {self.status}')
+
+    async def read(self):
+        return self._body
+
+
+class FakeSession:
+    """Serves queued responses in order; delay simulates a slow server."""
+
+    def __init__(self, responses=(), delay=0.0):
+        self.responses = list(responses)
+        self.delay = delay
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        session = self
+
+        class Request:
+            async def __aenter__(self):
+                session.calls.append(url)
+                await asyncio.sleep(session.delay)
+                return session.responses.pop(0) if session.responses else FakeResponse()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Request()
+
+
+def test_rate_limiter_spaces_requests_per_host():
+    async def scenario():
+        limiter = HostRateLimiter(rate_per_sec=20, burst=2)
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire('a.example')
+        limited = time.monotonic() - start
+
+        start = time.monotonic()
+        await limiter.acquire('b.example')  # a separate bucket
+        return limited, time.monotonic() - start
+
+    limited, other_host = asyncio.run(scenario())
+    assert limited >= 0.14  # 2 from the burst, then 3 at 20/s
+    assert other_host < 0.05
+
+
+def test_deadline_cuts_off_slow_and_later_requests():
+    async def scenario():
+        session = FakeSession(delay=1.0)
+        engine = FetchEngine(session, rate_per_sec=0, deadline_seconds=0.1)
+        start = time.monotonic()
+        slow = await engine.fetch_json('stock_market/gainers', use_cache=False)
+        elapsed = time.monotonic() - start
+        late = await engine.fetch_json('stock_market/losers', use_cache=False)
+        return slow, elapsed, late, session.calls
+
+    slow, elapsed, late, calls = asyncio.run(scenario())
+    assert (slow, late) == (None, None)
+    assert elapsed < 0.5
+    assert len(calls) == 1  # the request after the deadline is never sent
+
+
+def test_retry_delay_honours_retry_after():
+    assert retry_delay(0, '3') == 3.0
+    assert retry_delay(0, '-5') == 0.0
+    assert retry_delay(0, '86400') == FMP_BACKOFF_MAX_SECONDS
+    in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 <= retry_delay(0, in_ten_seconds) <= 10
+    # Unparseable headers fall back to jittered backoff
+    assert all(0 <= retry_delay(2, 'soon') <= FMP_BACKOFF_MAX_SECONDS for _ in range(20))
+
+
+def test_only_retryable_statuses_are_retried():
+    async def fetch(responses):
+        session = FakeSession(responses)
+        engine = FetchEngine(session, rate_per_sec=0)
+        return await engine.fetch_json('stock_market/gainers', use_cache=False), len(session.calls)
+
+    throttled = [FakeResponse(429, headers={'Retry-After': '0'}),
+                 FakeResponse(503, headers={'Retry-After': '0'}),
+                 FakeResponse(body=[{'symbol': 'AAA'}])]
+    assert asyncio.run(fetch(throttled)) == ([{'symbol': 'AAA'}], 3)
+    assert asyncio.run(fetch([FakeResponse(404), FakeResponse()])) == (None, 1)
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from instrumentation import get_instrumentation
+
+
+@pytest.fixture
+def metrics():
+    registry = get_instrumentation()
+    registry.reset()
+    registry.enable()
+    yield registry
+    registry.disable()
+    registry.reset()
+
+
+def test_db_methods_record_latency_rows_and_outcome(db, metrics):
+    asyncio.run(db.store_normalized_many([('AAA', {'roe': 0.1}), ('BBB', None)]))
+    asyncio.run(db.query_records('SELECT symbol FROM stock_analysis'))
+
+    snapshot = metrics.snapshot()
+    bulk = snapshot['db:store_normalized_many']
+    assert (bulk['calls'], bulk['rows'], bulk['outcomes']) == (1, 1, {'partial': 1})
+    assert snapshot['db:query_records']['rows'] == 1
+    assert sum(bulk['buckets']) == 1 and bulk['p50_ms'] is not None
+
+    text = metrics.prometheus_text()
+    assert 'fin_agents_latency_ms_count{kind="db",name="query_records"} 1' in text
+    assert 'fin_agents_outcomes_total{kind="db",name="store_normalized_many",outcome="partial"} 1' in text
+
+
+def test_write_metrics_persists_the_snapshot(db, metrics):
+    with metrics.span('fmp', 'profile/{symbol}') as span:
+        span.bytes = 512
+    written = asyncio.run(db.write_metrics(run_id='nightly'))
+    rows = asyncio.run(db.query_records('SELECT run_id, kind, name, calls, bytes FROM instrumentation_metrics'))
+    assert written == len(rows)
+    assert {'run_id': 'nightly', 'kind': 'fmp', 'name': 'profile/{symbol}', 'calls': 1, 'bytes': 512} in rows
+
+
+def test_disabled_registry_records_nothing(db):
+    registry = get_instrumentation()
+    registry.disable()
+    registry.reset()
+    asyncio.run(db.query_records('SELECT 1'))
+    with registry.span('fmp', 'stock_news') as span:
+        span.rows = 3
+    assert registry.snapshot() == {}
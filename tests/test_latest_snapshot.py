@@ -0,0 +1,52 @@
+import asyncio
+
+SNAPSHOT = 'SELECT symbol, analysis_type, analysis_date FROM stock_analysis_latest ORDER BY symbol, analysis_type'
+FROM_HISTORY = '''
+    SELECT symbol, analysis_type, MAX(analysis_date) AS analysis_date FROM stock_analysis
+    GROUP BY symbol, analysis_type ORDER BY symbol, analysis_type
+'''
+
+
+def _store(db, symbol, day, analysis_type='fundamental', **values):
+    return asyncio.run(db.store_normalized_analysis(
+        symbol, {'analysis_type': analysis_type, 'analysis_date': day, **values}))
+
+
+def _query(db, sql):
+    return asyncio.run(db.query_records(sql))
+
+
+def _change_seq(db, symbol):
+    return _query(db, f"SELECT change_seq FROM stock_analysis_latest WHERE symbol = '{symbol}'")[0]['change_seq']
+
+
+def test_snapshot_tracks_the_newest_row_per_symbol_and_type(db):
+    _store(db, 'AAA', '2024-03-05', roe=0.3)
+    _store(db, 'AAA', '2024-03-01', roe=0.1)  # backfilled history
+    _store(db, 'AAA', '2024-03-04', 'technical', rsi_14=60.0)
+    _store(db, 'BBB', '2024-02-01', roe=0.2)
+    _store(db, 'BBB', '2024-02-03', roe=0.25)
+
+    assert _query(db, SNAPSHOT) == _query(db, FROM_HISTORY)
+    assert [row['analysis_date'] for row in _query(db, SNAPSHOT)] == ['2024-03-05', '2024-03-04', '2024-02-03']
+
+    # Screens read the snapshot: the backfilled row never shows up
+    screen = asyncio.run(db.advanced_screening({'analysis_type': 'fundamental', 'sort': ['symbol']}))
+    assert [(row['symbol'], row['roe']) for row in screen['results']] == [('AAA', 0.3), ('BBB', 0.25)]
+
+    before = _query(db, SNAPSHOT)
+    assert asyncio.run(db.rebuild_latest_snapshot()) == {'status': 'success', 'latest_rows': 3}
+    assert _query(db, SNAPSHOT) == before
+
+
+def test_change_seq_moves_only_when_the_latest_row_changes(db):
+    _store(db, 'AAA', '2024-03-05', roe=0.3)
+    _store(db, 'BBB', '2024-03-05', roe=0.2)
+    seq = _change_seq(db, 'AAA')
+
+    _store(db, 'AAA', '2024-03-05', roe=0.3)  # identical payload
+    _store(db, 'AAA', '2024-03-01', roe=0.9)  # older date
+    assert _change_seq(db, 'AAA') == seq
+
+    _store(db, 'AAA', '2024-03-05', roe=0.4)
+    assert _change_seq(db, 'AAA') > _change_seq(db, 'BBB') > seq
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+LIB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+
+CACHE_CHECK = '''
+import asyncio, sys
+from unified_analytics_db import UnifiedAnalyticsDB
+
+async def main():
+    with UnifiedAnalyticsDB(sys.argv[1]) as db:
+        await db.store_sentiment_analysis('AAA', {'sentiment_score': 60.0})
+        await db.get_cached_sentiment('AAA')
+        await db.get_cached_market_pulse()
+        rows = await db.query_records('SELECT symbol FROM stock_analysis')
+    assert rows == [{'symbol': 'AAA'}], rows
+
+asyncio.run(main())
+print(sorted(m for m in ('pandas', 'numpy', 'pyarrow') if m in sys.modules))
+'''
+
+
+def test_cache_check_path_does_not_import_pandas(tmp_path):
+    result = subprocess.run(
+        [sys.executable, '-c', CACHE_CHECK, str(tmp_path / 'analytics.db')],
+        cwd=LIB, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == '[]'
@@ -0,0 +1,32 @@
+import asyncio
+import sqlite3
+
+
+def _legacy_db(path, rows):
+    with sqlite3.connect(path) as conn:
+        conn.execute('CREATE TABLE fundamental_analyses (symbol TEXT, analysis_date TEXT, roe REAL, '
+                     'pe_ratio REAL, investment_grade TEXT, data_source TEXT)')
+        conn.executemany('INSERT INTO fundamental_analyses VALUES (?, ?, ?, ?, ?, ?)', rows)
+    return path
+
+
+def test_migration_merges_rows_like_other_writes(db, tmp_path):
+    legacy = _legacy_db(str(tmp_path / 'fundamental_analyses.db'), [
+        ('AAPL', '2024-01-02', 0.3, None, 'A', 'FMP'),
+        (None, '2024-01-02', 0.1, 10.0, 'B', None),
+    ])
+    # Stored before the migration; the legacy row has no pe_ratio for it
+    with db._connections.transaction() as conn:
+        conn.execute("INSERT INTO stock_analysis (symbol, analysis_date, analysis_type, pe_ratio) "
+                     "VALUES ('AAPL', '2024-01-02', 'fundamental', 28.0)")
+
+    result = asyncio.run(db.migrate_fundamental_analyses_db(legacy))
+    assert (result['migrated_records'], result['skipped_records']) == (1, 1)
+
+    row = asyncio.run(db.query_records("SELECT roe, pe_ratio, data_sources, content_hash, revision FROM stock_analysis"))[0]
+    assert (row['roe'], row['pe_ratio'], row['data_sources']) == (0.3, 28.0, '["FMP"]')
+    assert row['content_hash'] is not None
+
+    # Re-running an unchanged migration does not rewrite the row
+    asyncio.run(db.migrate_fundamental_analyses_db(legacy, restart=True))
+    assert asyncio.run(db.query_records("SELECT revision FROM stock_analysis"))[0]['revision'] == row['revision']
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from metric_history import forward_fill, rolling_mean_std, rolling_slope, rolling_zscore
+
+pd = pytest.importorskip('pandas')
+
+
+def _panel(seed=7, shape=(4, 60), missing=0.15):
+    rng = np.random.default_rng(seed)
+    values = 1000 + np.cumsum(rng.normal(size=shape), axis=1)
+    values[rng.random(shape) < missing] = np.nan
+    return values
+
+
+def test_rolling_mean_std_matches_pandas():
+    values = _panel()
+    mean, std = rolling_mean_std(values, window=10, min_periods=5)
+    frame = pd.DataFrame(values.T).rolling(10, min_periods=5)
+    np.testing.assert_allclose(mean, frame.mean().to_numpy().T, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(std, frame.std().to_numpy().T, rtol=1e-7, equal_nan=True)
+
+
+def test_rolling_zscore_uses_the_preceding_window():
+    values = _panel()
+    frame = pd.DataFrame(values.T).rolling(10, min_periods=5)
+    expected = ((pd.DataFrame(values.T) - frame.mean().shift(1)) / frame.std().shift(1)).to_numpy().T
+    np.testing.assert_allclose(rolling_zscore(values, window=10, min_periods=5), expected,
+                               rtol=1e-6, equal_nan=True)
+
+
+def test_rolling_slope_matches_least_squares_fit():
+    values = _panel(missing=0.0)
+    slope = rolling_slope(values, window=8)
+    for row in range(values.shape[0]):
+        for t in range(7, values.shape[1]):
+            expected = np.polyfit(np.arange(8), values[row, t - 7:t + 1], 1)[0]
+            assert slope[row, t] == pytest.approx(expected, rel=1e-9)
+    assert np.isnan(slope[:, :7]).all()
+
+
+def test_forward_fill_respects_limit():
+    values = np.array([[np.nan, 1.0, np.nan, np.nan, np.nan, 2.0]])
+    np.testing.assert_array_equal(forward_fill(values, limit=2), [[np.nan, 1.0, 1.0, 1.0, np.nan, 2.0]])
+
+
+def _seed_history(db, symbols=('AAA', 'BBB'), days=40):
+    start = date(2024, 1, 15)
+    with db._connections.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO stock_analysis (symbol, analysis_date, analysis_type, sentiment_score) "
+            "VALUES (?, ?, 'sentiment', ?)",
+            [(symbol, (start + timedelta(days=d)).isoformat(), float(d + i * 100))
+             for i, symbol in enumerate(symbols) for d in range(days)]
+        )
+
+
+def test_auto_history_reads_changed_partitions_from_sqlite(db):
+    pytest.importorskip('pyarrow')
+    _seed_history(db)
+    asyncio.run(db.export_columnar())
+    with db._connections.transaction() as conn:
+        conn.execute("UPDATE stock_analysis SET sentiment_score = -1 "
+                     "WHERE symbol = 'AAA' AND analysis_date = '2024-02-10'")
+        conn.execute("DELETE FROM stock_analysis WHERE symbol = 'BBB' AND analysis_date = '2024-02-11'")
+
+    history = asyncio.run(db.get_metric_history(['AAA', 'BBB'], ['sentiment_score']))
+    current = asyncio.run(db.get_metric_history(['AAA', 'BBB'], ['sentiment_score'], source='sqlite'))
+    np.testing.assert_array_equal(history.dates, current.dates)
+    np.testing.assert_array_equal(history['sentiment_score'], current['sentiment_score'])
+    day = int(np.searchsorted(history.dates, np.datetime64('2024-02-10')))
+    assert history.series('AAA', 'sentiment_score')[day] == -1
+    assert np.isnan(history.series('BBB', 'sentiment_score')[day + 1])
+
+    # Only the changed month is stale; January is still served from the export
+    store = db.columnar_reader()
+    with db._connections.transaction(immediate=False) as conn:
+        assert store.verify(conn) == ({'sentiment/2024-01'}, {'sentiment/2024-02'})
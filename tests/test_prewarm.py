@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from prewarm import PrewarmScheduler
+
+SENTIMENT = {'sentiment_score': 61.0, 'confidence_level': 'Low', 'data_sources': ['news']}
+
+
+def _scheduler(db, calls, lead_seconds):
+    async def compute(symbol):
+        calls.append(symbol)
+        return dict(SENTIMENT)
+
+    db.register_refresher('sentiment', compute)
+    return PrewarmScheduler(db, lead_seconds=lead_seconds)
+
+
+def test_refresh_resets_access_count(db):
+    calls = []
+    # Low confidence rows live 2h, so a 3h lead makes the entry due now
+    scheduler = _scheduler(db, calls, lead_seconds=3 * 3600)
+
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', dict(SENTIMENT))
+        await db.get_cached_sentiment('AAA')
+        first = await scheduler.run_once()
+        second = await scheduler.run_once()
+        await db.get_cached_sentiment('AAA')
+        return first, second, scheduler.due()
+
+    first, second, due_after_read = asyncio.run(scenario())
+    assert first == {'due': 1, 'refreshed': 1, 'skipped': 0, 'errors': 0}
+    assert second['due'] == 0
+    assert calls == ['AAA']
+    assert due_after_read == [(('sentiment', 'AAA'), 1)]
+
+
+def test_entries_expired_long_ago_are_not_due(db):
+    scheduler = _scheduler(db, [], lead_seconds=300)
+
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', dict(SENTIMENT))
+        return await db.get_cached_sentiment('AAA')
+
+    expiry = datetime.fromisoformat(asyncio.run(scenario())['cache_expiry'])
+    assert scheduler.due(now=expiry - timedelta(seconds=60))
+    assert scheduler.due(now=expiry + timedelta(seconds=60))
+    assert scheduler.due(now=expiry + timedelta(seconds=scheduler.max_overdue_seconds + 60)) == []
+
+
+def test_fresh_entry_counts_as_skipped(db, monkeypatch):
+    calls = []
+    scheduler = _scheduler(db, calls, lead_seconds=60)
+    monkeypatch.setattr(scheduler, 'due', lambda: [(('sentiment', 'AAA'), 3)])
+
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', dict(SENTIMENT))
+        return await scheduler.run_once()
+
+    assert asyncio.run(scenario()) == {'due': 1, 'refreshed': 0, 'skipped': 1, 'errors': 0}
+    assert calls == []
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import big_cap_movers_analysis as movers  # noqa: E402
+
+
+class FakeEngine:
+    def __init__(self):
+        self.endpoints = []
+
+    async def fetch_json(self, endpoint, params=None, use_cache=True):
+        self.endpoints.append(endpoint)
+        symbols = endpoint.split('/', 1)[1].split(',')
+        return [{'symbol': s, 'mktCap': 200e9 if s != 'SMALL' else 1e9} for s in symbols]
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    cache = movers.FMPResponseCache(str(tmp_path / 'fmp_cache.db'))
+    monkeypatch.setattr(movers, '_response_cache', cache)
+    yield cache
+    cache.close()
+
+
+def test_chunk_symbols():
+    assert movers.chunk_symbols(['A', 'B', 'C', 'D', 'E'], 2) == [['A', 'B'], ['C', 'D'], ['E']]
+    assert movers.chunk_symbols(['A'], 0) == [['A']]
+    assert movers.chunk_symbols([], 2) == []
+
+
+def test_index_profiles_filters_by_market_cap_and_skips_junk():
+    data = [{'symbol': 'AAA', 'mktCap': 150e9}, {'symbol': 'BBB', 'mktCap': 5e9}, {'mktCap': 1e12}, 'oops']
+    assert list(movers._index_profiles(data, 100e9)) == ['AAA']
+    assert movers._index_profiles({'Error Message': 'Limit Reach'}) == {}
+
+
+def test_profiles_are_fetched_in_chunks_and_reused_per_symbol(response_cache):
+    engine = FakeEngine()
+    profiles = asyncio.run(movers.get_company_profiles_async(
+        engine, ['AAA', 'BBB', 'AAA', 'CCC', 'SMALL'], min_market_cap=100e9, batch_size=2))
+    assert sorted(profiles) == ['AAA', 'BBB', 'CCC']
+    assert engine.endpoints == ['profile/AAA,BBB', 'profile/CCC,SMALL']
+
+    # A differently mixed batch only fetches the symbols not seen before
+    engine.endpoints.clear()
+    profiles = asyncio.run(movers.get_company_profiles_async(engine, ['CCC', 'DDD', 'AAA'], batch_size=2))
+    assert sorted(profiles) == ['AAA', 'CCC', 'DDD']
+    assert engine.endpoints == ['profile/DDD']
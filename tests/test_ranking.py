@@ -0,0 +1,68 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ranking import compare, rank_matrix
+
+
+def test_ranks_follow_metric_direction():
+    result = compare(['A', 'B', 'C'], {'roe': [0.1, 0.3, 0.2], 'pe_ratio': [30, 10, 20]}, ['roe', 'pe_ratio'])
+    assert result['scores']['roe']['rank'] == [3, 1, 2]
+    assert result['scores']['pe_ratio']['rank'] == [3, 1, 2]
+    assert result['directions'] == {'roe': 'desc', 'pe_ratio': 'asc'}
+
+
+def test_ties_share_rank_and_missing_values_are_unranked():
+    ranked = rank_matrix(np.array([[1.0], [2.0], [2.0], [np.nan], [3.0]]), ['desc'])
+    assert ranked['rank'][:, 0].tolist() == [4, 2, 2, 0, 1]
+    assert np.isnan(ranked['percentile'][3, 0])
+
+
+def test_direction_overrides_are_case_insensitive():
+    result = compare(['A', 'B'], {'roe': [0.1, 0.3]}, ['roe'], directions={'roe': 'ASC'})
+    assert result['directions'] == {'roe': 'asc'}
+    assert result['scores']['roe']['rank'] == [1, 2]
+
+
+def test_invalid_direction_is_rejected():
+    with pytest.raises(ValueError, match='roe'):
+        compare(['A', 'B'], {'roe': [0.1, 0.3]}, ['roe'], directions={'roe': 'descending'})
+
+
+def test_unparseable_values_are_treated_as_missing():
+    result = compare(['A', 'B', 'C'], {'roe': [0.1, 'n/a', '0.3']}, ['roe'])
+    assert result['scores']['roe']['rank'] == [2, None, 1]
+
+
+def test_sector_ranks():
+    result = compare(['A', 'B', 'C', 'D'], {'roe': [0.1, 0.2, 0.3, 0.4]}, ['roe'],
+                     sectors=['Tech', 'Energy', 'Tech', 'Energy'])
+    assert result['scores']['roe']['sector_rank'] == [2, 2, 1, 1]
+
+
+def test_comparison_rejects_text_columns(db):
+    asyncio.run(db.store_normalized_analysis('AAA', {'roe': 0.2, 'sector': 'Tech'}))
+    result = asyncio.run(db.get_multi_dimensional_comparison(['AAA'], metrics=['roe', 'sector']))
+    assert result == {'status': 'error', 'error': 'Non-numeric comparison metrics: sector'}
+
+
+def test_comparison_reports_invalid_directions(db):
+    asyncio.run(db.store_normalized_analysis('AAA', {'roe': 0.2}))
+    result = asyncio.run(db.get_multi_dimensional_comparison(['AAA'], metrics=['roe'], directions={'roe': 'up'}))
+    assert result['status'] == 'error'
+
+
+def test_comparison_tolerates_text_in_numeric_columns(db):
+    asyncio.run(db.store_normalized_analysis('AAA', {'roe': 0.2}))
+    asyncio.run(db.store_normalized_analysis('BBB', {'roe': 'unavailable'}))
+    result = asyncio.run(db.get_multi_dimensional_comparison(['AAA', 'BBB'], metrics=['roe']))
+    assert result['scores']['roe']['rank'] == [1, None]
+
+
+def test_comparison_keeps_the_matrix_by_default(db):
+    asyncio.run(db.store_normalized_analysis('AAA', {'roe': 0.2}))
+    result = asyncio.run(db.get_multi_dimensional_comparison(['AAA'], metrics=['roe']))
+    assert [(r['symbol'], r['roe']) for r in result['comparison_matrix']] == [('AAA', 0.2)]
+    assert 'comparison_matrix' not in asyncio.run(
+        db.get_multi_dimensional_comparison(['AAA'], metrics=['roe'], include_matrix=False))
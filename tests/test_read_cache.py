@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from read_cache import ReadThroughCache
+
+
+def _sentiment(score):
+    return {'sentiment_score': score, 'confidence_level': 'High'}
+
+
+def test_entries_expire_and_evict_least_recently_used(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('read_cache.time.time', lambda: now[0])
+    cache = ReadThroughCache(max_entries=2, max_age_seconds=60)
+    cache.set('a', 1)
+    cache.set('b', 2, expires_at=1010.0)
+    assert cache.get('a') == 1
+    cache.set('c', 3)  # evicts 'b', the least recently used
+    assert (cache.get('b'), cache.get('c')) == (None, 3)
+
+    now[0] = 1061.0  # past max_age_seconds
+    assert cache.get('a') is None
+    assert cache.stats()['evictions'] == 1 and cache.stats()['expirations'] == 1
+
+
+def test_store_invalidates_cached_read(db):
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', _sentiment(40.0))
+        first = await db.get_cached_sentiment('AAA')
+        cached = await db.get_cached_sentiment('AAA')
+        await db.store_sentiment_analysis('AAA', _sentiment(70.0))
+        return first, cached, await db.get_cached_sentiment('AAA')
+
+    first, cached, after = asyncio.run(scenario())
+    assert (first['sentiment_score'], cached['sentiment_score'], after['sentiment_score']) == (40.0, 40.0, 70.0)
+    assert db.read_cache_stats()['hits'] >= 1
+
+
+def test_invalidation_waits_for_the_outer_commit(db):
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', _sentiment(40.0))
+        async with db.transaction():
+            await db.store_sentiment_analysis('AAA', _sentiment(70.0))
+            # Another task reads (and caches) the committed row meanwhile
+            during = await asyncio.create_task(db.get_cached_sentiment('AAA'))
+        return during, await db.get_cached_sentiment('AAA')
+
+    during, after = asyncio.run(scenario())
+    assert (during['sentiment_score'], after['sentiment_score']) == (40.0, 70.0)
+
+
+def test_rolled_back_store_keeps_cached_read(db):
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', _sentiment(40.0))
+        await db.get_cached_sentiment('AAA')
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.store_sentiment_analysis('AAA', _sentiment(70.0))
+                raise RuntimeError('abort')
+        return await db.get_cached_sentiment('AAA')
+
+    assert asyncio.run(scenario())['sentiment_score'] == 40.0
+    assert db.read_cache_stats()['invalidations'] == 0
+
+
+def test_reads_inside_a_transaction_are_not_cached(db):
+    async def scenario():
+        await db.store_sentiment_analysis('AAA', _sentiment(40.0))
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.store_sentiment_analysis('AAA', _sentiment(70.0))
+                assert (await db.get_cached_sentiment('AAA'))['sentiment_score'] == 70.0
+                raise RuntimeError('abort')
+        return await db.get_cached_sentiment('AAA')
+
+    assert asyncio.run(scenario())['sentiment_score'] == 40.0
@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import big_cap_movers_analysis as movers  # noqa: E402
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(movers.time, 'time', lambda: now[0])
+    return now
+
+
+def test_entries_expire_per_endpoint_ttl(tmp_path, clock):
+    cache = movers.FMPResponseCache(str(tmp_path / 'cache.db'), ttls={'stock_market': 60, 'profile': 3600})
+    cache.set('stock_market/gainers', {}, [{'symbol': 'AAA'}])
+    cache.set('profile/AAA', {}, [{'symbol': 'AAA'}])
+
+    clock[0] += 61
+    assert cache.get('stock_market/gainers') == (False, None)
+    assert cache.get('profile/AAA') == (True, [{'symbol': 'AAA'}])
+    assert cache.stats['expired'] == 1
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, clock):
+    cache = movers.FMPResponseCache(str(tmp_path / 'cache.db'), max_entries=2)
+    cache.set('profile/AAA', {}, ['a'])
+    clock[0] += 1
+    cache.set('profile/BBB', {}, ['b'])
+    clock[0] += 1
+    assert cache.get('profile/AAA')[0]  # buffered touch makes BBB the oldest
+    clock[0] += 1
+    cache.set('profile/CCC', {}, ['c'])
+
+    assert [cache.get(f'profile/{s}')[0] for s in ('AAA', 'BBB', 'CCC')] == [True, False, True]
+    assert cache.stats['evictions'] == 1
+    cache.close()
+
+
+def test_error_bodies_are_not_cached_and_key_ignores_apikey(tmp_path, clock):
+    cache = movers.FMPResponseCache(str(tmp_path / 'cache.db'))
+    cache.set('profile/AAA', {}, {'Error Message': 'Limit Reach'})
+    assert cache.get('profile/AAA') == (False, None)
+
+    cache.set('stock_news', {'tickers': 'AAA', 'apikey': 'secret'}, [{'title': 'x'}])
+    assert cache.get('stock_news', {'tickers': 'AAA', 'apikey': 'other'}) == (True, [{'title': 'x'}])
+    cache.close()
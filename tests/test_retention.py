@@ -0,0 +1,63 @@
+import asyncio
+import json
+import sqlite3
+
+from retention import decompress
+
+
+def _insert_results(db, dates, symbol='AAPL', agent_type='sentiment'):
+    with db._connections.transaction() as conn:
+        conn.executemany(
+            'INSERT INTO agent_results (symbol, agent_type, analysis_date, raw_result, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(symbol, agent_type, day, json.dumps({'day': day}), f'{day} 12:00:00') for day in dates]
+        )
+
+
+def _kept_dates(db):
+    return [row['analysis_date'] for row in asyncio.run(db.query_records(
+        'SELECT analysis_date FROM agent_results ORDER BY analysis_date'))]
+
+
+def test_weekly_downsampling_keeps_one_row_per_iso_week_across_new_year(db):
+    # Mon 2024-12-30 .. Sun 2025-01-05 is one ISO week (2025-W01)
+    week = ['2024-12-30', '2024-12-31', '2025-01-01', '2025-01-03', '2025-01-05']
+    _insert_results(db, ['2024-12-27'] + week + ['2025-01-20'])
+
+    result = asyncio.run(db.compact_agent_results({'*': {'keep_latest': 1}}, vacuum=False))
+    assert result['rows_archived'] == 4
+    assert _kept_dates(db) == ['2024-12-27', '2025-01-05', '2025-01-20']
+
+
+def test_keep_latest_without_downsampling(db):
+    _insert_results(db, [f'2025-03-{day:02d}' for day in range(1, 11)])
+    asyncio.run(db.compact_agent_results({'*': {'keep_latest': 3, 'downsample': None}}, vacuum=False))
+    assert _kept_dates(db) == ['2025-03-08', '2025-03-09', '2025-03-10']
+
+
+def test_archived_rows_round_trip(db, tmp_path):
+    _insert_results(db, ['2025-03-01', '2025-03-02', '2025-03-03'])
+    archive_path = str(tmp_path / 'archive' / 'agent_results.db')
+
+    result = asyncio.run(db.compact_agent_results({'*': {'keep_latest': 1, 'downsample': None}},
+                                                  archive_path=archive_path))
+    assert result['status'] == 'success'
+    assert result['rows_archived'] == 2
+    assert result['compressed_bytes_archived'] > 0
+
+    with sqlite3.connect(archive_path) as conn:
+        archived = conn.execute(
+            'SELECT analysis_date, codec, raw_size, raw_result FROM agent_results_archive ORDER BY analysis_date'
+        ).fetchall()
+    assert [json.loads(decompress(codec, payload)) for _, codec, _, payload in archived] == [
+        {'day': '2025-03-01'}, {'day': '2025-03-02'}
+    ]
+    assert all(size == len(json.dumps({'day': day})) for day, _, size, _ in archived)
+    assert _kept_dates(db) == ['2025-03-03']
+
+
+def test_dry_run_changes_nothing(db):
+    _insert_results(db, ['2025-03-01', '2025-03-02'])
+    result = asyncio.run(db.compact_agent_results({'*': {'keep_latest': 1, 'downsample': None}}, dry_run=True))
+    assert (result['rows_expired'], result['rows_archived']) == (1, 0)
+    assert len(_kept_dates(db)) == 2
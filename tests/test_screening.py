@@ -0,0 +1,49 @@
+import asyncio
+
+
+def test_screen_warnings_are_returned_not_printed(db, capsys):
+    asyncio.run(db.store_normalized_analysis('AAA', {'roe': 0.3, 'pe_ratio': 12}))
+    result = asyncio.run(db.advanced_screening({'min_roe': 0.1}))
+
+    assert [row['symbol'] for row in result['results']] == ['AAA']
+    assert isinstance(result['plan_warnings'], list)
+    assert capsys.readouterr().out == ''
+
+
+def test_query_plan_is_explained_once_per_shape(db, monkeypatch):
+    asyncio.run(db.store_normalized_analysis('AAA', {'roe': 0.3}))
+    engine = db._screening
+    calls = []
+    explain = engine.explain
+
+    def counting_explain(conn, sql, params):
+        calls.append(sql)
+        return explain(conn, sql, params)
+
+    monkeypatch.setattr(engine, 'explain', counting_explain)
+
+    for threshold in (0.1, 0.2, 0.25):
+        asyncio.run(db.advanced_screening({'min_roe': threshold}))
+    assert len(calls) == 1
+
+    asyncio.run(db.create_screening_indexes())
+    asyncio.run(db.advanced_screening({'min_roe': 0.1}))
+    assert len(calls) == 2
+
+
+def test_screen_usage_survives_a_new_process(tmp_path):
+    from unified_analytics_db import UnifiedAnalyticsDB
+
+    path = str(tmp_path / 'analytics.db')
+    with UnifiedAnalyticsDB(path) as first:
+        asyncio.run(first.store_normalized_analysis('AAA', {'roe': 0.3, 'current_ratio': 1.5}))
+        for _ in range(3):
+            asyncio.run(first.advanced_screening({'filters': {'current_ratio': {'min': 1}}, 'sort': ['current_ratio']}))
+
+    # A fresh instance (the screening-indexes command) still sees those runs
+    with UnifiedAnalyticsDB(path) as second:
+        baseline = len(second._screening.recommended_indexes(second._connections.connection(), min_runs=99))
+        result = asyncio.run(second.create_screening_indexes())
+        assert len(result['indexes']) == baseline + 1
+        usage = asyncio.run(second.query_records('SELECT filter_columns, runs FROM screening_usage'))
+    assert usage == [{'filter_columns': '["current_ratio"]', 'runs': 3}]
@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from big_cap_movers_analysis import DEFAULT_SENTIMENT_LEXICON, SentimentScorer  # noqa: E402
+
+
+def _matches(title):
+    scorer = SentimentScorer(DEFAULT_SENTIMENT_LEXICON)
+    return [m.group(1) for m in scorer.pattern.finditer(title.lower())]
+
+
+@pytest.mark.parametrize('title, expected', [
+    ('Shares hit a record high', ['record', 'high']),
+    ('Stock climbs higher, hits highest close', ['high', 'high']),
+    ('Chipmaker gains after upgrade', ['gain', 'upgrade']),
+    ('Revenue misses, shares drop to lowest level', ['miss', 'drop', 'low']),
+    ('Analysts follow up on product highlights', []),
+    ('Shallow trading as fallout spreads', []),
+])
+def test_keywords_match_whole_words_and_inflections(title, expected):
+    assert _matches(title) == expected
+
+
+def test_keyword_counts_once_per_title():
+    scores = SentimentScorer(DEFAULT_SENTIMENT_LEXICON).score_batch({
+        'AAA': [{'title': 'High, higher, highest'}, {'title': 'Profit warning'}],
+        'BBB': [],
+    })
+    assert scores['AAA']['score'] == 50 and scores['AAA']['category'] == 'Neutral'
+    assert scores['BBB']['summary'] == 'No recent news available for sentiment analysis'
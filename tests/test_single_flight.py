@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+import pytest
+
+from single_flight import SQLiteLease
+from unified_analytics_db import UnifiedAnalyticsDB
+
+KEY = ('sentiment', 'AAA')
+SENTIMENT = {'sentiment_score': 55.0, 'confidence_level': 'High', 'data_sources': ['news']}
+
+
+def _slow_compute(calls, seconds=0.2):
+    async def compute():
+        calls.append(time.monotonic())
+        await asyncio.sleep(seconds)
+        return dict(SENTIMENT)
+    return compute
+
+
+def test_lease_is_exclusive_until_expiry(db):
+    lease = SQLiteLease(db._connections)
+    assert lease.acquire(KEY, 'one', 60)
+    assert not lease.acquire(KEY, 'two', 60)
+    assert not lease.renew(KEY, 'two', 60)
+    assert lease.renew(KEY, 'one', 60)
+
+    lease.release(KEY, 'two')  # not the owner: no effect
+    assert not lease.acquire(KEY, 'two', 60)
+    lease.release(KEY, 'one')
+    assert lease.acquire(KEY, 'two', 60)
+
+
+def test_expired_lease_can_be_taken_over(db):
+    lease = SQLiteLease(db._connections)
+    assert lease.acquire(KEY, 'crashed', 0.05)
+    time.sleep(0.1)
+    assert lease.acquire(KEY, 'next', 60)
+    assert not lease.renew(KEY, 'crashed', 60)
+
+
+def test_concurrent_callers_share_one_refresh(db):
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(*(
+            db.get_or_refresh_sentiment('AAA', _slow_compute(calls), serve_stale=False,
+                                        stale_while_revalidate=False)
+            for _ in range(10)
+        ))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert {r['status'] for r in results} == {'cache_hit'}
+    assert {r['sentiment_score'] for r in results} == {55.0}
+
+
+@pytest.mark.parametrize('lease_seconds', [60.0, 0.15])
+def test_processes_sharing_a_database_refresh_once(tmp_path, lease_seconds):
+    # Two instances stand in for two processes; with the short lease the
+    # refresh outlives the first period and must be kept alive by renewals.
+    path = str(tmp_path / 'shared.db')
+    first, second = UnifiedAnalyticsDB(path), UnifiedAnalyticsDB(path)
+    for instance in (first, second):
+        instance._flights().poll_interval = 0.02
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(*(
+            instance.get_or_refresh_sentiment('AAA', _slow_compute(calls, 0.4), serve_stale=False,
+                                              stale_while_revalidate=False, lease_seconds=lease_seconds)
+            for instance in (first, second)
+        ))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        first.close()
+        second.close()
+    assert len(calls) == 1
+    assert [r['status'] for r in results] == ['cache_hit', 'cache_hit']
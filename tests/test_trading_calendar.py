@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+
+from trading_calendar import TradingCalendar, nyse_holidays
+
+NYSE_2024 = {
+    date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19), date(2024, 3, 29), date(2024, 5, 27),
+    date(2024, 6, 19), date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28), date(2024, 12, 25),
+}
+NYSE_2025 = {
+    date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18), date(2025, 5, 26),
+    date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1), date(2025, 11, 27), date(2025, 12, 25),
+}
+
+
+@pytest.fixture(scope='module')
+def calendar():
+    return TradingCalendar(2015, 2030)
+
+
+@pytest.mark.parametrize('year, expected', [(2024, NYSE_2024), (2025, NYSE_2025)])
+def test_published_holiday_schedules(year, expected):
+    assert set(nyse_holidays(year)) == expected
+
+
+@pytest.mark.parametrize('day, name', [
+    (date(2021, 7, 5), 'Independence Day'),    # Sunday -> Monday
+    (date(2021, 12, 24), 'Christmas Day'),     # Saturday -> Friday
+    (date(2022, 6, 20), 'Juneteenth'),         # first year observed, Sunday -> Monday
+    (date(2023, 1, 2), "New Year's Day"),      # Sunday -> Monday
+    (date(2027, 6, 18), 'Juneteenth'),         # Saturday -> Friday
+])
+def test_observed_weekend_holidays(calendar, day, name):
+    assert calendar.holiday_name(day) == name
+    assert not calendar.is_trading_day(day)
+
+
+def test_saturday_new_year_is_not_observed_on_friday(calendar):
+    assert date(2022, 1, 1).weekday() == 5
+    assert calendar.is_trading_day(date(2021, 12, 31))
+
+
+def test_juneteenth_only_from_2022():
+    assert 'Juneteenth' not in nyse_holidays(2021).values()
+
+
+def test_weekends_are_not_holidays(calendar):
+    saturday = date(2024, 6, 15)
+    assert not calendar.is_trading_day(saturday)
+    assert not calendar.is_holiday(saturday)
+
+
+@pytest.mark.parametrize('day, expected', [
+    (date(2024, 3, 28), date(2024, 4, 1)),     # Thursday before Good Friday
+    (date(2024, 7, 3), date(2024, 7, 5)),
+    (date(2024, 12, 31), date(2025, 1, 2)),    # across the year boundary
+    (date(2024, 6, 14), date(2024, 6, 17)),    # Friday -> Monday
+    (date(2024, 6, 15), date(2024, 6, 17)),    # from a weekend
+])
+def test_next_trading_day(calendar, day, expected):
+    assert calendar.next_trading_day(day) == expected
+
+
+def test_previous_trading_day(calendar):
+    assert calendar.previous_trading_day(date(2024, 4, 1)) == date(2024, 3, 28)
+    assert calendar.previous_trading_day(date(2025, 1, 2)) == date(2024, 12, 31)
+
+
+def test_trading_days_between(calendar):
+    # 2024-07-01 .. 2024-07-08: Jul 1-3, 5 (Jul 4 holiday)
+    assert calendar.trading_days_between(date(2024, 7, 1), date(2024, 7, 8)) == 4
+    assert calendar.trading_days_between(date(2024, 7, 8), date(2024, 7, 1)) == -4
+    assert calendar.trading_days_between(date(2024, 7, 1), date(2024, 7, 1)) == 0
+
+
+def test_index_extends_outside_built_range():
+    calendar = TradingCalendar(2020, 2021)
+    assert calendar.holiday_name(date(2040, 12, 25)) == 'Christmas Day'
+    assert calendar.next_trading_day(date(2040, 12, 24)) == date(2040, 12, 26)
+    assert calendar.start_year == 2020 and calendar.end_year >= 2040
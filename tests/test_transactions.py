@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+
+def _symbols(db):
+    return sorted(row['symbol'] for row in asyncio.run(db.query_records('SELECT symbol FROM stock_analysis')))
+
+
+def test_transaction_commits_joined_writes(db):
+    async def scenario():
+        async with db.transaction():
+            await db.store_normalized_analysis('AAA', {'roe': 0.1})
+            await db.store_normalized_analysis('BBB', {'roe': 0.2})
+
+    asyncio.run(scenario())
+    assert _symbols(db) == ['AAA', 'BBB']
+
+
+def test_rollback_does_not_take_other_tasks_writes(db):
+    entered = None
+
+    async def owner():
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.store_normalized_analysis('OWNER', {'roe': 0.1})
+                entered.set()
+                await asyncio.sleep(0.05)
+                raise RuntimeError('abort')
+
+    async def bystander():
+        await entered.wait()
+        assert not db._workers.in_transaction()
+        assert await db.store_normalized_analysis('OTHER', {'roe': 0.2})
+
+    async def scenario():
+        nonlocal entered
+        entered = asyncio.Event()
+        await asyncio.gather(owner(), bystander())
+
+    asyncio.run(scenario())
+    assert _symbols(db) == ['OTHER']
+
+
+def test_reads_inside_transaction_see_uncommitted_writes(db):
+    async def scenario():
+        async with db.transaction():
+            await db.store_normalized_analysis('AAA', {'roe': 0.1})
+            return await db.query_records('SELECT COUNT(*) AS n FROM stock_analysis')
+
+    assert asyncio.run(scenario())[0]['n'] == 1
+
+
+def test_tasks_spawned_inside_a_scope_do_not_inherit_it(db):
+    async def scenario():
+        release, spawned_done = asyncio.Event(), asyncio.Event()
+
+        async def spawned():
+            await release.wait()
+            await db.store_normalized_analysis('SPAWNED', {'roe': 0.3})
+            spawned_done.set()
+
+        async with db.transaction():
+            task = asyncio.create_task(spawned())
+            await db.store_normalized_analysis('FIRST', {'roe': 0.1})
+
+        with pytest.raises(RuntimeError):
+            async with db.transaction():
+                await db.store_normalized_analysis('SECOND', {'roe': 0.2})
+                release.set()
+                await asyncio.sleep(0.05)
+                # The spawned write waits for this scope instead of joining it
+                assert not spawned_done.is_set()
+                raise RuntimeError('abort')
+        await task
+
+    asyncio.run(scenario())
+    assert _symbols(db) == ['FIRST', 'SPAWNED']
+
+
+def test_new_reader_connections_open_during_a_write_transaction(db):
+    async def scenario():
+        await db.store_normalized_analysis('AAA', {'roe': 0.1})
+        async with db.transaction():
+            await db.store_normalized_analysis('BBB', {'roe': 0.2})
+            # Another task on a fresh reader thread sees the committed rows only
+            return await asyncio.create_task(db.query_records('SELECT COUNT(*) AS n FROM stock_analysis'))
+
+    db._workers.reader_threads = 1
+    assert asyncio.run(scenario())[0]['n'] == 1